@@ -20,105 +20,208 @@ v3 History:
 
 import re
 import sys
+from bisect import bisect_left, bisect_right
 from pathlib import Path
 import xml.etree.ElementTree as ET
 
+try:
+    from lxml import etree as lxml_etree
+except ImportError:  # lxml is optional; the stdlib parser is always available
+    lxml_etree = None
 
-def clean_text(text):
-    """Clean and normalize extracted text."""
-    if not text:
-        return ""
+# Text normalization is shared with the other converters in scripts/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+from text_normalize import clean_text
+
+# Parser backends for convert_formex_to_md(); both yield the same Markdown.
+# lxml parses faster, but the converter's Python-side walk over its proxy
+# elements costs more than that saves, so it is opt-in (--backend lxml)
+BACKENDS = ('lxml', 'stdlib')
+DEFAULT_BACKEND = 'stdlib'
+
+
+class FormexIndex:
+    """
+    Single-pass index over a parsed Formex tree.
+    
+    Built from one pre-order traversal, it replaces the repeated
+    `root.findall('.//TAG')` descendant scans the extractors used to run:
     
-    # Normalize whitespace
-    text = ' '.join(text.split())
+    - by_tag:  tag -> elements in document order
+    - parent:  element -> parent element (ElementTree has no parent axis)
+    - in_quot_s / in_tbl: elements nested inside a QUOT.S / TBL block
     
-    # Clean up quote markers
-    text = re.sub(r'\s+,\s*$', ',', text)
-    text = re.sub(r'\s+;\s*$', ';', text)
-    text = re.sub(r'\s+\.\s*$', '.', text)
+    Each element also gets a pre-order position and the position just past
+    its last descendant, so "descendants of X with tag T" is a bisect over
+    by_tag[T] instead of a subtree walk.
+    """
     
-    return text.strip()
+    def __init__(self, root):
+        self.root = root
+        
+        # root.iter() is pre-order in both ElementTree and lxml, and runs in C
+        order = list(root.iter())
+        self._start = start = {elem: i for i, elem in enumerate(order)}
+        if hasattr(root, 'getparent'):
+            # lxml has a native parent axis, much cheaper than child iteration
+            self.parent = {elem: elem.getparent() for elem in order[1:]}
+        else:
+            self.parent = {child: elem for elem in order for child in elem}
+        
+        self.by_tag = {}
+        for elem in order:
+            self.by_tag.setdefault(elem.tag, []).append(elem)
+        
+        # Walking backwards, every descendant is seen before its ancestor,
+        # so each element's end is final by the time it pushes to its parent
+        self._end = end = {}
+        parent = self.parent
+        for elem in reversed(order):
+            elem_end = end.setdefault(elem, start[elem] + 1)
+            up = parent.get(elem)
+            if up is not None and end.get(up, 0) < elem_end:
+                end[up] = elem_end
+        
+        self.in_quot_s = self._inside('QUOT.S')
+        self.in_tbl = self._inside('TBL')
+        
+        self._positions = {
+            tag: [start[e] for e in elems] for tag, elems in self.by_tag.items()
+        }
+    
+    def _inside(self, tag):
+        """Set of elements strictly nested inside some element with the given tag."""
+        nested = set()
+        for elem in self.by_tag.get(tag, ()):
+            if elem not in nested:
+                nested.update(elem.iter())
+                nested.discard(elem)
+        return nested
+    
+    def descendants(self, elem, tag):
+        """All descendants of elem with the given tag (like elem.findall('.//TAG'))."""
+        elems = self.by_tag.get(tag)
+        if not elems:
+            return []
+        positions = self._positions[tag]
+        lo = bisect_right(positions, self._start[elem])
+        hi = bisect_left(positions, self._end[elem], lo)
+        return elems[lo:hi]
+    
+    def first(self, elem, tag, parent_tag=None):
+        """
+        First descendant of elem with the given tag (like elem.find('.//TAG')).
+        
+        With parent_tag, the match's parent must also have that tag
+        (like elem.find('.//PARENT/TAG')).
+        """
+        for match in self.descendants(elem, tag):
+            if parent_tag is None or self.parent[match].tag == parent_tag:
+                return match
+        return None
+
+
+# Per-conversion memo of get_element_text() results, keyed by id(element).
+# Only active inside convert_formex_to_md() while its tree is alive, so ids
+# can't be recycled by unrelated elements. None = memoization off.
+_text_memo = None
+
+# Quote marker elements are rendered from their CODE attribute only
+QUOTE_TAGS = frozenset(('QUOT.START', 'QUOT.END', 'QUOT.S', 'QUOT.E'))
+QUOTE_CHARS = {'201C': '"', '201D': '"', '2018': "'", '2019': "'"}
+
+# Inline elements whose text is included as-is
+PLAIN_INLINE_TAGS = frozenset(('DATE', 'REF.DOC.OJ', 'FT'))
+
+
+def _append_child_text(parts, child, inner):
+    """Append one child's extracted text to its parent's parts, applying inline rules."""
+    tag = child.tag
+    
+    # Handle footnotes/notes - convert to inline reference
+    # IMPORTANT: Escape square brackets to prevent Markdown link interpretation
+    if tag == 'NOTE':
+        if inner:
+            escaped_text = inner.strip().replace('[', '\\[').replace(']', '\\]')
+            parts.append(f" \\[{escaped_text}\\]")
+    # Handle dates, Official Journal references and formatted numbers
+    elif tag in PLAIN_INLINE_TAGS:
+        parts.append(inner)
+    # Handle highlighting/formatting
+    elif tag == 'HT':
+        # Add leading space if previous part ends with a number (e.g., "1.1" before "Theft")
+        if parts and parts[-1] and parts[-1][-1].isdigit():
+            inner = ' ' + inner
+        ht_type = child.get('TYPE', '')
+        if ht_type == 'ITALIC':
+            parts.append(f"*{inner}*")
+        elif ht_type == 'BOLD':
+            parts.append(f"**{inner}**")
+        else:  # UC (uppercase) and others
+            parts.append(inner)
+    # Other elements
+    else:
+        # Add leading space if previous part ends with a number/digit and
+        # this text starts with a formatting marker (e.g., "1.1" then "*Theft*")
+        if inner and parts and parts[-1]:
+            if parts[-1][-1].isdigit() and inner[0] in '*':
+                inner = ' ' + inner
+        parts.append(inner)
 
 
 def get_element_text(elem, include_tail=False):
     """
-    Extract all text from an element recursively.
+    Extract all text from an element and its descendants.
     Handles nested elements like NOTE, DATE, REF.DOC.OJ, etc.
+    
+    Walks the subtree with an explicit stack (no recursion). During a
+    conversion, results are memoized per requested element, so the callers
+    that re-extract the same P/ALINEA subtrees pay for them only once and
+    walks over an enclosing element reuse already-extracted children.
     """
     if elem is None:
         return ""
     
-    parts = []
-    
-    # Element's own text
-    if elem.text:
-        parts.append(elem.text)
-    
-    # Process children
-    for child in elem:
-        tag = child.tag
-        
-        # Skip processing instructions
-        if isinstance(tag, str):
-            # Handle footnotes/notes - convert to inline reference
-            # IMPORTANT: Escape square brackets to prevent Markdown link interpretation
-            if tag == 'NOTE':
-                note_id = child.get('NOTE.ID', '')
-                note_text = get_element_text(child)
-                # Format as inline footnote with escaped brackets
-                if note_text:
-                    escaped_text = note_text.strip().replace('[', '\\[').replace(']', '\\]')
-                    parts.append(f" \\[{escaped_text}\\]")
-            # Handle date elements
-            elif tag == 'DATE':
-                parts.append(get_element_text(child))
-            # Handle Official Journal references
-            elif tag == 'REF.DOC.OJ':
-                parts.append(get_element_text(child))
-            # Handle highlighting/formatting
-            elif tag == 'HT':
-                ht_type = child.get('TYPE', '')
-                inner = get_element_text(child)
-                # Add leading space if previous part ends with a number (e.g., "1.1" before "Theft")
-                if parts and parts[-1] and parts[-1][-1].isdigit():
-                    inner = ' ' + inner
-                if ht_type == 'ITALIC':
-                    parts.append(f"*{inner}*")
-                elif ht_type == 'BOLD':
-                    parts.append(f"**{inner}**")
-                elif ht_type == 'UC':  # Uppercase
-                    parts.append(inner)
+    memo = _text_memo
+    if memo is not None:
+        cached = memo.get(id(elem))
+        if cached is not None:
+            return cached
+    
+    # Frames: (element, text parts so far, iterator over remaining children)
+    stack = [(elem, [elem.text] if elem.text else [], iter(elem))]
+    while True:
+        node, parts, children = stack[-1]
+        for child in children:
+            tag = child.tag
+            # Skip processing instructions
+            if isinstance(tag, str):
+                if tag in QUOTE_TAGS:
+                    quote = QUOTE_CHARS.get(child.get('CODE', ''))
+                    if quote:
+                        parts.append(quote)
                 else:
-                    parts.append(inner)
-            # Handle quote markers
-            elif tag in ('QUOT.START', 'QUOT.END', 'QUOT.S', 'QUOT.E'):
-                code = child.get('CODE', '')
-                if code == '201C':
-                    parts.append('"')
-                elif code == '201D':
-                    parts.append('"')
-                elif code in ('2018', '2019'):
-                    parts.append("'")
-            # Handle formatted numbers
-            elif tag == 'FT':
-                parts.append(get_element_text(child))
-            # Recursively process other elements
-            else:
-                inner = get_element_text(child)
-                # Add leading space if previous part ends with a number/digit and
-                # this text starts with a formatting marker (e.g., "1.1" then "*Theft*")
-                if inner and parts and parts[-1]:
-                    last_char = parts[-1][-1]
-                    first_char = inner[0]
-                    if last_char.isdigit() and first_char in '*':
-                        inner = ' ' + inner
-                parts.append(inner)
-        
-        # Include tail text
-        if child.tail:
-            parts.append(child.tail)
-    
-    return ''.join(parts)
+                    inner = memo.get(id(child)) if memo is not None else None
+                    if inner is None:
+                        # Descend; this frame's iterator resumes after the child
+                        stack.append((child, [child.text] if child.text else [], iter(child)))
+                        break
+                    _append_child_text(parts, child, inner)
+            # Include tail text
+            if child.tail:
+                parts.append(child.tail)
+        else:
+            # All children of node done
+            stack.pop()
+            text = ''.join(parts)
+            if not stack:
+                if memo is not None:
+                    memo[id(node)] = text
+                return text
+            parent_parts = stack[-1][1]
+            _append_child_text(parent_parts, node, text)
+            if node.tail:
+                parent_parts.append(node.tail)
 
 
 def convert_table_to_markdown(tbl_elem):
@@ -640,14 +743,15 @@ def process_list_simple(list_elem, indent_level=0):
     return lines
 
 
-def extract_recitals(root):
+def extract_recitals(root, index=None):
     """Extract recitals (Whereas clauses) from GR.CONSID.
     
     Outputs recitals as list items for proper indentation.
     """
     lines = []
+    index = index or FormexIndex(root)
     
-    gr_consid = root.find('.//GR.CONSID')
+    gr_consid = index.first(root, 'GR.CONSID')
     if gr_consid is None:
         return lines
     
@@ -955,7 +1059,7 @@ def process_alinea(alinea_elem):
     return lines
 
 
-def extract_divisions_with_articles(root):
+def extract_divisions_with_articles(root, index=None):
     """Extract DIVISION elements that contain CHAPTER headings and ARTICLE elements.
     
     This handles implementing regulations that organize content into chapters:
@@ -975,9 +1079,10 @@ def extract_divisions_with_articles(root):
     """
     lines = []
     processed_articles = set()
+    index = index or FormexIndex(root)
     
     # Find ENACTING.TERMS
-    enacting = root.find('.//ENACTING.TERMS')
+    enacting = index.first(root, 'ENACTING.TERMS')
     if enacting is None:
         return lines, processed_articles
     
@@ -1100,7 +1205,7 @@ def extract_single_article(article, articles_in_quot, heading_level=3):
     return lines
 
 
-def extract_articles(root):
+def extract_articles(root, index=None):
     """Extract and format articles with proper quote handling.
     
     IMPORTANT: Skip any ARTICLE elements that are nested inside QUOT.S blocks,
@@ -1116,20 +1221,19 @@ def extract_articles(root):
               - (i) subpoint text...
     """
     lines = []
+    index = index or FormexIndex(root)
     
     # First extract DIVISION elements with chapter headings
     # This handles implementing regulations with chapter structure
-    division_lines, processed_articles = extract_divisions_with_articles(root)
+    division_lines, processed_articles = extract_divisions_with_articles(root, index)
     lines.extend(division_lines)
     
     # Find all ARTICLE elements that are INSIDE a QUOT.S block
     # These should NOT be extracted as standalone articles
-    articles_in_quot = set()
-    for quot_s in root.findall('.//QUOT.S'):
-        for nested_article in quot_s.findall('.//ARTICLE'):
-            articles_in_quot.add(nested_article)
+    all_articles = index.descendants(root, 'ARTICLE')
+    articles_in_quot = {a for a in all_articles if a in index.in_quot_s}
     
-    for article in root.findall('.//ARTICLE'):
+    for article in all_articles:
         # Skip articles already processed in DIVISION extraction
         if article in processed_articles:
             continue
@@ -1144,7 +1248,7 @@ def extract_articles(root):
     return lines
 
 
-def extract_gr_seq_sections(root):
+def extract_gr_seq_sections(root, index=None):
     """Extract and format GR.SEQ sections from ENACTING.TERMS.
     
     Used for Recommendations which structure their normative content differently
@@ -1167,9 +1271,10 @@ def extract_gr_seq_sections(root):
     Returns list of Markdown lines.
     """
     lines = []
+    index = index or FormexIndex(root)
     
     # Find ENACTING.TERMS
-    enacting = root.find('.//ENACTING.TERMS')
+    enacting = index.first(root, 'ENACTING.TERMS')
     if enacting is None:
         return lines
     
@@ -1303,16 +1408,64 @@ def extract_gr_seq_sections(root):
     return lines
 
 
-def convert_formex_to_md(xml_path, output_path=None):
-    """Main conversion function."""
-    tree = ET.parse(xml_path)
-    root = tree.getroot()
+def parse_formex(xml_path, backend=None):
+    """
+    Parse a Formex file and return its root element.
+    
+    backend is 'lxml' or 'stdlib' (default: stdlib). The lxml
+    parser drops comments and processing instructions like ElementTree
+    does, so both trees have the same shape and render identically.
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend == 'lxml':
+        if lxml_etree is None:
+            raise ValueError("lxml backend requested but lxml is not installed")
+        parser = lxml_etree.XMLParser(remove_comments=True, remove_pis=True,
+                                      resolve_entities=False, huge_tree=True)
+        return lxml_etree.parse(xml_path, parser).getroot()
+    if backend == 'stdlib':
+        return ET.parse(xml_path).getroot()
+    raise ValueError(f"Unknown backend: {backend!r} (expected one of {', '.join(BACKENDS)})")
+
+
+def convert_formex_to_md(xml_path, output_path=None, backend=None, stats=None):
+    """Main conversion function.
+    
+    xml_path may be a filename or a binary file object (e.g. a zipfile
+    member stream), as accepted by ElementTree.parse(). backend selects
+    the XML parser (see parse_formex()). If a stats dict is given, the
+    parsed tree's element count is stored under 'xml_elements'.
+    """
+    global _text_memo
+    
+    root = parse_formex(xml_path, backend)
+    if stats is not None:
+        stats['xml_elements'] = sum(1 for _ in root.iter())
+    
+    _text_memo = {}
+    try:
+        content = formex_tree_to_md(root)
+    finally:
+        _text_memo = None
+    
+    if output_path:
+        Path(output_path).write_text(content, encoding='utf-8')
+        print(f"Converted: {xml_path} -> {output_path}")
+        print(f"  Size: {len(content):,} bytes")
+    
+    return content
+
+
+def formex_tree_to_md(root):
+    """Render a parsed Formex tree (ACT, CONS.ACT or standalone ANNEX root) to Markdown."""
+    # One traversal up front; every extractor below reuses it
+    index = FormexIndex(root)
     
     md_lines = []
     
     # Title - skip for standalone ANNEX files (they're handled in annex processing)
     if root.tag != 'ANNEX':
-        title_elem = root.find('.//TITLE')
+        title_elem = index.first(root, 'TITLE')
         if title_elem is not None:
             ti = title_elem.find('TI')
             if ti is not None:
@@ -1326,7 +1479,7 @@ def convert_formex_to_md(xml_path, output_path=None):
                     md_lines.append("")
     
     # Preamble init
-    preamble = root.find('.//PREAMBLE')
+    preamble = index.first(root, 'PREAMBLE')
     if preamble is not None:
         preamble_init = preamble.find('PREAMBLE.INIT')
         if preamble_init is not None:
@@ -1338,7 +1491,7 @@ def convert_formex_to_md(xml_path, output_path=None):
                 md_lines.append("")
     
     # GR.VISA (Having regard to...)
-    gr_visa = root.find('.//GR.VISA')
+    gr_visa = index.first(root, 'GR.VISA')
     if gr_visa is not None:
         for visa in gr_visa.findall('VISA'):
             text = clean_text(get_element_text(visa))
@@ -1347,7 +1500,7 @@ def convert_formex_to_md(xml_path, output_path=None):
                 md_lines.append("")
     
     # Recitals
-    recital_lines = extract_recitals(root)
+    recital_lines = extract_recitals(root, index)
     md_lines.extend(recital_lines)
     
     # Preamble final
@@ -1360,24 +1513,24 @@ def convert_formex_to_md(xml_path, output_path=None):
                 md_lines.append("")
     
     # Enacting Terms header
-    enacting = root.find('.//ENACTING.TERMS')
+    enacting = index.first(root, 'ENACTING.TERMS')
     if enacting is not None:
         md_lines.append("## Enacting Terms")
         md_lines.append("")
     
     # Articles
-    article_lines = extract_articles(root)
+    article_lines = extract_articles(root, index)
     md_lines.extend(article_lines)
     
     # GR.SEQ sections (for Recommendations which use GR.SEQ instead of ARTICLE)
     # This will only produce output if there are GR.SEQ elements in ENACTING.TERMS
-    gr_seq_lines = extract_gr_seq_sections(root)
+    gr_seq_lines = extract_gr_seq_sections(root, index)
     md_lines.extend(gr_seq_lines)
     
     # Annexes - handle both nested ANNEX elements AND standalone annex files (ANNEX as root)
     # Also handle CONS.ANNEX used in consolidated documents
-    annexes = root.findall('.//ANNEX')
-    cons_annexes = root.findall('.//CONS.ANNEX')
+    annexes = index.descendants(root, 'ANNEX')
+    cons_annexes = index.descendants(root, 'CONS.ANNEX')
     annexes.extend(cons_annexes)
     
     # If root IS the ANNEX element, add it to the list
@@ -1388,9 +1541,9 @@ def convert_formex_to_md(xml_path, output_path=None):
     
     for annex in annexes:
         # Find annex title (could be TI.ANNEX, TITLE/TI, or TITLE/TI/P)
-        ti_annex = annex.find('.//TI.ANNEX')
+        ti_annex = index.first(annex, 'TI.ANNEX')
         if ti_annex is None:
-            ti_annex = annex.find('.//TITLE/TI')
+            ti_annex = index.first(annex, 'TI', parent_tag='TITLE')
         if ti_annex is None:
             ti_annex = annex.find('.//TITLE/TI/P')
         
@@ -1400,17 +1553,11 @@ def convert_formex_to_md(xml_path, output_path=None):
         
         # Find subtitle if present (GR.SEQ/TITLE)
         # Note: Use direct children or exclude GR.SEQ inside TBL to avoid duplicate processing
-        gr_seqs = annex.findall('.//GR.SEQ')
-        
-        # Filter out GR.SEQ elements that are inside TBL elements (they're processed with tables)
-        tbl_nested_gr_seqs = set()
-        for tbl in annex.findall('.//TBL'):
-            for nested_gr_seq in tbl.findall('.//GR.SEQ'):
-                tbl_nested_gr_seqs.add(nested_gr_seq)
+        gr_seqs = index.descendants(annex, 'GR.SEQ')
         
         for gr_seq in gr_seqs:
             # Skip GR.SEQ elements that are inside tables (processed with table content)
-            if gr_seq in tbl_nested_gr_seqs:
+            if gr_seq in index.in_tbl:
                 continue
                 
             seq_title = gr_seq.find('TITLE/TI')
@@ -1425,7 +1572,10 @@ def convert_formex_to_md(xml_path, output_path=None):
             
             # Process content within GR.SEQ
             # Look for CONTENTS first, otherwise use GR.SEQ directly
-            contents = gr_seq.find('CONTENTS') or gr_seq
+            # An empty CONTENTS falls back to the GR.SEQ itself
+            contents = gr_seq.find('CONTENTS')
+            if contents is None or len(contents) == 0:
+                contents = gr_seq
             
             # Extract intro paragraph(s) BEFORE the list
             # Example: <P>Qualified certificates shall contain:</P> <LIST>...</LIST>
@@ -1552,9 +1702,11 @@ def convert_formex_to_md(xml_path, output_path=None):
                             md_lines.append("")
             else:
                 # Last resort: process P elements directly under annex
-                for p in annex.findall('.//P'):
-                    # Skip P elements that are inside LIST items (already processed)
-                    if p.find('..') is not None and p.find('..').tag in ('NP', 'TXT', 'ITEM'):
+                for p in index.descendants(annex, 'P'):
+                    # Skip P elements that are inside LIST items (already processed).
+                    # ElementTree has no parent axis (p.find('..') is always None),
+                    # so use the index's parent map.
+                    if index.parent[p].tag in ('NP', 'TXT', 'ITEM'):
                         continue
                     text = clean_text(get_element_text(p))
                     if text:
@@ -1562,11 +1714,11 @@ def convert_formex_to_md(xml_path, output_path=None):
                         md_lines.append("")
     
     # Final provisions
-    final = root.find('.//FINAL')
+    final = index.first(root, 'FINAL')
     if final is not None:
         md_lines.append("---")
         md_lines.append("")
-        for p in final.findall('.//P'):
+        for p in index.descendants(final, 'P'):
             text = clean_text(get_element_text(p))
             if text:
                 md_lines.append(text)
@@ -1595,11 +1747,6 @@ def convert_formex_to_md(xml_path, output_path=None):
         flags=re.MULTILINE
     )
     
-    if output_path:
-        Path(output_path).write_text(content, encoding='utf-8')
-        print(f"Converted: {xml_path} -> {output_path}")
-        print(f"  Size: {len(content):,} bytes")
-    
     return content
 
 
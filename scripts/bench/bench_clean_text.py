@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: text_normalize against the per-converter re.sub() chains.
+
+Collects the raw paragraph texts of a saved EUR-Lex HTML fixture (what the
+converters feed to clean_text()) and times the old regex chains against
+the shared module's fast path. Each pair is checked for identical output
+before it is timed.
+
+Usage:
+    python scripts/bench/bench_clean_text.py
+    python scripts/bench/bench_clean_text.py --fixture 32008R0765 --repeat 50
+"""
+
+import argparse
+import gzip
+import re
+import sys
+import time
+from pathlib import Path
+
+import lxml.html
+
+SCRIPT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPT_DIR))
+
+from text_normalize import clean_marked_text, clean_text, normalize_space
+
+FIXTURES_DIR = SCRIPT_DIR / "fixtures" / "html"
+
+
+def regex_clean_text(text):
+    """formex_to_md_v3.clean_text() before text_normalize."""
+    if not text:
+        return ""
+    text = ' '.join(text.split())
+    text = re.sub(r'\s+,\s*$', ',', text)
+    text = re.sub(r'\s+;\s*$', ';', text)
+    text = re.sub(r'\s+\.\s*$', '.', text)
+    return text.strip()
+
+
+def regex_clean_marked_text(text):
+    """eurlex_html_to_md.clean_text() before text_normalize."""
+    if not text:
+        return ""
+    text = re.sub(r'►[A-Z]\d*\s*', '', text)
+    text = re.sub(r'◄', '', text)
+    text = re.sub(r'▼[A-Z]\d*', '', text)
+    return regex_clean_text(text)
+
+
+def regex_normalize_space(text):
+    """eurlex_formex.clean_text() before text_normalize."""
+    if text is None:
+        return ""
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def time_calls(func, texts: list, repeat: int) -> float:
+    """Mean microseconds per call over all texts."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            func(text)
+    return (time.perf_counter() - start) / (repeat * len(texts)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--fixture', default='32016R0679',
+                        help='HTML fixture to take texts from (default: GDPR)')
+    parser.add_argument('--repeat', type=int, default=20, help='Passes over the texts')
+    args = parser.parse_args()
+    
+    with gzip.open(FIXTURES_DIR / f"{args.fixture}.html.gz", 'rb') as f:
+        root = lxml.html.document_fromstring(f.read())
+    texts = [element.text_content() for element in root.iter('p', 'td')]
+    marked = sum(1 for text in texts if any(c in text for c in '►◄▼'))
+    
+    print(f"\n{args.fixture}: {len(texts):,} texts ({marked:,} with markers), {args.repeat} passes")
+    pairs = (
+        ('clean_marked_text', regex_clean_marked_text, clean_marked_text),
+        ('clean_text', regex_clean_text, clean_text),
+        ('normalize_space', regex_normalize_space, normalize_space),
+    )
+    for name, old, new in pairs:
+        if [old(text) for text in texts] != [new(text) for text in texts]:
+            sys.exit(f"❌ {name}: output differs from the regex chain")
+        before = time_calls(old, texts, args.repeat)
+        after = time_calls(new, texts, args.repeat)
+        print(f"   {name:18} re.sub: {before:6.2f} µs   shared: {after:6.2f} µs  ({before / after:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
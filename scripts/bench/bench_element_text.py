@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: get_element_text() with and without the per-conversion memo.
+
+Renders the consolidated eIDAS Regulation (the largest cached Formex act)
+repeatedly, once with memoization off and once with it on, and reports the
+mean time per render.
+
+Usage:
+    python scripts/bench/bench_element_text.py
+    python scripts/bench/bench_element_text.py --celex 32024R1183 --repeat 50
+"""
+
+import argparse
+import sys
+import time
+import xml.etree.ElementTree as ET
+import zipfile
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPT_DIR))
+sys.path.insert(0, str(SCRIPT_DIR.parent / ".legacy"))
+
+import formex_to_md_v3
+from formex_to_md_v3 import formex_tree_to_md
+from pipeline import CACHE_DIR, extract_formex
+
+
+def time_render(root, repeat: int, memo: bool) -> float:
+    """Mean milliseconds per formex_tree_to_md() call."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        formex_to_md_v3._text_memo = {} if memo else None
+        try:
+            formex_tree_to_md(root)
+        finally:
+            formex_to_md_v3._text_memo = None
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--celex', default='02014R0910-20241018',
+                        help='Cached document to render (default: consolidated eIDAS)')
+    parser.add_argument('--repeat', type=int, default=20, help='Renders per variant')
+    args = parser.parse_args()
+    
+    zip_path = CACHE_DIR / f"{args.celex}.fmx4.zip"
+    with zipfile.ZipFile(zip_path) as zf:
+        main_xml, _ = extract_formex(zf)
+        with zf.open(main_xml) as stream:
+            root = ET.parse(stream).getroot()
+    
+    uncached = time_render(root, args.repeat, memo=False)
+    cached = time_render(root, args.repeat, memo=True)
+    
+    print(f"\n{args.celex}: {sum(1 for _ in root.iter()):,} elements, {args.repeat} renders")
+    print(f"   no memo: {uncached:8.2f} ms")
+    print(f"   memo:    {cached:8.2f} ms  ({uncached / cached:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
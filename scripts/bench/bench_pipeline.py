@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the conversion pipeline over the cached corpus.
+
+Times each pipeline stage on every cached document and reports wall time,
+peak RSS and Python allocations as JSON. With --baseline, the run is compared
+against an earlier report and exits non-zero when any stage regressed past
+--threshold, so a slower converter shows up separately from a slower network
+(nothing here touches the network).
+
+Stages:
+    extract_formex          classify the members of the cached .fmx4.zip
+    convert_formex_to_md    convert the main act and its annexes from the ZIP
+    convert_html_to_markdown  convert the latest stored EUR-Lex HTML page, if any
+    lint_markdown           lint the converted Markdown
+    process_document        full pipeline run (cached archive, into a temp dir)
+
+Usage:
+    python scripts/bench/bench_pipeline.py --output bench.json
+    python scripts/bench/bench_pipeline.py --baseline bench.json --threshold 0.15
+    python scripts/bench/bench_pipeline.py --only 32024R2977 --repeat 5
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPT_DIR))
+sys.path.insert(0, str(SCRIPT_DIR.parent / ".legacy"))
+
+import eurlex_html_to_md
+import formex_to_md_v3
+import pipeline
+from eurlex_html_to_md import convert_html_to_markdown, load_stored_html
+from md_linter import lint_markdown
+from pipeline import CACHE_DIR, convert_member, extract_formex, load_config, process_document
+
+STAGES = (
+    'extract_formex',
+    'convert_formex_to_md',
+    'convert_html_to_markdown',
+    'lint_markdown',
+    'process_document',
+)
+
+
+def peak_rss_kb() -> int:
+    """Peak resident set size of this process in KiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports KiB
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def reset_peak_rss():
+    """Reset the kernel's peak RSS counter so the next stage is measured alone (Linux only)."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def current_peak_rss_kb() -> int:
+    """Peak RSS since the last reset_peak_rss(), falling back to the process lifetime peak."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return peak_rss_kb()
+
+
+def measure(func, repeat: int) -> dict:
+    """
+    Run func() repeat times for timing, then once more under tracemalloc.
+    
+    Timing runs exclude tracemalloc overhead; the best run is reported
+    since it is the least disturbed by the rest of the machine.
+    """
+    timings = []
+    reset_peak_rss()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    rss = current_peak_rss_kb()
+    
+    tracemalloc.start()
+    try:
+        func()
+        _, alloc_peak = tracemalloc.get_traced_memory()
+        alloc_blocks = sum(stat.count for stat in
+                           tracemalloc.take_snapshot().statistics('filename'))
+    finally:
+        tracemalloc.stop()
+    
+    return {
+        'wall_ms': round(min(timings) * 1000, 3),
+        'mean_ms': round(sum(timings) / len(timings) * 1000, 3),
+        'peak_rss_kb': rss,
+        'alloc_peak_kb': round(alloc_peak / 1024, 1),
+        'alloc_live_blocks': alloc_blocks,
+    }
+
+
+def convert_archive(zip_path: Path, backend: str) -> str:
+    """Convert the main act and annexes of a cached archive, as the pipeline does."""
+    with zipfile.ZipFile(zip_path) as zf:
+        main_xml, annex_xmls = extract_formex(zf)
+        parts = [convert_member(zf, main_xml, backend=backend)]
+        parts += [convert_member(zf, annex, backend=backend) for annex in annex_xmls]
+    return '\n\n'.join(part for part in parts if part and part.strip())
+
+
+def bench_document(doc: dict, workdir: Path, repeat: int, backend: str) -> dict:
+    """Measure every applicable stage for one document."""
+    celex = doc['celex']
+    results = {}
+    
+    zip_path = CACHE_DIR / f"{celex}.fmx4.zip"
+    md_path = workdir / f"{celex}.md"
+    if zip_path.exists():
+        def classify():
+            with zipfile.ZipFile(zip_path) as zf:
+                extract_formex(zf)
+        
+        results['extract_formex'] = measure(classify, repeat)
+        results['convert_formex_to_md'] = measure(lambda: convert_archive(zip_path, backend), repeat)
+        md_path.write_text(convert_archive(zip_path, backend), encoding='utf-8')
+        
+        def full_run():
+            if not process_document(doc, force=True, backend=backend):
+                raise RuntimeError(f"process_document failed for {celex}")
+        
+        results['process_document'] = measure(full_run, repeat)
+    
+    stored = load_stored_html(celex)
+    if stored:
+        html, _ = stored
+        results['convert_html_to_markdown'] = measure(
+            lambda: convert_html_to_markdown(celex, html), repeat)
+        if not md_path.exists():
+            md_path.write_text(convert_html_to_markdown(celex, html), encoding='utf-8')
+    
+    if md_path.exists():
+        results['lint_markdown'] = measure(lambda: lint_markdown(str(md_path)), repeat)
+    
+    return results
+
+
+def summarize(documents: dict) -> dict:
+    """Per-stage totals across documents (wall time summed, memory maxed)."""
+    stages = {}
+    for results in documents.values():
+        for stage, m in results.items():
+            total = stages.setdefault(stage, {
+                'documents': 0, 'wall_ms': 0.0, 'peak_rss_kb': 0, 'alloc_peak_kb': 0.0,
+            })
+            total['documents'] += 1
+            total['wall_ms'] = round(total['wall_ms'] + m['wall_ms'], 3)
+            total['peak_rss_kb'] = max(total['peak_rss_kb'], m['peak_rss_kb'])
+            total['alloc_peak_kb'] = max(total['alloc_peak_kb'], m['alloc_peak_kb'])
+    return {stage: stages[stage] for stage in STAGES if stage in stages}
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> list:
+    """
+    Compare per-stage wall time against a baseline report.
+    
+    Only documents present in both reports are counted, so adding a
+    document to the corpus doesn't read as a regression.
+    
+    Returns a list of (stage, baseline_ms, current_ms) for stages that
+    slowed down by more than threshold (0.10 = 10%). A stage the baseline
+    measured for one of those documents but this run didn't (say, its
+    cached input went missing) is returned with current_ms None rather
+    than letting the stage's total shrink.
+    """
+    common = report['documents'].keys() & baseline['documents'].keys()
+    current = summarize({c: report['documents'][c] for c in common})
+    previous = summarize({c: baseline['documents'][c] for c in common})
+    
+    regressions = []
+    for stage, before in previous.items():
+        stats = current.get(stage)
+        if stats is None or stats['documents'] < before['documents']:
+            regressions.append((stage, before['wall_ms'], None))
+        elif stats['wall_ms'] > before['wall_ms'] * (1 + threshold):
+            regressions.append((stage, before['wall_ms'], stats['wall_ms']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--only', help='Benchmark only this CELEX number')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per stage (default: 3)')
+    parser.add_argument('--backend', choices=formex_to_md_v3.BACKENDS,
+                        default=formex_to_md_v3.DEFAULT_BACKEND,
+                        help='XML parser for the Formex converter')
+    parser.add_argument('--html-store', type=Path, default=eurlex_html_to_md.HTML_STORE_DIR,
+                        help='EUR-Lex HTML store (<CELEX>/<YYYY-MM-DD>.html.gz); '
+                             'the latest page of each document is used')
+    parser.add_argument('--output', type=Path, help='Write the JSON report to this file')
+    parser.add_argument('--baseline', type=Path, help='Compare against this earlier JSON report')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Allowed slowdown per stage in compare mode (default: 0.10)')
+    args = parser.parse_args()
+    eurlex_html_to_md.HTML_STORE_DIR = args.html_store
+    
+    config = load_config()
+    # Supplementary entries (FAQs, guidance) have no CELEX and nothing to convert
+    documents = [d for d in config.get('documents', []) if 'celex' in d]
+    if args.only:
+        documents = [d for d in documents if d['celex'] == args.only]
+    
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'backend': args.backend,
+        'repeat': args.repeat,
+        'documents': {},
+    }
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        # process_document() writes under BASE_DIR; keep the repository untouched
+        original_base = pipeline.BASE_DIR
+        pipeline.BASE_DIR = workdir / "out"
+        try:
+            for doc in documents:
+                # The converters narrate every step on stdout; keep it out of the JSON
+                with contextlib.redirect_stdout(io.StringIO()):
+                    results = bench_document(doc, workdir, args.repeat, args.backend)
+                if results:
+                    report['documents'][doc['celex']] = results
+                    print(f"   {doc['celex']:<22} " + "  ".join(
+                        f"{stage}={m['wall_ms']:.1f}ms" for stage, m in results.items()),
+                        file=sys.stderr)
+        finally:
+            pipeline.BASE_DIR = original_base
+    
+    report['stages'] = summarize(report['documents'])
+    
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + '\n', encoding='utf-8')
+    else:
+        print(text)
+    
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding='utf-8'))
+        regressions = compare(report, baseline, args.threshold)
+        for stage, before, after in regressions:
+            if after is None:
+                print(f"❌ {stage}: measured in the baseline ({before:.1f} ms) "
+                      f"but missing from this run", file=sys.stderr)
+                continue
+            print(f"❌ {stage}: {before:.1f} ms -> {after:.1f} ms "
+                  f"(+{(after / before - 1) * 100:.0f}%, limit {args.threshold * 100:.0f}%)",
+                  file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"✅ No stage slower than baseline by more than {args.threshold * 100:.0f}%",
+              file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
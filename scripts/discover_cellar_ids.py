@@ -16,87 +16,200 @@ Usage:
     python discover_cellar_ids.py --celex 32024R1183 # Discover specific document
     python discover_cellar_ids.py --all              # Rediscover all IDs
     python discover_cellar_ids.py --dry-run          # Show what would be discovered
+    python discover_cellar_ids.py --all --jobs 16    # Refresh all IDs, 16 lookups at once
+    python discover_cellar_ids.py --offline          # Use only cached notices/RDF
+
+Notices and RDF descriptions go through the shared HTTP cache (http_cache.py).
 
 After running, review and commit the updated documents.yaml.
 """
 
 import argparse
+import contextlib
 import re
 import sys
-import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import yaml
 
+import http_cache
+
 SCRIPT_DIR = Path(__file__).parent
 CONFIG_FILE = SCRIPT_DIR / "documents.yaml"
 
+# Lookups
+NOTICE_URL = "https://eur-lex.europa.eu/legal-content/EN/TXT/XML/?uri=CELEX:{celex}"
+
+# Notice scanning: English fmx4 OJ references and versioned cellar IDs
+NOTICE_PATTERN = re.compile(
+    rb'resource/(?:oj/([A-Z]_\d+)\.ENG\.fmx4|cellar/([a-f0-9-]+\.\d+\.\d+))')
+SCAN_CHUNK_SIZE = 16 * 1024
+SCAN_OVERLAP = 512  # Longer than any reference, so none is lost at a chunk boundary
+NOTICE_REFS = 'notice_refs'  # http_cache derived value: references before the OJ one
+
+
+def scan_notice(chunks, overlap: int = SCAN_OVERLAP):
+    """
+    Incrementally scan a notice streamed as byte chunks.
+    
+    Yields (oj_ref, None) or (None, cellar_id) for each reference in
+    document order, pulling the next chunk only when the current buffer
+    is used up, so a consumer that stops early stops the download too.
+    
+    The last `overlap` bytes of each buffer are carried into the next one,
+    and a match that runs up to the end of the buffer is held back until
+    more data arrives, since it may continue in the next chunk.
+    """
+    chunks = iter(chunks)
+    buffer = b''
+    pos = 0
+    eof = False
+    
+    while not eof:
+        chunk = next(chunks, None)
+        if chunk is None:
+            eof = True
+        else:
+            buffer += chunk
+        
+        keep_from = None
+        for match in NOTICE_PATTERN.finditer(buffer, pos):
+            if match.end() == len(buffer) and not eof:
+                keep_from = match.start()
+                break
+            pos = match.end()
+            oj_ref, cellar_id = match.groups()
+            yield (oj_ref and oj_ref.decode(), cellar_id and cellar_id.decode())
+        
+        if keep_from is None:
+            keep_from = max(pos, len(buffer) - overlap)
+        buffer = buffer[keep_from:]
+        pos = max(0, pos - keep_from)
+
+
+def first_oj_ref(refs, cellar_ids: list) -> str | None:
+    """Advance scan_notice() output to the first OJ reference, collecting cellar IDs on the way."""
+    for oj_ref, cellar_id in refs:
+        if oj_ref:
+            return oj_ref
+        cellar_ids.append(cellar_id)
+    return None
+
 
-def discover_cellar_id(celex: str) -> str | None:
+def discover_cellar_id(celex: str, log=print) -> str | None:
     """
     Discover the Formex cellar ID for a CELEX number.
     
+    Progress lines go through log (default: print), so concurrent
+    lookups can buffer theirs.
+    
     Returns the cellar ID (uuid.version.subversion format) or None if not found.
     """
-    print(f"   🔍 Discovering cellar ID for {celex}...")
-    
-    # Step 1: Download XML notice
-    notice_url = f"https://eur-lex.europa.eu/legal-content/EN/TXT/XML/?uri=CELEX:{celex}"
+    log(f"   🔍 Discovering cellar ID for {celex}...")
+    notice_url = NOTICE_URL.format(celex=celex)
     
-    try:
-        req = urllib.request.Request(notice_url, headers={'User-Agent': 'Mozilla/5.0'})
-        with urllib.request.urlopen(req, timeout=60) as response:
-            content = response.read()
-    except Exception as e:
-        print(f"   ❌ Failed to download notice: {e}")
-        return None
-    
-    # Step 2: Try to find OJ reference for fmx4 format
-    oj_match = re.search(rb'resource/oj/([A-Z]_\d+)\.ENG\.fmx4', content)
-    if oj_match:
-        oj_ref = oj_match.group(1).decode()
-        print(f"   📄 Found OJ reference: {oj_ref}")
+    with contextlib.ExitStack() as stack:
+        def stream_notice():
+            chunks = http_cache.iter_chunks(notice_url, timeout=60, chunk_size=SCAN_CHUNK_SIZE)
+            stack.callback(chunks.close)
+            return scan_notice(chunks)
         
-        # Step 3: Download RDF to get cellar ID
-        rdf_url = f"http://publications.europa.eu/resource/oj/{oj_ref}.ENG.fmx4"
-        try:
-            req = urllib.request.Request(rdf_url, headers={
-                'Accept': 'application/rdf+xml, */*',
-                'User-Agent': 'Mozilla/5.0'
-            })
-            with urllib.request.urlopen(req, timeout=30) as response:
-                rdf_content = response.read().decode('utf-8', errors='ignore')
+        # Step 1: References from an earlier scan, or stream the XML notice,
+        # stopping at the first English fmx4 reference
+        refs = None
+        known = http_cache.load_derived(notice_url, NOTICE_REFS)
+        if known is not None:
+            oj_ref, cellar_ids = known['oj_ref'], list(known['cellar_ids'])
+        else:
+            refs = stream_notice()
+            cellar_ids = []
             
-            # Extract cellar ID with version numbers
-            cellar_match = re.search(r'resource/cellar/([a-f0-9-]+\.\d+\.\d+)', rdf_content)
-            if cellar_match:
-                cellar_id = cellar_match.group(1)
-                print(f"   ✅ Found: {cellar_id}")
-                return cellar_id
+            # Step 2: Try to find OJ reference for fmx4 format
+            try:
+                oj_ref = first_oj_ref(refs, cellar_ids)
+            except Exception as e:
+                log(f"   ❌ Failed to download notice: {e}")
+                return None
+            if oj_ref:
+                # The notice is abandoned part-way and never cached: keep what was found
+                http_cache.store_derived(notice_url, NOTICE_REFS,
+                                         {'oj_ref': oj_ref, 'cellar_ids': cellar_ids})
+        
+        if oj_ref:
+            log(f"   📄 Found OJ reference: {oj_ref}")
+            
+            # Step 3: Download RDF to get cellar ID
+            try:
+                response = http_cache.fetch_rdf(oj_ref)
+                rdf_content = response.content.decode('utf-8', errors='ignore')
                 
+                # Extract cellar ID with version numbers
+                cellar_match = re.search(r'resource/cellar/([a-f0-9-]+\.\d+\.\d+)', rdf_content)
+                if cellar_match:
+                    cellar_id = cellar_match.group(1)
+                    log(f"   ✅ Found: {cellar_id}")
+                    return cellar_id
+                    
+            except Exception as e:
+                log(f"   ⚠️  RDF lookup failed: {e}")
+        
+        # Step 4: Fallback - read the rest of the notice for cellar IDs (for consolidated acts)
+        try:
+            if refs is None:  # Cached references only: scan the whole notice
+                refs = stream_notice()
+                cellar_ids = []
+            cellar_ids.extend(cellar_id for _, cellar_id in refs if cellar_id)
         except Exception as e:
-            print(f"   ⚠️  RDF lookup failed: {e}")
+            log(f"   ❌ Failed to download notice: {e}")
+            return None
     
-    # Step 4: Fallback - try to find cellar ID directly in notice (for consolidated acts)
     # Look for versioned cellar IDs
-    cellar_matches = re.findall(rb'resource/cellar/([a-f0-9-]+\.\d+\.\d+)', content)
-    if cellar_matches:
+    if cellar_ids:
         # Filter for English XML versions (typically .0006.01 or .0006.02)
-        for match in cellar_matches:
-            cellar_id = match.decode()
+        for cellar_id in cellar_ids:
             if '.0006.' in cellar_id:  # English language code
-                print(f"   ✅ Found (fallback): {cellar_id}")
+                log(f"   ✅ Found (fallback): {cellar_id}")
                 return cellar_id
         
         # If no .0006, return first match
-        cellar_id = cellar_matches[0].decode()
-        print(f"   ⚠️  Found (first match): {cellar_id}")
+        cellar_id = cellar_ids[0]
+        log(f"   ⚠️  Found (first match): {cellar_id}")
         return cellar_id
     
-    print(f"   ❌ No cellar ID found")
+    log(f"   ❌ No cellar ID found")
     return None
 
 
+def discover_logged(celex: str) -> tuple:
+    """
+    Worker for discover_batch(): run discover_cellar_id() with its log buffered.
+    
+    Returns tuple: (cellar_id or None, log_text)
+    """
+    lines = []
+    try:
+        cellar_id = discover_cellar_id(celex, log=lines.append)
+    except Exception as e:
+        lines.append(f"   ❌ FAILED: {e}")
+        cellar_id = None
+    return (cellar_id, '\n'.join(lines))
+
+
+def discover_batch(celexes: list, jobs: int = 8):
+    """
+    Discover cellar IDs for many CELEX numbers, at most `jobs` at once.
+    
+    Yields (celex, cellar_id or None, log_text) in the order given, so
+    output and documents.yaml updates are deterministic however the
+    lookups finish.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        futures = [pool.submit(discover_logged, celex) for celex in celexes]
+        for celex, future in zip(celexes, futures):
+            yield (celex, *future.result())
+
+
 def load_config() -> dict:
     """Load existing configuration."""
     if CONFIG_FILE.exists():
@@ -121,8 +234,14 @@ def main():
                         help='Rediscover all cellar IDs (even existing ones)')
     parser.add_argument('--dry-run', action='store_true',
                         help='Show what would be discovered without updating')
+    parser.add_argument('--jobs', '-j', type=int, default=8, metavar='N',
+                        help='Maximum concurrent lookups (default: 8)')
+    parser.add_argument('--offline', action='store_true',
+                        help='Serve notices and RDF only from the HTTP cache')
     
     args = parser.parse_args()
+    if args.offline:
+        http_cache.OFFLINE = True
     
     config = load_config()
     documents = config.get('documents', [])
@@ -141,8 +260,13 @@ def main():
     updated = 0
     failed = 0
     
+    pending = {}
     for doc in documents:
-        celex = doc['celex']
+        celex = doc.get('celex')
+        
+        # Supplementary entries (FAQs, guidance) have no CELEX to look up
+        if not celex:
+            continue
         
         # Filter if --celex specified
         if args.celex and celex != args.celex:
@@ -153,9 +277,13 @@ def main():
             print(f"\n⏭️  {celex}: Already has cellar_id")
             continue
         
+        pending[celex] = doc
+    
+    # Resolve concurrently; logs and updates are applied in config order
+    for celex, cellar_id, log_text in discover_batch(list(pending), jobs=args.jobs):
+        doc = pending[celex]
         print(f"\n📄 {celex}: {doc.get('title', 'Unknown')}")
-        
-        cellar_id = discover_cellar_id(celex)
+        print(log_text)
         
         if cellar_id:
             if not args.dry_run:
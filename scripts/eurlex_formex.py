@@ -25,6 +25,9 @@ from datetime import datetime
 
 import yaml
 
+import http_cache
+from text_normalize import normalize_space
+
 # Import the improved v3 converter (better annex handling)
 from formex_to_md_v3 import convert_formex_to_md as convert_formex_v3
 
@@ -79,53 +82,37 @@ def download_file(url, filepath):
 
 
 def get_formex_url(celex):
-    """Get the Formex ZIP URL for a CELEX number."""
+    """
+    Get the Formex ZIP URL for a CELEX number.
+    
+    The notice and RDF come from the shared HTTP cache (http_cache.py).
+    """
     # Download XML notice
     notice_url = f"https://eur-lex.europa.eu/legal-content/EN/TXT/XML/?uri=CELEX:{celex}"
-    notice_path = Path(f"temp_{celex}_notice.xml")
-    
-    download_file(notice_url, notice_path)
-    
-    # Parse notice and find ENG.fmx4 reference
-    with open(notice_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+    print(f"  Fetching notice: {notice_url}")
+    response = http_cache.fetch(notice_url)
+    response.raise_for_status()
+    content = response.text
     
     # Look for Official Journal reference pattern (e.g., L_202401183)
     oj_match = re.search(r'resource/oj/([A-Z]_\d+)\.ENG\.fmx4', content)
     if oj_match:
         oj_ref = oj_match.group(1)
-        rdf_url = f"http://publications.europa.eu/resource/oj/{oj_ref}.ENG.fmx4"
         
         # Download RDF to get cellar URL
-        rdf_path = Path(f"temp_{celex}_rdf.xml")
-        download_file(rdf_url, rdf_path)
-        
-        with open(rdf_path, 'r', encoding='utf-8') as f:
-            rdf_content = f.read()
+        print(f"  Fetching RDF: {http_cache.RDF_URL.format(oj_ref=oj_ref)}")
+        response = http_cache.fetch_rdf(oj_ref)
+        rdf_content = response.text
         
         # Extract cellar URL
         cellar_match = re.search(r'resource/cellar/([a-f0-9-]+\.\d+\.\d+)', rdf_content)
         if cellar_match:
             cellar_id = cellar_match.group(1)
-            os.remove(notice_path)
-            os.remove(rdf_path)
             return f"http://publications.europa.eu/resource/cellar/{cellar_id}"
     
-    # Clean up
-    if notice_path.exists():
-        os.remove(notice_path)
-    
     return None
 
 
-def clean_text(text):
-    """Clean and normalize text content."""
-    if text is None:
-        return ""
-    text = re.sub(r'\s+', ' ', text).strip()
-    return text
-
-
 def get_all_text(element):
     """Recursively get all text content from an element."""
     texts = []
@@ -135,7 +122,7 @@ def get_all_text(element):
         texts.append(get_all_text(child))
         if child.tail:
             texts.append(child.tail)
-    return clean_text(' '.join(texts))
+    return normalize_space(' '.join(texts))
 
 
 def convert_formex_to_md(xml_path, celex):
@@ -6,11 +6,36 @@ For regulations without Formex XML (typically pre-2010).
 Produces identical structure to formex_to_md_v3.py output.
 
 Usage:
-    python eurlex_html_to_md.py <CELEX_NUMBER> <OUTPUT_DIR>
+    python eurlex_html_to_md.py <CELEX_NUMBER> <OUTPUT_DIR> [--backend lxml|bs4]
+                                [--offline | --refresh] [--retrieved YYYY-MM-DD]
+    python eurlex_html_to_md.py --prefetch [CELEX ...] [--refresh]
+    python eurlex_html_to_md.py --replay <OUTPUT_DIR>
+    
+    --prefetch downloads every `source: html` document in documents.yaml (or
+    the CELEX numbers given) concurrently into the HTML store, so EUR-Lex
+    generates them in parallel and later conversions need no network.
+    
+HTML store (scripts/.cache/html/<CELEX>/<YYYY-MM-DD>.html.gz):
+    Every page a conversion fetches is kept, gzipped, under its retrieval
+    date; a new date is added only when the page changed. Conversions read
+    the latest stored page, so reconverting needs no network:
+    
+    --offline    use only the store (fails if the page was never fetched)
+    --refresh    ask EUR-Lex again and store the page if it changed
+    --retrieved  convert the page stored on that date
+    --replay     reconvert every stored document into OUTPUT_DIR
     
 Example:
     python eurlex_html_to_md.py 32008R0765 ./01_regulation/765_2008_Market_Surveillance
 
+Offline (only the HTML store):
+    EURLEX_OFFLINE=1 python eurlex_html_to_md.py 32008R0765 ./out
+
+Parser backends:
+    --backend lxml   lxml.html tree queried with precompiled XPath (default)
+    --backend bs4    BeautifulSoup tree walked with find_all()
+    Both produce identical Markdown (see the golden-file tests).
+
 HTML Source Pattern:
     https://eur-lex.europa.eu/eli/reg/{year}/{number}/oj/eng
 
@@ -26,14 +51,42 @@ CSS Class Reference (EUR-Lex HTML):
     - oj-signatory: Signatories section
 """
 
+import argparse
+import asyncio
+import gzip
+import json
 import re
 import sys
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
 from pathlib import Path
 from datetime import datetime
 from typing import Optional
 
+import lxml.html
 import requests
+import yaml
 from bs4 import BeautifulSoup, Tag
+from lxml import etree
+
+import http_cache
+from text_normalize import clean_marked_text as clean_text  # Strips ►M1/◄/▼B markers too
+
+# Parser backends for convert_html_to_markdown(); both yield the same Markdown
+BACKENDS = ('lxml', 'bs4')
+DEFAULT_BACKEND = 'lxml'
+
+HTML_URL = "https://eur-lex.europa.eu/legal-content/EN/TXT/HTML/?uri=CELEX:{celex}"
+BROWSER_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+}
+DOCUMENTS_YAML = Path(__file__).parent / 'documents.yaml'
+HTML_STORE_DIR = Path(__file__).parent / '.cache' / 'html'  # <CELEX>/<YYYY-MM-DD>.html.gz
+VALIDATORS_FILE = 'validators.json'  # <CELEX>/ ETag / Last-Modified of the latest page
+MAX_RETRY_AFTER = 120  # seconds; cap on a server-requested wait
+MIN_RETRY_AFTER = 1  # seconds; floor, so Retry-After: 0 doesn't poll in a tight loop
+MIN_HTML_BYTES = 101  # a shorter 200 body is a generation placeholder, not the page
 
 
 def celex_to_eli(celex: str) -> tuple[str, str]:
@@ -65,6 +118,79 @@ def celex_to_eli(celex: str) -> tuple[str, str]:
     raise ValueError(f"Invalid CELEX format: {celex}")
 
 
+def has_class(name: str) -> str:
+    """XPath predicate: the element's class attribute contains the class name."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# Precompiled XPath for the lxml backend (see CSS Class Reference above)
+XP_TEXT = etree.XPath('string()')
+XP_BY_ID = etree.XPath('//*[@id=$id]')
+XP_P_WITH_CLASS = etree.XPath(
+    ".//p[contains(concat(' ', normalize-space(@class), ' '), concat(' ', $name, ' '))]")
+XP_IS_CONSOLIDATED = etree.XPath(
+    f"boolean(//div[{has_class('eli-main-title')}]) and boolean(//p[{has_class('title-article-norm')}])")
+XP_TABLE_ROWS = etree.XPath('.//tr')
+XP_ROW_CELLS = etree.XPath('.//td')
+XP_MAIN_TITLE = etree.XPath(f".//div[{has_class('eli-main-title')}]")
+XP_MAIN_TITLE_PARTS = etree.XPath(f".//p[{has_class('title-doc-first')} or {has_class('title-doc-last')}]")
+XP_OJ_REFERENCE = etree.XPath(f".//p[{has_class('title-doc-oj-reference')}]")
+XP_ARTICLES = etree.XPath(f".//div[{has_class('eli-subdivision')}][starts-with(@id, 'art_')]")
+XP_ARTICLE_NUMBER = etree.XPath(f".//p[{has_class('title-article-norm')}]")
+XP_ARTICLE_TITLE = etree.XPath(f".//p[{has_class('stitle-article-norm')}]")
+XP_NORMS = etree.XPath(f"./*[self::p or self::div][{has_class('norm')}]")
+XP_PARAGRAPH_NUMBER = etree.XPath(f".//span[{has_class('no-parag')}]")
+XP_INLINE_ELEMENT = etree.XPath(f".//div[{has_class('inline-element')}]")
+XP_GRID_LISTS = etree.XPath(f".//div[{has_class('grid-container')}][{has_class('grid-list')}]")
+XP_GRID_POINT = etree.XPath(f".//div[{has_class('list')}]")
+XP_GRID_CONTENT = etree.XPath(f".//div[{has_class('grid-list-column-2')}]")
+
+
+def parse_html(html_content: str, backend: Optional[str] = None):
+    """
+    Parse a page with the given backend ('lxml' or 'bs4', default: lxml).
+    
+    Both use libxml2's HTML parser, so the trees have the same shape. The
+    lxml tree is parsed from UTF-8 bytes, which also accepts pages that
+    start with an XML declaration.
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend == 'lxml':
+        root = etree.fromstring(html_content.encode('utf-8'), lxml.html.HTMLParser(encoding='utf-8'))
+        return root if root is not None else lxml.html.Element('html')  # Empty page
+    if backend == 'bs4':
+        return BeautifulSoup(html_content, 'lxml')
+    raise ValueError(f"Unknown backend: {backend!r} (expected one of {', '.join(BACKENDS)})")
+
+
+def first(elements: list):
+    """First element of an XPath result, or None."""
+    return elements[0] if elements else None
+
+
+def class_list(element) -> list:
+    """An element's classes, for either parse tree."""
+    if etree.iselement(element):
+        return (element.get('class') or '').split()
+    return element.get('class', [])
+
+
+def find_content(doc, *ids: str):
+    """The first element with one of ids (tried in order), else the whole document."""
+    for element_id in ids:
+        element = first(XP_BY_ID(doc, id=element_id)) if etree.iselement(doc) else doc.find(id=element_id)
+        if element is not None:
+            return element
+    return doc
+
+
+def paragraph_texts(content, name: str) -> list:
+    """Raw text of every <p> with class name under content, for either parse tree."""
+    if etree.iselement(content):
+        return [XP_TEXT(p) for p in XP_P_WITH_CLASS(content, name=name)]
+    return [p.get_text() for p in content.find_all('p', class_=name)]
+
+
 def detect_document_type(soup: BeautifulSoup) -> str:
     """
     Detect the document type from the HTML content.
@@ -75,11 +201,11 @@ def detect_document_type(soup: BeautifulSoup) -> str:
         'reg_del' for Delegated Regulations
         'reg' for regular Regulations (default)
     """
-    content = soup.find(id='document1') or soup.find(id='docHtml') or soup
+    content = find_content(soup, 'document1', 'docHtml')
     
     # Check standard EUR-Lex format (oj-doc-ti class)
-    for p in content.find_all('p', class_='oj-doc-ti'):
-        text = p.get_text().strip().upper()
+    for text in paragraph_texts(content, 'oj-doc-ti'):
+        text = text.strip().upper()
         if 'DIRECTIVE' in text:
             return 'dir'
         if 'IMPLEMENTING REGULATION' in text:
@@ -88,8 +214,8 @@ def detect_document_type(soup: BeautifulSoup) -> str:
             return 'reg_del'
     
     # Check consolidated HTML format (title-doc-first class)
-    for p in content.find_all('p', class_='title-doc-first'):
-        text = p.get_text().strip().upper()
+    for text in paragraph_texts(content, 'title-doc-first'):
+        text = text.strip().upper()
         if 'DIRECTIVE' in text:
             return 'dir'
         if 'IMPLEMENTING REGULATION' in text:
@@ -110,6 +236,9 @@ def is_consolidated_format(soup: BeautifulSoup) -> bool:
     Both may have eli-main-title and eli-subdivision, so we need to check for
     format-specific article content classes to distinguish them.
     """
+    if etree.iselement(soup):
+        return XP_IS_CONSOLIDATED(soup)
+    
     # Must have eli-main-title (both formats have this)
     if not soup.find('div', class_='eli-main-title'):
         return False
@@ -119,72 +248,477 @@ def is_consolidated_format(soup: BeautifulSoup) -> bool:
     return soup.find('p', class_='title-article-norm') is not None
 
 
-def download_html(celex: str, max_retries: int = 10) -> str:
+def html_session() -> requests.Session:
+    """
+    New session for one document's downloads.
+    
+    EUR-Lex ties an on-demand generation job to the session cookie, so
+    every poll for a document must go through the same session.
+    """
+    session = requests.Session()
+    session.headers.update(BROWSER_HEADERS)
+    return session
+
+
+def retry_delay(response, attempt: int) -> float:
+    """
+    Seconds to wait before polling a generating document again.
+    
+    Honours Retry-After (delta-seconds or HTTP-date, between
+    MIN_RETRY_AFTER and MAX_RETRY_AFTER), otherwise backs off
+    progressively: 3s, 5s, 7s, ...
+    """
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        try:
+            return min(max(float(retry_after), MIN_RETRY_AFTER), MAX_RETRY_AFTER)
+        except ValueError:
+            pass
+        try:
+            delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+            return min(max(delay, MIN_RETRY_AFTER), MAX_RETRY_AFTER)
+        except (TypeError, ValueError):
+            pass
+    return 3 + (attempt * 2)
+
+
+def page_validators(response) -> dict:
+    """The ETag / Last-Modified of a fetched page, for revalidating it later."""
+    return {key: response.headers[header]
+            for key, header in (('etag', 'ETag'), ('last_modified', 'Last-Modified'))
+            if response.headers.get(header)}
+
+
+def poll_html(url: str, session: requests.Session, attempt: int,
+              validators: Optional[dict] = None) -> tuple:
+    """
+    Request a document once, conditionally if the stored page's validators are given.
+    
+    Pages are kept only in the HTML store, never in the HTTP cache.
+    
+    Returns tuple: (response, None) when the document is ready or, given
+    validators, not modified (304), or (None, seconds to wait) while
+    EUR-Lex is still generating it.
+    
+    Raises:
+        http_cache.CacheMiss: In offline mode
+        requests.HTTPError: For error responses, and for any other status
+            (e.g. a redirect that wasn't followed) than 200 or a 2xx placeholder
+    """
+    if http_cache.OFFLINE:
+        raise http_cache.CacheMiss(f"Not stored (offline mode): {url}")
+    response = session.get(url, headers=http_cache.conditional_headers(None, validators),
+                           timeout=60)
+    
+    if response.status_code == 304 and validators:
+        return response, None
+    
+    # Check for successful response with content
+    if response.status_code == 200 and len(response.content) >= MIN_HTML_BYTES:
+        return response, None
+    
+    # 202 means "Accepted but processing" - EUR-Lex is generating the document
+    # (a near-empty 2xx page is a placeholder too; error pages are not)
+    if response.status_code == 202 or (
+            200 <= response.status_code < 300 and len(response.content) < MIN_HTML_BYTES):
+        return None, retry_delay(response, attempt)
+    
+    response.raise_for_status()
+    raise requests.HTTPError(f"Unexpected {response.status_code} for url: {url}")
+
+
+def finished_page(response) -> tuple:
+    """(html or None if not modified, validators) for a response poll_html() accepted."""
+    if response.status_code == 304:
+        return None, page_validators(response)
+    return response.text, page_validators(response)
+
+
+def download_html(celex: str, max_retries: int = 10, validators: Optional[dict] = None) -> tuple:
     """
     Download regulation/directive HTML from EUR-Lex CELEX endpoint.
     
     Args:
         celex: CELEX number (e.g., '32015R1501', '02002L0058-20091219')
         max_retries: Maximum retry attempts for 202 responses
+        validators: ETag / Last-Modified of the stored page (load_validators());
+                    EUR-Lex then answers 304 if it hasn't changed
+    
+    Returns tuple: (html, or None if not modified; the page's validators)
         
     Note: We use the CELEX-based URL which works for all document types.
     EUR-Lex returns HTTP 202 (Accepted) for consolidated documents while 
     generating them on-demand. We MUST use a Session to persist cookies,
     otherwise each retry starts a new generation job.
     """
-    import time
-    
-    url = f"https://eur-lex.europa.eu/legal-content/EN/TXT/HTML/?uri=CELEX:{celex}"
+    url = HTML_URL.format(celex=celex)
     
     print(f"  Downloading from {url}...")
     
     # Use a Session to persist cookies across retries (CRITICAL for 202 handling)
-    session = requests.Session()
-    session.headers.update({
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-    })
-    
-    for attempt in range(max_retries):
-        response = session.get(url, timeout=60)
-        
-        # Check for successful response with content
-        if response.status_code == 200 and len(response.text) > 100:
-            return response.text
-        
-        # 202 means "Accepted but processing" - EUR-Lex is generating the document
-        if response.status_code == 202 or len(response.text) < 100:
+    with html_session() as session:
+        for attempt in range(max_retries):
+            response, wait_time = poll_html(url, session, attempt, validators)
+            if response is not None:
+                return finished_page(response)
             if attempt < max_retries - 1:
-                # Check for Retry-After header, otherwise use progressive backoff
-                wait_time = int(response.headers.get("Retry-After", 3 + (attempt * 2)))
-                print(f"    EUR-Lex returned {response.status_code} (generating document), retrying in {wait_time}s... (attempt {attempt + 1}/{max_retries})")
+                print(f"    EUR-Lex is generating the document, retrying in {wait_time:g}s... (attempt {attempt + 1}/{max_retries})")
                 time.sleep(wait_time)
-                continue
-        
-        response.raise_for_status()
     
     raise RuntimeError(f"Failed to download {celex} after {max_retries} retries (EUR-Lex may be unavailable)")
 
 
-def clean_text(text: str) -> str:
-    """Clean and normalize extracted text."""
-    if not text:
-        return ""
+async def download_html_async(celex: str, limit: asyncio.Semaphore, max_retries: int = 10,
+                              log=print, validators: Optional[dict] = None) -> tuple:
+    """
+    Coroutine version of download_html() for the prefetch pool.
+    
+    Each document keeps its own cookie session. Requests run in worker
+    threads, at most `limit` at once; while a document is generating, its
+    Retry-After wait is an asyncio.sleep() that holds no slot, so other
+    documents are polled and EUR-Lex generates them in parallel.
+    """
+    url = HTML_URL.format(celex=celex)
+    
+    with html_session() as session:
+        for attempt in range(max_retries):
+            async with limit:
+                response, wait_time = await asyncio.to_thread(
+                    poll_html, url, session, attempt, validators)
+            if response is not None:
+                return finished_page(response)
+            if attempt < max_retries - 1:
+                log(f"    {celex}: EUR-Lex is generating the document, polling again in {wait_time:g}s (attempt {attempt + 1}/{max_retries})")
+                await asyncio.sleep(wait_time)
+    
+    raise RuntimeError(f"Failed to download {celex} after {max_retries} retries (EUR-Lex may be unavailable)")
+
+
+async def download_all_html(celexes: list, max_concurrent: int = 8, max_retries: int = 10,
+                            log=print, validators: Optional[dict] = None) -> dict:
+    """
+    Download several documents at once.
+    
+    validators maps CELEX -> the stored page's validators, for the
+    documents to revalidate.
+    
+    Returns dict: celex -> (html or None, validators) as from download_html(),
+    or the exception that stopped it, in the order given.
+    """
+    validators = validators or {}
+    limit = asyncio.Semaphore(max(1, max_concurrent))
+    results = await asyncio.gather(
+        *(download_html_async(celex, limit, max_retries, log, validators.get(celex))
+          for celex in celexes),
+        return_exceptions=True,
+    )
+    return dict(zip(celexes, results))
+
+
+def html_documents(config_path: Path = DOCUMENTS_YAML) -> list[str]:
+    """CELEX numbers of the documents.yaml entries with `source: html`."""
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f) or {}
+    return [doc['celex'] for doc in config.get('documents', [])
+            if doc.get('source') == 'html' and doc.get('celex')]
+
+
+def prefetch(celexes: list, max_concurrent: int = 8, refresh: bool = False) -> int:
+    """
+    Download documents concurrently into the HTML store.
+    
+    Documents already in the store are skipped unless refresh is set, in
+    which case EUR-Lex is asked again and a changed page is stored under
+    today's date.
+    
+    Returns the number of documents that failed.
+    """
+    stored = [] if refresh else [celex for celex in celexes if stored_dates(celex)]
+    for celex in stored:
+        print(f"  ✓ {celex}: stored {stored_dates(celex)[-1]} (use --refresh to fetch again)")
+    celexes = [celex for celex in celexes if celex not in stored]
+    if not celexes:
+        return 0
+    
+    print(f"Prefetching {len(celexes)} document(s), up to {max_concurrent} requests at once...")
+    validators = {celex: load_validators(celex) for celex in celexes} if refresh else None
+    results = asyncio.run(download_all_html(celexes, max_concurrent, validators=validators))
+    
+    failed = 0
+    for celex, result in results.items():
+        if isinstance(result, Exception):
+            print(f"  ❌ {celex}: {result}")
+            failed += 1
+        else:
+            html, validators = result
+            if html is None:
+                print(f"  ✓ {celex}: unchanged since {stored_dates(celex)[-1]}")
+                continue
+            path = store_html(celex, html, validators=validators)
+            print(f"  ✅ {celex}: {len(html):,} chars → {path.name}")
+    return failed
+
+
+def load_validators(celex: str) -> dict:
+    """ETag / Last-Modified EUR-Lex sent with the latest stored page ({} if unknown)."""
+    if not stored_dates(celex):
+        return {}  # Nothing a 304 could refer to
+    try:
+        return json.loads((HTML_STORE_DIR / celex / VALIDATORS_FILE).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+
+def store_path(celex: str, retrieved: str) -> Path:
+    """Where the page for celex retrieved on date (YYYY-MM-DD) is stored."""
+    return HTML_STORE_DIR / celex / f"{retrieved}.html.gz"
+
+
+def stored_dates(celex: str) -> list[str]:
+    """Retrieval dates (YYYY-MM-DD) stored for celex, oldest first."""
+    return sorted(path.name[:-len('.html.gz')] for path in (HTML_STORE_DIR / celex).glob('*.html.gz'))
+
+
+def stored_celexes() -> list[str]:
+    """CELEX numbers with at least one stored page."""
+    if not HTML_STORE_DIR.is_dir():
+        return []
+    return sorted(path.name for path in HTML_STORE_DIR.iterdir() if stored_dates(path.name))
+
+
+def load_stored_html(celex: str, retrieved: Optional[str] = None) -> Optional[tuple]:
+    """
+    Read a stored page.
     
-    # Remove EUR-Lex consolidation markers (►M1, ►M2, ►B, ◄, ▼, etc.)
-    # These indicate which amendment inserted text - we don't use them in our consolidated docs
-    text = re.sub(r'►[A-Z]\d*\s*', '', text)  # Matches ►M1, ►M2, ►B, etc.
-    text = re.sub(r'◄', '', text)  # Closing marker
-    text = re.sub(r'▼[A-Z]\d*', '', text)  # Alternative marker style
+    Returns tuple: (html, retrieval date) for the given date or, by default,
+    the latest one; None if nothing matching is stored.
+    """
+    dates = stored_dates(celex)
+    if retrieved is None and dates:
+        retrieved = dates[-1]
+    if retrieved not in dates:
+        return None
+    with gzip.open(store_path(celex, retrieved), 'rt', encoding='utf-8') as f:
+        return f.read(), retrieved
+
+
+def store_html(celex: str, html: str, retrieved: Optional[str] = None,
+               validators: Optional[dict] = None) -> Path:
+    """
+    Store a fetched page under its retrieval date (default: today).
     
-    # Normalize whitespace (collapse multiple spaces/newlines)
-    text = ' '.join(text.split())
+    A page identical to the latest stored one isn't stored again, so the
+    dates record when the text actually changed. validators, if given,
+    replace the ones kept for revalidating the latest page.
+    """
+    latest = load_stored_html(celex)
+    if latest is not None and latest[0] == html:
+        path = store_path(celex, latest[1])
+    else:
+        path = store_path(celex, retrieved or datetime.now().strftime('%Y-%m-%d'))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # mtime=0 keeps the file bytes a function of the page alone
+        http_cache.write_atomic_bytes(path, gzip.compress(html.encode('utf-8'), compresslevel=9, mtime=0))
+    if validators:
+        http_cache.write_atomic_bytes(path.parent / VALIDATORS_FILE,
+                                      json.dumps(validators).encode('utf-8'))
+    return path
+
+
+def get_html(celex: str, offline: bool = False, refresh: bool = False,
+             retrieved: Optional[str] = None) -> tuple:
+    """
+    HTML for a conversion: from the store if present, else downloaded and stored.
     
-    # Clean up quote markers
-    text = re.sub(r'\s+,\s*$', ',', text)
-    text = re.sub(r'\s+;\s*$', ';', text)
-    text = re.sub(r'\s+\.\s*$', '.', text)
+    Args:
+        celex: CELEX number
+        offline: Never touch the network (also implied by EURLEX_OFFLINE=1)
+        refresh: Ask EUR-Lex again even if the page is stored
+        retrieved: Use the page stored on this date (YYYY-MM-DD)
     
-    return text.strip()
+    Returns tuple: (html, retrieval date)
+    
+    Raises:
+        http_cache.CacheMiss: When offline and nothing matching is stored
+    """
+    if not refresh:
+        stored = load_stored_html(celex, retrieved)
+        if stored is not None:
+            print(f"  Using stored HTML retrieved {stored[1]} ({store_path(celex, stored[1])})")
+            return stored
+    
+    if retrieved is not None:
+        raise http_cache.CacheMiss(f"No HTML for {celex} retrieved {retrieved} "
+                                   f"(stored: {', '.join(stored_dates(celex)) or 'none'})")
+    if offline or http_cache.OFFLINE:
+        raise http_cache.CacheMiss(f"No stored HTML for {celex} (offline mode); "
+                                   "run once online or with --prefetch")
+    
+    html, validators = download_html(celex, validators=load_validators(celex) if refresh else None)
+    if html is None:
+        stored = load_stored_html(celex)
+        print(f"  Unchanged since {stored[1]} ({store_path(celex, stored[1])})")
+        return stored
+    path = store_html(celex, html, validators=validators)
+    print(f"  Stored as {path}")
+    return html, path.name[:-len('.html.gz')]
+
+
+# Block roles, in the precedence the extractors test them (see CSS Class Reference above)
+BLOCK_ROLES = (
+    'oj-doc-ti', 'oj-ti-section-1', 'oj-ti-section-2', 'oj-ti-art', 'oj-sti-art',
+    'oj-normal', 'oj-signatory', 'oj-ti-grseq-1', 'oj-hd-oj', 'oj-note',
+)
+ANNEX_ID = re.compile(r'^anx_', re.I)
+
+
+@dataclass
+class Block:
+    """One <p> of an Official Journal document, classified once."""
+    role: str  # First of BLOCK_ROLES among its classes, '' if none
+    classes: list
+    text: str  # clean_text() of the paragraph
+    in_table: bool = False
+
+
+@dataclass
+class TableBlock:
+    """A <table> inside an annex, as (point, content) cell texts per row."""
+    rows: list
+
+
+@dataclass
+class DocumentBlocks:
+    """
+    Single-pass classification of a standard EUR-Lex document.
+    
+    paragraphs holds every <p> in document order; annexes holds, for each
+    <div id="anx_..."> in document order, its id and the paragraphs and
+    tables inside it. All extract_* functions read from this instead of
+    re-walking the tree and re-cleaning the same text.
+    """
+    paragraphs: list = field(default_factory=list)
+    annexes: list = field(default_factory=list)
+    
+    def with_role(self, *roles: str) -> list:
+        """Paragraphs whose role is one of roles, in document order."""
+        return [block for block in self.paragraphs if block.role in roles]
+
+
+def table_rows(table: Tag) -> list:
+    """(point, content) texts for every row of a table with at least two cells."""
+    rows = []
+    if etree.iselement(table):
+        for row in XP_TABLE_ROWS(table):
+            cells = XP_ROW_CELLS(row)
+            if len(cells) >= 2:
+                rows.append((clean_text(XP_TEXT(cells[0])), clean_text(XP_TEXT(cells[1]))))
+        return rows
+    
+    for row in table.find_all('tr'):
+        cells = row.find_all('td')
+        if len(cells) >= 2:
+            rows.append((clean_text(cells[0].get_text()), clean_text(cells[1].get_text())))
+    return rows
+
+
+def classify_element_tree(content) -> DocumentBlocks:
+    """
+    classify_blocks() for an lxml tree.
+    
+    etree.iterwalk() reports where each element starts and ends, so annex
+    and table scope are tracked without a Python-level stack of children.
+    """
+    doc = DocumentBlocks()
+    open_annexes = []
+    table_depth = 0
+    
+    for event, node in etree.iterwalk(content, events=('start', 'end')):
+        if node is content:  # Like the soup walk, only its descendants count
+            continue
+        name = node.tag
+        if name == 'p':
+            if event == 'start':
+                classes = (node.get('class') or '').split()
+                role = next((r for r in BLOCK_ROLES if r in classes), '')
+                block = Block(role, classes, clean_text(XP_TEXT(node)), table_depth > 0)
+                doc.paragraphs.append(block)
+                for events in open_annexes:
+                    events.append(block)
+        elif name == 'table':
+            if event == 'start':
+                if open_annexes:
+                    table = TableBlock(table_rows(node))
+                    for events in open_annexes:
+                        events.append(table)
+                table_depth += 1
+            else:
+                table_depth -= 1
+        elif name == 'div' and ANNEX_ID.search(node.get('id', '')):
+            if event == 'start':
+                events = []
+                doc.annexes.append((node.get('id', ''), events))
+                open_annexes.append(events)
+            else:
+                open_annexes.pop()
+    
+    return doc
+
+
+def classify_blocks(soup: BeautifulSoup) -> DocumentBlocks:
+    """
+    Walk the document body once, classifying every paragraph.
+    
+    Each <p> is tagged with its role and its cleaned text is cached; tables
+    inside annexes are reduced to their row texts. Paragraphs inside an
+    annex are recorded for every annex that encloses them, so nested annex
+    containers behave as they would with a find_all() per annex.
+    """
+    content = find_content(soup, 'document1')
+    if etree.iselement(content):
+        return classify_element_tree(content)
+    
+    doc = DocumentBlocks()
+    open_annexes = []
+    
+    # Explicit stack instead of recursion: (node, in_table); a None node closes an annex
+    stack = [(child, False) for child in reversed(list(content.children))]
+    while stack:
+        node, in_table = stack.pop()
+        if node is None:
+            open_annexes.pop()
+            continue
+        if not isinstance(node, Tag):
+            continue
+        
+        name = node.name
+        if name == 'p':
+            classes = node.get('class', [])
+            role = next((r for r in BLOCK_ROLES if r in classes), '')
+            block = Block(role, classes, clean_text(node.get_text()), in_table)
+            doc.paragraphs.append(block)
+            for events in open_annexes:
+                events.append(block)
+        elif name == 'table':
+            if open_annexes:
+                table = TableBlock(table_rows(node))
+                for events in open_annexes:
+                    events.append(table)
+            in_table = True
+        elif name == 'div' and ANNEX_ID.search(node.get('id', '')):
+            events = []
+            doc.annexes.append((node.get('id', ''), events))
+            open_annexes.append(events)
+            stack.append((None, in_table))  # Closes this annex once its children are done
+        
+        stack.extend((child, in_table) for child in reversed(node.contents))
+    
+    return doc
+
+
+def blocks_of(doc) -> DocumentBlocks:
+    """Accept either a parsed page or its DocumentBlocks."""
+    return doc if isinstance(doc, DocumentBlocks) else classify_blocks(doc)
 
 
 def extract_metadata(soup: BeautifulSoup, celex: str, doc_type: str = 'reg') -> dict:
@@ -192,16 +726,16 @@ def extract_metadata(soup: BeautifulSoup, celex: str, doc_type: str = 'reg') ->
     Extract document metadata.
     
     Args:
-        soup: Parsed HTML
+        soup: Parsed HTML (or its DocumentBlocks)
         celex: CELEX number
         doc_type: Document type ('dir', 'reg', 'reg_impl', 'reg_del')
     """
-    content = soup.find(id='document1') or soup
+    blocks = blocks_of(soup)
+    doc_titles = [block.text for block in blocks.with_role('oj-doc-ti')]
     
     # Document title (multiple oj-doc-ti elements form the full title)
     title_parts = []
-    for p in content.find_all('p', class_='oj-doc-ti'):
-        text = clean_text(p.get_text())
+    for text in doc_titles:
         # Skip annex titles which also use oj-doc-ti
         if text.upper().startswith('ANNEX'):
             break
@@ -212,16 +746,14 @@ def extract_metadata(soup: BeautifulSoup, celex: str, doc_type: str = 'reg') ->
     
     # Document date (e.g., "of 9 July 2008")
     date_str = ""
-    for p in content.find_all('p', class_='oj-doc-ti'):
-        text = clean_text(p.get_text())
+    for text in doc_titles:
         if text.startswith('of ') and any(m in text.lower() for m in ['january', 'february', 'march', 'april', 'may', 'june', 'july', 'august', 'september', 'october', 'november', 'december']):
             date_str = text
             break
     
     # Subject matter (longer descriptive title)
     subject = ""
-    for p in content.find_all('p', class_='oj-doc-ti'):
-        text = clean_text(p.get_text())
+    for text in doc_titles:
         # Subject is the long descriptive part (contains words like "setting", "laying", etc.)
         if len(text) > 80 and not text.upper().startswith('REGULATION') and not text.upper().startswith('IMPLEMENTING') and not text.upper().startswith('COMMISSION') and not text.upper().startswith('DIRECTIVE'):
             subject = text
@@ -229,16 +761,15 @@ def extract_metadata(soup: BeautifulSoup, celex: str, doc_type: str = 'reg') ->
     
     # EEA relevance note
     eea_note = ""
-    for p in content.find_all('p', class_='oj-doc-ti'):
-        text = clean_text(p.get_text())
+    for text in doc_titles:
         if 'EEA relevance' in text:
             eea_note = text
             break
     
     # OJ reference
     oj_ref = ""
-    for p in content.find_all('p', class_='oj-hd-oj'):
-        oj_ref = clean_text(p.get_text())
+    for block in blocks.with_role('oj-hd-oj'):
+        oj_ref = block.text
         break
     
     year, num = celex_to_eli(celex)
@@ -291,12 +822,12 @@ def extract_preamble(soup: BeautifulSoup) -> list[str]:
         ## Recitals
         - (1) First recital...
     
+    Accepts the parsed page or its DocumentBlocks.
+    
     Returns list of Markdown lines.
     """
-    content = soup.find(id='document1') or soup
-    
-    # Find all oj-normal paragraphs as a list (need index access for lookahead)
-    normal_paras = list(content.find_all('p', class_='oj-normal'))
+    # All oj-normal paragraphs as a list (need index access for lookahead)
+    normal_paras = blocks_of(soup).with_role('oj-normal')
     
     institutional_body = []  # THE EUROPEAN PARLIAMENT/COMMISSION
     having_regard_clauses = []  # "Having regard to..."
@@ -308,8 +839,7 @@ def extract_preamble(soup: BeautifulSoup) -> list[str]:
     
     i = 0
     while i < len(normal_paras):
-        p = normal_paras[i]
-        text = clean_text(p.get_text())
+        text = normal_paras[i].text
         
         if not text:
             i += 1
@@ -423,13 +953,14 @@ def extract_chapters_and_articles(soup: BeautifulSoup) -> list[str]:
     
     The paragraph number and content are often in SEPARATE adjacent <p> elements.
     
+    Accepts the parsed page or its DocumentBlocks.
+    
     Returns list of Markdown lines.
     """
     lines = []
-    content = soup.find(id='document1') or soup
     
-    # Get all p elements as list for index access
-    all_p = list(content.find_all('p'))
+    # All paragraphs as a list for index access
+    all_p = blocks_of(soup).paragraphs
     
     current_chapter = None
     current_section = None
@@ -442,24 +973,24 @@ def extract_chapters_and_articles(soup: BeautifulSoup) -> list[str]:
     
     i = 0
     while i < len(all_p):
-        p = all_p[i]
-        classes = p.get('class', [])
+        block = all_p[i]
+        role = block.role
         
-        if not classes:
+        if not role:
             i += 1
             continue
         
-        text = clean_text(p.get_text())
+        text = block.text
         
         # Check for ANNEX start
-        if 'oj-doc-ti' in classes and text.upper().startswith('ANNEX'):
+        if role == 'oj-doc-ti' and text.upper().startswith('ANNEX'):
             # Flush any pending content
             if article_content:
                 lines.extend(article_content)
             break
         
         # Chapter/Section number
-        if 'oj-ti-section-1' in classes:
+        if role == 'oj-ti-section-1':
             # Flush current article content
             if article_content:
                 lines.extend(article_content)
@@ -475,7 +1006,7 @@ def extract_chapters_and_articles(soup: BeautifulSoup) -> list[str]:
             continue
         
         # Chapter/Section title
-        if 'oj-ti-section-2' in classes and past_enacting_formula:
+        if role == 'oj-ti-section-2' and past_enacting_formula:
             if current_chapter:
                 lines.append(f"## {current_chapter} — {text}")
                 lines.append("")
@@ -488,7 +1019,7 @@ def extract_chapters_and_articles(soup: BeautifulSoup) -> list[str]:
             continue
         
         # Article number
-        if 'oj-ti-art' in classes:
+        if role == 'oj-ti-art':
             # Flush previous article content
             if article_content:
                 lines.extend(article_content)
@@ -499,10 +1030,9 @@ def extract_chapters_and_articles(soup: BeautifulSoup) -> list[str]:
             # Look ahead for article title
             # Format: heading is just "Article N", title is bold text below (matches Formex)
             if i + 1 < len(all_p):
-                next_p = all_p[i + 1]
-                next_classes = next_p.get('class', [])
-                if 'oj-sti-art' in next_classes:
-                    title = clean_text(next_p.get_text())
+                next_block = all_p[i + 1]
+                if next_block.role == 'oj-sti-art':
+                    title = next_block.text
                     lines.append(f"### {text}")
                     lines.append("")
                     lines.append(f"**{title}**")
@@ -517,12 +1047,12 @@ def extract_chapters_and_articles(soup: BeautifulSoup) -> list[str]:
             continue
         
         # Skip article title if processed above
-        if 'oj-sti-art' in classes:
+        if role == 'oj-sti-art':
             i += 1
             continue
         
         # Normal paragraph content
-        if 'oj-normal' in classes and past_enacting_formula:
+        if role == 'oj-normal' and past_enacting_formula:
             if not text:
                 i += 1
                 continue
@@ -587,7 +1117,7 @@ def extract_chapters_and_articles(soup: BeautifulSoup) -> list[str]:
             continue
         
         # Signatory - end of main content
-        if 'oj-signatory' in classes:
+        if role == 'oj-signatory':
             if article_content:
                 lines.extend(article_content)
             break
@@ -605,30 +1135,30 @@ def extract_definitions(soup: BeautifulSoup) -> dict[str, list[tuple[int, str, s
     """
     Extract definitions from Article 2 (or similar definitions article).
     
+    Accepts the parsed page or its DocumentBlocks.
+    
     Returns dict mapping article ID to list of (number, term, definition) tuples.
     """
     definitions = {}
-    content = soup.find(id='document1') or soup
     
     # Find Article 2 (Definitions) or similar
     in_definitions_article = False
     article_id = None
     
-    for p in content.find_all('p'):
-        classes = p.get('class', [])
-        text = clean_text(p.get_text())
+    for block in blocks_of(soup).with_role('oj-ti-art', 'oj-sti-art', 'oj-normal'):
+        text = block.text
         
-        if 'oj-ti-art' in classes:
+        if block.role == 'oj-ti-art':
             in_definitions_article = False  # Reset
             if 'Article 2' in text:
                 article_id = 'article-2'
                 in_definitions_article = True
         
-        elif 'oj-sti-art' in classes:
+        elif block.role == 'oj-sti-art':
             if in_definitions_article and 'Definition' in text:
                 definitions[article_id] = []
         
-        elif 'oj-normal' in classes and in_definitions_article and article_id in definitions:
+        elif in_definitions_article and article_id in definitions:
             # Look for definition pattern: N. 'term' means...
             # Pattern: 1. 'making available on the market' means...
             def_match = re.match(r"^(\d+)\.\s+'([^']+)'\s+means\s+(.*)$", text)
@@ -663,15 +1193,14 @@ def extract_annexes(soup: BeautifulSoup) -> list[str]:
             </table>
         </div>
     
+    Accepts the parsed page or its DocumentBlocks.
+    
     Returns list of Markdown lines.
     """
     lines = []
-    content = soup.find(id='document1') or soup
     
-    # Find annex containers by id pattern
-    for annex_div in content.find_all('div', id=re.compile(r'^anx_', re.I)):
-        annex_id = annex_div.get('id', '')
-        
+    # Annex containers (div id="anx_..."), with their paragraphs and tables in order
+    for annex_id, events in blocks_of(soup).annexes:
         # Extract annex number from id (anx_I -> I, anx_II -> II, anx_1 -> 1)
         annex_num_match = re.search(r'anx_([IVX]+|\d+)', annex_id, re.I)
         if not annex_num_match:
@@ -690,21 +1219,23 @@ def extract_annexes(soup: BeautifulSoup) -> list[str]:
         lines.append("")
         
         # Process all elements in document order
-        for child in annex_div.descendants:
-            if not hasattr(child, 'name') or child.name is None:
+        for event in events:
+            # Tables contain points (a), (b), etc. - output as list items for gutter icons
+            if isinstance(event, TableBlock):
+                for point, content_text in event.rows:
+                    if point and content_text:
+                        # Use list format so rehype assigns IDs for gutter icons
+                        lines.append(f"- {point} {content_text}")
                 continue
             
-            classes = child.get('class', [])
+            role, text = event.role, event.text
             
             # Skip the ANNEX header itself (oj-doc-ti)
-            if child.name == 'p' and 'oj-doc-ti' in classes:
-                text = clean_text(child.get_text())
-                if text.upper().startswith('ANNEX'):
-                    continue
+            if role == 'oj-doc-ti' and text.upper().startswith('ANNEX'):
+                continue
             
             # oj-ti-grseq-1: Annex title or numbered section heading
-            if child.name == 'p' and 'oj-ti-grseq-1' in classes:
-                text = clean_text(child.get_text())
+            if role == 'oj-ti-grseq-1':
                 if not text:
                     continue
                 
@@ -720,65 +1251,42 @@ def extract_annexes(soup: BeautifulSoup) -> list[str]:
                     lines.append("")
                 continue
             
-            # Tables contain points (a), (b), etc. - output as list items for gutter icons
-            if child.name == 'table':
-                for row in child.find_all('tr'):
-                    cells = row.find_all('td')
-                    if len(cells) >= 2:
-                        point = clean_text(cells[0].get_text())
-                        content_text = clean_text(cells[1].get_text())
-                        if point and content_text:
-                            # Use list format so rehype assigns IDs for gutter icons
-                            lines.append(f"- {point} {content_text}")
-                continue
-            
             # Regular paragraphs (oj-normal) - intro text etc.
-            if child.name == 'p' and 'oj-normal' in classes:
-                # Skip if this p is inside a table (already handled)
-                if child.find_parent('table'):
-                    continue
-                text = clean_text(child.get_text())
-                if text:
-                    lines.append(text)
-                    lines.append("")
-                continue
+            # Skip if this p is inside a table (already handled)
+            if role == 'oj-normal' and not event.in_table and text:
+                lines.append(text)
+                lines.append("")
     
     return lines
 
 
 def extract_signatories(soup: BeautifulSoup) -> list[str]:
-    """Extract signature block."""
+    """Extract signature block (from the parsed page or its DocumentBlocks)."""
     lines = []
-    content = soup.find(id='document1') or soup
     
     lines.append("")
     lines.append("---")
     lines.append("")
     
-    in_signatory = False
     location_date = None
     
-    for p in content.find_all('p'):
-        classes = p.get('class', [])
-        text = clean_text(p.get_text())
-        
-        if 'oj-signatory' in classes:
-            in_signatory = True
-            if text:
-                # Check for "Done at X, N Month Year" pattern
-                if text.startswith('Done at'):
-                    location_date = text
-                    lines.append(location_date)
-                    lines.append("")
-                elif 'Parliament' in text or 'Council' in text:
-                    # Institution header
-                    lines.append(f"*{text}*")
-                elif text.startswith('The President') or text.startswith('The Secretary'):
-                    lines.append(text)
-                else:
-                    # Name (bold)
-                    lines.append(f"**{text}**")
-                    lines.append("")
+    for block in blocks_of(soup).with_role('oj-signatory'):
+        text = block.text
+        if text:
+            # Check for "Done at X, N Month Year" pattern
+            if text.startswith('Done at'):
+                location_date = text
+                lines.append(location_date)
+                lines.append("")
+            elif 'Parliament' in text or 'Council' in text:
+                # Institution header
+                lines.append(f"*{text}*")
+            elif text.startswith('The President') or text.startswith('The Secretary'):
+                lines.append(text)
+            else:
+                # Name (bold)
+                lines.append(f"**{text}**")
+                lines.append("")
     
     return lines
 
@@ -842,24 +1350,26 @@ def format_markdown(metadata: dict, preamble: list[str], chapters: list[str],
     return '\n'.join(lines)
 
 
-def convert_html_to_markdown(celex: str, html_content: Optional[str] = None) -> str:
+def convert_html_to_markdown(celex: str, html_content: Optional[str] = None,
+                             backend: Optional[str] = None) -> str:
     """
     Main conversion function.
     
     Args:
         celex: CELEX number (e.g., '32008R0765')
-        html_content: Optional pre-fetched HTML content
+        html_content: Optional pre-fetched HTML content (default: get_html())
+        backend: Parser backend, 'lxml' (default) or 'bs4'; the Markdown is the same
         
     Returns:
         Markdown string
     """
-    # Download HTML if not provided
+    # Read the stored page (downloading and storing it the first time) if not provided
     if html_content is None:
-        html_content = download_html(celex)
+        html_content, _ = get_html(celex)
     
     # Parse HTML
     print("  Parsing HTML...")
-    soup = BeautifulSoup(html_content, 'lxml')
+    soup = parse_html(html_content, backend)
     
     # Detect document type (directive, regular regulation, implementing, delegated)
     doc_type_str = detect_document_type(soup)
@@ -871,21 +1381,24 @@ def convert_html_to_markdown(celex: str, html_content: Optional[str] = None) ->
         print("  Detected consolidated HTML format — using specialized parser")
         return convert_consolidated_html(soup, celex, doc_type_str)
     
-    # Standard EUR-Lex format extraction
+    # Standard EUR-Lex format: classify every paragraph once, then extract
+    print("  Classifying paragraphs...")
+    blocks = classify_blocks(soup)
+    
     print("  Extracting metadata...")
-    metadata = extract_metadata(soup, celex, doc_type_str)
+    metadata = extract_metadata(blocks, celex, doc_type_str)
     
     print("  Extracting preamble and recitals...")
-    preamble = extract_preamble(soup)
+    preamble = extract_preamble(blocks)
     
     print("  Extracting chapters and articles...")
-    chapters = extract_chapters_and_articles(soup)
+    chapters = extract_chapters_and_articles(blocks)
     
     print("  Extracting annexes...")
-    annexes = extract_annexes(soup)
+    annexes = extract_annexes(blocks)
     
     print("  Extracting signatories...")
-    signatories = extract_signatories(soup)
+    signatories = extract_signatories(blocks)
     
     # Format output
     print("  Formatting Markdown...")
@@ -894,9 +1407,76 @@ def convert_html_to_markdown(celex: str, html_content: Optional[str] = None) ->
     return markdown
 
 
-def convert_consolidated_html(soup: BeautifulSoup, celex: str, doc_type_str: str) -> str:
+@dataclass
+class ConsolidatedArticle:
+    """One eli-subdivision article of a consolidated document, as cleaned text."""
+    number: Optional[str]  # title-article-norm, None if absent
+    title: Optional[str]  # stitle-article-norm, None if absent
+    paragraphs: list = field(default_factory=list)  # (number or None, text) per norm child
+    points: list = field(default_factory=list)  # (point, text) per grid-list row
+
+
+@dataclass
+class ConsolidatedDocument:
+    """What convert_consolidated_html() renders, read from either parse tree."""
+    title_parts: list
+    oj_ref: str
+    articles: list
+
+
+def read_consolidated_tree(content) -> ConsolidatedDocument:
+    """read_consolidated() for an lxml tree, using the precompiled XPath."""
+    title_parts = []
+    main_title = first(XP_MAIN_TITLE(content))
+    if main_title is not None:
+        for p in XP_MAIN_TITLE_PARTS(main_title):
+            text = clean_text(XP_TEXT(p))
+            if text:
+                title_parts.append(text)
+    
+    oj_elem = first(XP_OJ_REFERENCE(content))
+    oj_ref = clean_text(XP_TEXT(oj_elem)) if oj_elem is not None else ""
+    
+    articles = []
+    for article_div in XP_ARTICLES(content):
+        number = first(XP_ARTICLE_NUMBER(article_div))
+        title = first(XP_ARTICLE_TITLE(article_div))
+        article = ConsolidatedArticle(
+            clean_text(XP_TEXT(number)) if number is not None else None,
+            clean_text(XP_TEXT(title)) if title is not None else None,
+        )
+        
+        for elem in XP_NORMS(article_div):
+            # Skip amendment markers (modref class)
+            if 'modref' in class_list(elem):
+                continue
+            para_num = first(XP_PARAGRAPH_NUMBER(elem))
+            if para_num is not None:
+                num_text = clean_text(XP_TEXT(para_num))
+                content_elem = first(XP_INLINE_ELEMENT(elem))
+                if content_elem is not None:
+                    content_text = clean_text(XP_TEXT(content_elem))
+                else:
+                    content_text = clean_text(XP_TEXT(elem)).replace(num_text, '', 1).strip()
+                article.paragraphs.append((num_text, content_text))
+            else:
+                article.paragraphs.append((None, clean_text(XP_TEXT(elem))))
+        
+        for grid in XP_GRID_LISTS(article_div):
+            point_elem = first(XP_GRID_POINT(grid))
+            content_elem = first(XP_GRID_CONTENT(grid))
+            if content_elem is not None:
+                point_text = clean_text(XP_TEXT(point_elem)) if point_elem is not None else ""
+                article.points.append((point_text, clean_text(XP_TEXT(content_elem))))
+        
+        articles.append(article)
+    
+    return ConsolidatedDocument(title_parts, oj_ref, articles)
+
+
+def read_consolidated(soup: BeautifulSoup) -> ConsolidatedDocument:
     """
-    Convert consolidated EUR-Lex HTML format to Markdown.
+    Read the parts of a consolidated page that get rendered.
     
     Consolidated documents have a different structure:
     - eli-main-title div with title-doc-first/title-doc-last classes
@@ -906,12 +1486,9 @@ def convert_consolidated_html(soup: BeautifulSoup, celex: str, doc_type_str: str
     - div.norm or p.norm for paragraph content
     - modref class for amendment markers (►B, ►M1, ►M2)
     """
-    lines = []
-    
-    content = soup.find(id='docHtml') or soup
-    
-    # Extract metadata
-    year, num = celex_to_eli(celex)
+    content = find_content(soup, 'docHtml')
+    if etree.iselement(content):
+        return read_consolidated_tree(content)
     
     # Get title from title-doc-first elements
     title_parts = []
@@ -922,6 +1499,78 @@ def convert_consolidated_html(soup: BeautifulSoup, celex: str, doc_type_str: str
             if text:
                 title_parts.append(text)
     
+    # Get OJ reference
+    oj_ref = ""
+    oj_elem = content.find('p', class_='title-doc-oj-reference')
+    if oj_elem:
+        oj_ref = clean_text(oj_elem.get_text())
+    
+    articles = []
+    for article_div in content.find_all('div', class_='eli-subdivision', id=re.compile(r'^art_')):
+        # Get article number and title
+        article_num_elem = article_div.find('p', class_='title-article-norm')
+        article_title_elem = article_div.find('p', class_='stitle-article-norm')
+        article = ConsolidatedArticle(
+            clean_text(article_num_elem.get_text()) if article_num_elem else None,
+            clean_text(article_title_elem.get_text()) if article_title_elem else None,
+        )
+        
+        # Process article content
+        for elem in article_div.find_all(['p', 'div'], class_='norm', recursive=False):
+            # Skip amendment markers (modref class)
+            if 'modref' in elem.get('class', []):
+                continue
+            
+            # Check for paragraph numbers (no-parag class)
+            para_num = elem.find('span', class_='no-parag')
+            if para_num:
+                num_text = clean_text(para_num.get_text())
+                # Get the content (inline-element div or remaining text)
+                content_elem = elem.find('div', class_='inline-element')
+                if content_elem:
+                    content_text = clean_text(content_elem.get_text())
+                else:
+                    content_text = clean_text(elem.get_text())
+                    # Remove the number prefix
+                    content_text = content_text.replace(num_text, '', 1).strip()
+                article.paragraphs.append((num_text, content_text))
+            else:
+                article.paragraphs.append((None, clean_text(elem.get_text())))
+        
+        # Process definition lists (grid-container grid-list)
+        for grid in article_div.find_all('div', class_='grid-container'):
+            if 'grid-list' in grid.get('class', []):
+                # Get the letter/number (point indicator)
+                point_elem = grid.find('div', class_='list')
+                point_text = clean_text(point_elem.get_text()) if point_elem else ""
+                
+                # Get the content
+                content_elem = grid.find('div', class_='grid-list-column-2')
+                if content_elem:
+                    article.points.append((point_text, clean_text(content_elem.get_text())))
+        
+        articles.append(article)
+    
+    return ConsolidatedDocument(title_parts, oj_ref, articles)
+
+
+def convert_consolidated_html(soup: BeautifulSoup, celex: str, doc_type_str: str) -> str:
+    """
+    Convert consolidated EUR-Lex HTML format to Markdown.
+    
+    Args:
+        soup: Parsed HTML from either backend (or its ConsolidatedDocument)
+        celex: CELEX number
+        doc_type_str: Document type ('dir', 'reg', 'reg_impl', 'reg_del')
+    """
+    lines = []
+    
+    doc = soup if isinstance(soup, ConsolidatedDocument) else read_consolidated(soup)
+    
+    # Extract metadata
+    year, num = celex_to_eli(celex)
+    
+    title_parts = doc.title_parts
     doc_title = title_parts[0] if title_parts else f"Document {celex}"
     
     # Document type label
@@ -933,11 +1582,7 @@ def convert_consolidated_html(soup: BeautifulSoup, celex: str, doc_type_str: str
     }
     doc_type_label = doc_type_labels.get(doc_type_str, 'Regulation')
     
-    # Get OJ reference
-    oj_ref = ""
-    oj_elem = content.find('p', class_='title-doc-oj-reference')
-    if oj_elem:
-        oj_ref = clean_text(oj_elem.get_text())
+    oj_ref = doc.oj_ref
     
     # Build ELI URL
     eli_path = doc_type_str
@@ -969,68 +1614,32 @@ def convert_consolidated_html(soup: BeautifulSoup, celex: str, doc_type_str: str
     lines.append("## Enacting Terms")
     lines.append("")
     
-    for article_div in content.find_all('div', class_='eli-subdivision', id=re.compile(r'^art_')):
-        article_id = article_div.get('id', '')
-        
-        # Get article number
-        article_num_elem = article_div.find('p', class_='title-article-norm')
-        if article_num_elem:
-            article_num = clean_text(article_num_elem.get_text())
-            lines.append(f"### {article_num}")
+    for article in doc.articles:
+        if article.number is not None:
+            lines.append(f"### {article.number}")
             lines.append("")
         
-        # Get article title
-        article_title_elem = article_div.find('p', class_='stitle-article-norm')
-        if article_title_elem:
-            article_title = clean_text(article_title_elem.get_text())
-            lines.append(f"**{article_title}**")
+        if article.title is not None:
+            lines.append(f"**{article.title}**")
             lines.append("")
         
-        # Process article content
-        for elem in article_div.find_all(['p', 'div'], class_='norm', recursive=False):
-            # Skip amendment markers (modref class)
-            if 'modref' in elem.get('class', []):
-                continue
-            
-            # Check for paragraph numbers (no-parag class)
-            para_num = elem.find('span', class_='no-parag')
-            if para_num:
-                num_text = clean_text(para_num.get_text())
-                # Get the content (inline-element div or remaining text)
-                content_elem = elem.find('div', class_='inline-element')
-                if content_elem:
-                    content_text = clean_text(content_elem.get_text())
-                else:
-                    content_text = clean_text(elem.get_text())
-                    # Remove the number prefix
-                    content_text = content_text.replace(num_text, '', 1).strip()
+        for num_text, text in article.paragraphs:
+            if num_text is not None:
                 # Check if this is a sub-paragraph (2a., 3b., etc.) - should be bullet
                 if re.match(r'^\d+[a-z]\.$', num_text):
-                    lines.append(f"- ({num_text.rstrip('.')}) {content_text}")
+                    lines.append(f"- ({num_text.rstrip('.')}) {text}")
                 else:
                     # Normal paragraph: ensure space after number
                     # num_text is like "1." - we need "1. content" not "1.content"
-                    lines.append(f"{num_text} {content_text}")
+                    lines.append(f"{num_text} {text}")
+                lines.append("")
+            elif text and '►' not in text and '▼' not in text:  # Skip amendment markers
+                lines.append(text)
                 lines.append("")
-            else:
-                text = clean_text(elem.get_text())
-                if text and '►' not in text and '▼' not in text:  # Skip amendment markers
-                    lines.append(text)
-                    lines.append("")
         
-        # Process definition lists (grid-container grid-list)
-        for grid in article_div.find_all('div', class_='grid-container'):
-            if 'grid-list' in grid.get('class', []):
-                # Get the letter/number (point indicator)
-                point_elem = grid.find('div', class_='list')
-                point_text = clean_text(point_elem.get_text()) if point_elem else ""
-                
-                # Get the content
-                content_elem = grid.find('div', class_='grid-list-column-2')
-                if content_elem:
-                    content_text = clean_text(content_elem.get_text())
-                    if content_text:
-                        lines.append(f"- {point_text} {content_text}")
+        for point_text, text in article.points:
+            if text:
+                lines.append(f"- {point_text} {text}")
         
         lines.append("")  # Blank line between articles
     
@@ -1040,17 +1649,76 @@ def convert_consolidated_html(soup: BeautifulSoup, celex: str, doc_type_str: str
     return '\n'.join(lines)
 
 
+def write_markdown(celex: str, html: str, output_dir: Path, backend: Optional[str] = None) -> Path:
+    """Convert one page and write <output_dir>/<CELEX>.md."""
+    markdown = convert_html_to_markdown(celex, html, backend=backend)
+    
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_file = output_dir / f"{celex}.md"
+    print(f"  Writing to {output_file}...")
+    output_file.write_text(markdown, encoding='utf-8')
+    return output_file
+
+
+def replay(output_dir: Path, backend: Optional[str] = None) -> int:
+    """
+    Reconvert every stored page (latest retrieval) into output_dir, offline.
+    
+    Returns the number of documents that failed.
+    """
+    celexes = stored_celexes()
+    print(f"Replaying {len(celexes)} stored document(s) into {output_dir}...")
+    start = time.perf_counter()
+    failed = 0
+    for celex in celexes:
+        html, retrieved = load_stored_html(celex)
+        print(f"\n{celex} (retrieved {retrieved})")
+        try:
+            write_markdown(celex, html, output_dir, backend)
+        except Exception as e:
+            print(f"  ❌ {celex}: {e}")
+            failed += 1
+    print(f"\n{'❌' if failed else '✅'} {len(celexes) - failed}/{len(celexes)} converted "
+          f"in {time.perf_counter() - start:.1f}s")
+    return failed
+
+
 def main():
     """CLI entry point."""
-    if len(sys.argv) < 3:
-        print("Usage: python eurlex_html_to_md.py <CELEX_NUMBER> <OUTPUT_DIR>")
-        print("")
-        print("Example:")
-        print("  python eurlex_html_to_md.py 32008R0765 ./01_regulation/765_2008_Market_Surveillance")
-        sys.exit(1)
-    
-    celex = sys.argv[1]
-    output_dir = Path(sys.argv[2])
+    parser = argparse.ArgumentParser(
+        description="Convert EUR-Lex HTML to Markdown",
+        epilog="Example: python eurlex_html_to_md.py 32008R0765 "
+               "./01_regulation/765_2008_Market_Surveillance",
+    )
+    parser.add_argument('celex', nargs='?', help='CELEX number, e.g. 32008R0765')
+    parser.add_argument('output_dir', nargs='?', type=Path, help='Directory for <CELEX>.md')
+    parser.add_argument('--prefetch', nargs='*', metavar='CELEX',
+                        help='Download documents into the HTML store (default: source: html documents)')
+    parser.add_argument('--replay', type=Path, metavar='OUTPUT_DIR',
+                        help='Reconvert every stored document into OUTPUT_DIR without the network')
+    parser.add_argument('--backend', choices=BACKENDS, help='HTML parser (default: lxml)')
+    parser.add_argument('--retrieved', metavar='YYYY-MM-DD',
+                        help='Convert the page stored on this date instead of the latest')
+    fetch_mode = parser.add_mutually_exclusive_group()
+    fetch_mode.add_argument('--offline', action='store_true',
+                            help='Use only the HTML store, never the network')
+    fetch_mode.add_argument('--refresh', action='store_true',
+                            help='Fetch from EUR-Lex again even if the page is stored')
+    args = parser.parse_args()
+    
+    if args.prefetch is not None:
+        celexes = args.prefetch or html_documents()
+        sys.exit(1 if prefetch(celexes, refresh=args.refresh) else 0)
+    
+    if args.replay is not None:
+        sys.exit(1 if replay(args.replay, args.backend) else 0)
+    
+    if not args.output_dir:
+        parser.error("CELEX and OUTPUT_DIR are required (or use --prefetch / --replay)")
+    if args.refresh and args.retrieved:
+        parser.error("--retrieved selects a stored page; it can't be combined with --refresh")
+    
+    celex = args.celex
     
     # Validate CELEX format (standard or consolidated, regulation or directive)
     # Standard: 3YYYY[R|L]NNNN (e.g., 32008R0765 for regulation, 32002L0058 for directive)
@@ -1065,19 +1733,14 @@ def main():
     
     # Convert
     try:
-        markdown = convert_html_to_markdown(celex)
+        html, _ = get_html(celex, offline=args.offline, refresh=args.refresh, retrieved=args.retrieved)
+        output_file = write_markdown(celex, html, args.output_dir, args.backend)
     except Exception as e:
         print(f"Error during conversion: {e}")
         sys.exit(1)
     
-    # Write output
-    output_dir.mkdir(parents=True, exist_ok=True)
-    output_file = output_dir / f"{celex}.md"
-    
-    print(f"  Writing to {output_file}...")
-    output_file.write_text(markdown, encoding='utf-8')
-    
     # Summary
+    markdown = output_file.read_text(encoding='utf-8')
     word_count = len(markdown.split())
     line_count = len(markdown.splitlines())
     print(f"\n✅ Conversion complete!")
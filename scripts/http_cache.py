@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Persistent HTTP Response Cache
+==============================
+
+On-disk cache for the small EUR-Lex endpoints the utilities keep asking
+for: XML notices and OJ RDF descriptions. Shared by discover_cellar_ids.py
+and eurlex_formex.py. Rendered HTML is not cached here: eurlex_html_to_md.py
+keeps pages in its own compressed store and borrows only the session,
+offline flag and conditional_headers().
+
+Behaviour:
+    - Fresh entries (younger than the TTL) are served without a request
+    - Stale entries are revalidated with If-None-Match / If-Modified-Since;
+      a 304 refreshes the entry without transferring the body again
+    - Only complete 200 responses are stored (never 202 "generating"), and
+      iter_chunks() bodies only once read to the end
+    - When the cache grows past MAX_CACHE_BYTES the least recently used
+      entries are evicted
+    - Offline mode serves only from the cache, stale or not, and raises
+      CacheMiss for anything that was never fetched
+
+Layout (scripts/.cache/http/):
+    <key>.body    raw response body
+    <key>.json    url, ETag, Last-Modified, fetch time, content type
+    <digest>.<name>.json  a value derived from a URL's body (store_derived()),
+                  for callers that stop reading early and so never cache it
+    
+    key = sha256(url + Accept header), so the same URL fetched as RDF and as
+    HTML are separate entries. Body mtime is the LRU clock.
+
+Offline mode:
+    EURLEX_OFFLINE=1 python discover_cellar_ids.py
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import requests
+
+CACHE_DIR = Path(__file__).parent / ".cache" / "http"
+DEFAULT_TTL = 24 * 3600  # seconds
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+HTTP_HEADERS = {'User-Agent': 'Mozilla/5.0'}
+
+# OJ RDF descriptions; every caller must send the same Accept header, since it
+# is part of the cache key (see fetch_rdf())
+RDF_URL = "http://publications.europa.eu/resource/oj/{oj_ref}.ENG.fmx4"
+RDF_HEADERS = {'Accept': 'application/rdf+xml, */*'}
+
+# Serve only from the cache; set by --offline flags or EURLEX_OFFLINE=1
+OFFLINE = os.environ.get('EURLEX_OFFLINE', '') not in ('', '0')
+
+_thread_local = threading.local()
+
+
+class CacheMiss(RuntimeError):
+    """Raised in offline mode for a URL that is not in the cache."""
+
+
+@dataclass
+class CachedResponse:
+    """A response body with just enough of requests.Response's interface."""
+    url: str
+    status_code: int
+    content: bytes
+    headers: dict = field(default_factory=dict)
+    from_cache: bool = False
+    
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8', errors='replace')
+    
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} for url: {self.url}")
+
+
+def http_session() -> requests.Session:
+    """
+    Return this thread's keep-alive HTTP session.
+    
+    Sessions pool connections per host, so a batch of lookups reuses the
+    same connections to eur-lex.europa.eu and publications.europa.eu.
+    """
+    session = getattr(_thread_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        session.headers.update(HTTP_HEADERS)
+        _thread_local.session = session
+    return session
+
+
+def cache_key(url: str, headers: dict = None) -> str:
+    """Cache key for a URL as requested with the given Accept header."""
+    accept = (headers or {}).get('Accept', '')
+    return hashlib.sha256(f"{url}\n{accept}".encode('utf-8')).hexdigest()
+
+
+def load_entry(key: str) -> tuple:
+    """
+    Read a cache entry.
+    
+    Returns tuple: (metadata dict, body bytes), or (None, None) if absent
+    or unreadable (a concurrent eviction, a half-written entry).
+    """
+    try:
+        meta = json.loads((CACHE_DIR / f"{key}.json").read_text(encoding='utf-8'))
+        body = (CACHE_DIR / f"{key}.body").read_bytes()
+    except (OSError, ValueError):
+        return None, None
+    if len(body) != meta.get('size'):
+        return None, None
+    return meta, body
+
+
+def write_atomic_bytes(path: Path, data: bytes):
+    """Write data to path via a per-thread temp file and os.replace()."""
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def sha256_file(path: Path) -> str:
+    """Return the hex SHA-256 of a file, read in 1 MiB chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def store_entry(key: str, url: str, body: bytes, headers) -> dict:
+    """Store a 200 response body with its validators, then enforce the size cap."""
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    meta = {
+        'url': url,
+        'etag': headers.get('ETag'),
+        'last_modified': headers.get('Last-Modified'),
+        'content_type': headers.get('Content-Type'),
+        'fetched_at': time.time(),
+        'size': len(body),
+    }
+    # Body first: load_entry() rejects metadata whose size doesn't match
+    write_atomic_bytes(CACHE_DIR / f"{key}.body", body)
+    write_atomic_bytes(CACHE_DIR / f"{key}.json", json.dumps(meta, indent=2).encode('utf-8'))
+    evict(MAX_CACHE_BYTES)
+    return meta
+
+
+def touch_entry(key: str, meta: dict = None):
+    """Mark an entry as recently used, and as freshly validated if meta is given."""
+    try:
+        os.utime(CACHE_DIR / f"{key}.body")
+        if meta is not None:
+            meta['fetched_at'] = time.time()
+            write_atomic_bytes(CACHE_DIR / f"{key}.json",
+                               json.dumps(meta, indent=2).encode('utf-8'))
+    except OSError:
+        pass
+
+
+def evict(max_bytes: int) -> int:
+    """
+    Delete least recently used entries until the cache fits in max_bytes.
+    
+    Returns the number of entries removed.
+    """
+    entries = []
+    for body_path in CACHE_DIR.glob('*.body'):
+        try:
+            stat = body_path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, body_path))
+    
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, body_path in sorted(entries):
+        if total <= max_bytes:
+            break
+        for path in (body_path, body_path.with_suffix('.json')):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+        total -= size
+        removed += 1
+    return removed
+
+
+def derived_path(url: str, name: str) -> Path:
+    """Where store_derived() keeps the value called name for url."""
+    digest = hashlib.sha256(f"{url}\n#{name}".encode('utf-8')).hexdigest()
+    return CACHE_DIR / f"{digest}.{name}.json"
+
+
+def store_derived(url: str, name: str, value):
+    """
+    Cache a small JSON value extracted from url's body.
+    
+    iter_chunks() only stores bodies read to the end; a caller that stops
+    at the first match stores what it found here instead, so the lookup
+    still works offline.
+    """
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    entry = {'url': url, 'name': name, 'value': value, 'fetched_at': time.time()}
+    write_atomic_bytes(derived_path(url, name), json.dumps(entry, indent=2).encode('utf-8'))
+
+
+def load_derived(url: str, name: str, ttl: float = None):
+    """
+    A value cached by store_derived(), or None if absent or older than ttl
+    (default: DEFAULT_TTL; any age in offline mode).
+    """
+    ttl = DEFAULT_TTL if ttl is None else ttl
+    try:
+        entry = json.loads(derived_path(url, name).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    if not OFFLINE and time.time() - entry['fetched_at'] >= ttl:
+        return None
+    return entry['value']
+
+
+def lookup(url: str, headers: dict = None, ttl: float = None) -> tuple:
+    """
+    Look a URL up in the cache.
+    
+    Returns tuple: (key, metadata or None, body or None, fresh)
+    
+    Raises:
+        CacheMiss: In offline mode, when the URL has never been cached
+    """
+    ttl = DEFAULT_TTL if ttl is None else ttl
+    key = cache_key(url, headers)
+    meta, body = load_entry(key)
+    if meta is None and OFFLINE:
+        raise CacheMiss(f"Not cached (offline mode): {url}")
+    fresh = meta is not None and (OFFLINE or time.time() - meta['fetched_at'] < ttl)
+    return key, meta, body, fresh
+
+
+def conditional_headers(headers: dict, meta: dict) -> dict:
+    """Request headers plus the validators of a stale entry, if any."""
+    request_headers = dict(headers or {})
+    if meta is not None:
+        if meta.get('etag'):
+            request_headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            request_headers['If-Modified-Since'] = meta['last_modified']
+    return request_headers
+
+
+def fetch(url: str, headers: dict = None, ttl: float = None, session: requests.Session = None,
+          timeout: float = 60, min_bytes: int = 1) -> CachedResponse:
+    """
+    GET a URL through the cache.
+    
+    Args:
+        url: URL to fetch
+        headers: Extra request headers (Accept is part of the cache key)
+        ttl: Seconds an entry is served without revalidation (default: DEFAULT_TTL)
+        session: requests.Session to use (default: this thread's keep-alive session);
+                 pass one to keep cookies, e.g. across EUR-Lex 202 retries
+        timeout: Request timeout in seconds
+        min_bytes: Smaller 200 responses are returned but not stored
+    
+    Returns:
+        CachedResponse. Non-200 responses (202, 404, ...) pass through uncached.
+    
+    Raises:
+        CacheMiss: In offline mode, when the URL has never been cached
+    """
+    key, meta, body, fresh = lookup(url, headers, ttl)
+    
+    if fresh:
+        touch_entry(key)
+        return CachedResponse(url, 200, body, {'Content-Type': meta.get('content_type')},
+                              from_cache=True)
+    
+    response = (session or http_session()).get(
+        url, headers=conditional_headers(headers, meta), timeout=timeout)
+    
+    if response.status_code == 304 and meta is not None:
+        touch_entry(key, meta)
+        return CachedResponse(url, 200, body, {'Content-Type': meta.get('content_type')},
+                              from_cache=True)
+    
+    if response.status_code == 200 and len(response.content) >= min_bytes:
+        store_entry(key, url, response.content, response.headers)
+    return CachedResponse(url, response.status_code, response.content, dict(response.headers))
+
+
+def fetch_rdf(oj_ref: str, timeout: float = 30) -> CachedResponse:
+    """
+    GET the RDF description of an English fmx4 OJ reference (e.g. L_202401183).
+    
+    Raises requests.HTTPError for an error status, CacheMiss offline.
+    """
+    response = fetch(RDF_URL.format(oj_ref=oj_ref), headers=RDF_HEADERS, timeout=timeout)
+    response.raise_for_status()
+    return response
+
+
+def iter_chunks(url: str, headers: dict = None, ttl: float = None,
+                session: requests.Session = None, timeout: float = 60,
+                chunk_size: int = CHUNK_SIZE, min_bytes: int = 1):
+    """
+    GET a URL through the cache, yielding the body in chunks.
+    
+    Cached bodies are sliced from disk. Network bodies are streamed and
+    stored only once read to the end, so a consumer that stops early (and
+    closes the generator) neither downloads nor caches the rest.
+    
+    Raises:
+        CacheMiss: In offline mode, when the URL has never been cached
+        requests.HTTPError: For any response other than 200 or 304
+    """
+    key, meta, body, fresh = lookup(url, headers, ttl)
+    
+    if fresh:
+        touch_entry(key)
+    else:
+        with (session or http_session()).get(url, headers=conditional_headers(headers, meta),
+                                             timeout=timeout, stream=True) as response:
+            if response.status_code == 304 and meta is not None:
+                touch_entry(key, meta)
+            else:
+                response.raise_for_status()
+                if response.status_code != 200:
+                    raise requests.HTTPError(f"{response.status_code} for url: {url}")
+                parts = []
+                for chunk in response.iter_content(chunk_size):
+                    parts.append(chunk)
+                    yield chunk
+                body = b''.join(parts)
+                if len(body) >= min_bytes:
+                    store_entry(key, url, body, response.headers)
+                return
+    
+    for start in range(0, len(body), chunk_size):
+        yield body[start:start + chunk_size]
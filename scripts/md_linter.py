@@ -2,12 +2,35 @@
 """
 Markdown Linter for EUR-Lex converted documents.
 Checks for common pandoc conversion artifacts and formatting issues.
+
+Usage:
+    python md_linter.py <file.md> [file2.md ...]
+    python md_linter.py --dir <directory> [directory2 ...]
+    python md_linter.py --dir . --changed           # Relint only files edited since last run
+    python md_linter.py --changed origin/main...HEAD  # Lint Markdown touched by a git range
+    python md_linter.py --dir . --format json > lint.jsonl  # Streaming JSON Lines
+    python md_linter.py --dir . --format sarif --output lint.sarif
 """
+import argparse
+import json
+import os
 import re
+import subprocess
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from dataclasses import dataclass
-from typing import List
+from dataclasses import asdict, dataclass
+from collections import deque
+from functools import lru_cache
+from itertools import chain, islice
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from http_cache import sha256_file, write_atomic_bytes
+
+
+# Incremental lint cache: content hash -> issues (see lint_cached())
+LINT_CACHE_FILE = Path(__file__).parent / ".cache" / "lint.json"
 
 
 @dataclass
@@ -19,18 +42,171 @@ class LintIssue:
     content: str
 
 
-def lint_markdown(file_path: str) -> List[LintIssue]:
-    """Lint a markdown file for common issues."""
-    issues = []
+class LineContext(NamedTuple):
+    """A line plus its neighbours, for rules that look beyond one line."""
+    line_num: int
+    line: str            # raw line, including the newline
+    stripped: str        # line.rstrip()
+    before: List[str]    # up to CONTEXT_LINES preceding raw lines, oldest first
+    after: List[str]     # up to CONTEXT_LINES following raw lines
+
+
+@dataclass(frozen=True)
+class LintRule:
+    """
+    One line rule: a precompiled pattern plus cheap prefilters.
+    
+    pattern is matched against the stripped line, or the raw line if raw
+    is set. first lists the characters the line can start with (after
+    leading whitespace) and anchors the pattern at the line start; None
+    means the pattern is searched anywhere and tried on every line, so
+    give it a contains substring where possible. context, if set, gets a LineContext and can veto the
+    match.
+    """
+    id: str
+    severity: str  # 'error', 'warning', 'info'
+    message: str
+    pattern: re.Pattern
+    first: Optional[str] = None
+    contains: Optional[str] = None
+    raw: bool = False
+    content: Callable[[str], str] = lambda stripped: stripped[:60]
+    context: Optional[Callable[[LineContext], bool]] = None
+
+
+# How many lines before/after a context rule can see
+CONTEXT_LINES = 4
+
+HR_RE = re.compile(r'---+$')
+HEADER_RE = re.compile(r'#{1,6}\s+')
+AMENDING_RE = re.compile(r'(is replaced|is amended|is inserted|is deleted|is added|are replaced'
+                         r'|are amended|are inserted|are deleted|are added)', re.IGNORECASE)
+
+
+def _truncated(stripped: str) -> str:
+    return stripped[:60] + '...' if len(stripped) > 60 else stripped
+
+
+def _not_amending_instruction(ctx: LineContext) -> bool:
+    """
+    FORMAT005 exception: amending instructions ("(a) point 3 is replaced
+    by the following:") are followed by blockquoted content and are not
+    list items.
+    """
+    if AMENDING_RE.search(ctx.line):
+        return False
+    return not (ctx.after and ctx.after[0].strip().startswith('>'))
+
+
+def _follows_hr(ctx: LineContext) -> bool:
+    """FORMAT007: another --- earlier, with only blank lines in between."""
+    # Looks back at most 4 lines and never at line 1 (as the original loop did)
+    for prev in reversed(ctx.before[-min(4, ctx.line_num - 2):] if ctx.line_num > 2 else []):
+        prev_stripped = prev.rstrip()
+        if HR_RE.match(prev_stripped):
+            return True
+        if prev_stripped:  # Non-empty line that isn't ---
+            return False
+    return False
+
+
+def _precedes_header(ctx: LineContext) -> bool:
+    """FORMAT008: the next non-blank, non-rule line (within 4) is a header."""
+    for nxt in ctx.after[:4]:
+        next_stripped = nxt.rstrip()
+        if next_stripped and not HR_RE.match(next_stripped):
+            return bool(HEADER_RE.match(next_stripped))
+    return False
+
+
+# Line rules, in reporting order (issues on one line come out in this order)
+RULES: Tuple[LintRule, ...] = (
+    LintRule('PANDOC001', 'warning', 'Standalone backslash (pandoc line break artifact)',
+             re.compile(r'\s*\\\s*$'), first='\\',
+             content=lambda s: s[:50]),
+    LintRule('PANDOC002', 'warning', 'Excessively long horizontal rule (should be ---)',
+             re.compile(r'-{20,}$'), first='-',
+             content=lambda s: f'{s[:20]}... ({len(s)} chars)'),
+    LintRule('PANDOC003', 'error', 'Pandoc div marker (unconverted HTML structure)',
+             re.compile(r':{3,}'), first=':'),
+    LintRule('PANDOC004', 'warning', 'Pandoc attribute syntax (unconverted class/id)',
+             re.compile(r'\{[.#][^}]+\}'), contains='{'),
+    LintRule('HTML001', 'error', 'HTML onclick attribute in markdown',
+             re.compile(r'onclick=', re.IGNORECASE)),
+    LintRule('EURLEX001', 'info', 'EUR-Lex modification marker (should be removed)',
+             re.compile(r'▼[A-Z]\d*'), contains='▼'),
+    LintRule('FORMAT001', 'warning', 'Empty list item marker (content on wrong line)',
+             re.compile(r'\s*\([a-z]+\)\s*$'), first='(',
+             content=lambda s: s),
+    LintRule('FORMAT002', 'warning', 'Standalone em-dash marker (content on wrong line)',
+             re.compile(r'\s*—\s*$'), first='—',
+             content=lambda s: s),
+    LintRule('FORMAT003', 'warning', 'Empty parenthesized number marker (content on wrong line)',
+             re.compile(r'\s*\(\d+\)\s*$'), first='(',
+             content=lambda s: s),
+    LintRule('FORMAT004', 'warning', 'Empty numbered line marker (content on wrong line)',
+             re.compile(r'\s*\d+\.\s*$'), first='0123456789',
+             content=lambda s: s),
+    # Letter markers with leading whitespace should be "- (a) text" for proper nesting
+    LintRule('FORMAT005', 'warning',
+             'Letter marker should be list item for proper indentation (add "- " prefix)',
+             re.compile(r'\s+\([a-z]+\)\s+\S'), first='(', raw=True,
+             content=_truncated, context=_not_amending_instruction),
+    # Headers and text lines starting with orphan quotes
+    LintRule('FORMAT006', 'warning', 'Line starts with single quote (Formex artifact - remove quote)',
+             re.compile(r"'[^']+|#{1,6}\s+'"), first="'#", raw=True,
+             content=_truncated),
+    LintRule('FORMAT007', 'warning', 'Consecutive horizontal rule (redundant - merge with previous)',
+             HR_RE, first='-',
+             content=lambda s: s, context=_follows_hr),
+    # Headers already have built-in visual separation in renderers
+    LintRule('FORMAT008', 'warning',
+             'Horizontal rule before header (redundant - headers have built-in styling)',
+             HR_RE, first='-',
+             content=lambda s: s, context=_precedes_header),
+)
+
+
+@lru_cache(maxsize=None)
+def compile_rules(rules: Tuple[LintRule, ...]) -> Dict[Optional[str], tuple]:
+    """
+    Dispatch table: first non-blank character -> (rule, match function) pairs.
     
+    Each entry keeps table order and includes the rules that can fire
+    anywhere; the None entry holds those alone, for every other line.
+    """
+    def entries(selected):
+        return tuple((r, r.pattern.match if r.first else r.pattern.search) for r in selected)
+    
+    table = {None: entries(r for r in rules if r.first is None)}
+    for char in {c for r in rules if r.first for c in r.first}:
+        table[char] = entries(r for r in rules if r.first is None or char in r.first)
+    return table
+
+
+def lint_markdown(file_path: str, rules: Tuple[LintRule, ...] = None) -> List[LintIssue]:
+    """Lint a markdown file for common issues (rules defaults to RULES)."""
     with open(file_path, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
+        return lint_lines(f, rules)
+
+
+def lint_lines(lines: Iterable[str], rules: Tuple[LintRule, ...] = None) -> List[LintIssue]:
+    """
+    Lint Markdown given as an iterable of lines (e.g. an open file).
+    
+    Lines are consumed one at a time; only the header block for the META
+    checks and a CONTEXT_LINES window either side of the current line
+    are held, so memory stays flat however long the document is.
+    """
+    issues = []
+    lines = iter(lines)
     
     # Document-level check: Metadata header (CELEX ID and Source URL)
     # Check first 10 lines for required metadata
     has_celex = False
     has_source = False
-    first_lines = ''.join(lines[:10])
+    head = list(islice(lines, 10))
+    first_lines = ''.join(head)
     
     if re.search(r'\*\*CELEX:\*\*\s*\d+[A-Z]\d+', first_lines):
         has_celex = True
@@ -60,183 +236,288 @@ def lint_markdown(file_path: str) -> List[LintIssue]:
                 content='Document should include EUR-Lex source URL'
             ))
     
-    for i, line in enumerate(lines, 1):
+    scan = compile_rules(RULES if rules is None else rules)
+    lines = chain(head, lines)
+    del head
+    before = deque(maxlen=CONTEXT_LINES)
+    ahead = deque(islice(lines, CONTEXT_LINES + 1))
+    i = 0
+    while ahead:
+        line = ahead.popleft()
+        ahead.extend(islice(lines, CONTEXT_LINES - len(ahead)))
+        i += 1
         stripped = line.rstrip()
-        
-        # Rule 1: Standalone backslash (pandoc line break artifact)
-        if re.match(r'^\s*\\\s*$', stripped):
+        for rule, matches in scan.get(stripped.lstrip()[:1], scan[None]):
+            if rule.contains is not None and rule.contains not in stripped:
+                continue
+            if not matches(line if rule.raw else stripped):
+                continue
+            if rule.context is not None:
+                ctx = LineContext(i, line, stripped, list(before), list(ahead))
+                if not rule.context(ctx):
+                    continue
             issues.append(LintIssue(
                 line_num=i,
-                rule='PANDOC001',
-                message='Standalone backslash (pandoc line break artifact)',
-                severity='warning',
-                content=stripped[:50]
+                rule=rule.id,
+                message=rule.message,
+                severity=rule.severity,
+                content=rule.content(stripped)
             ))
-        
-        # Rule 2: Excessively long horizontal rule
-        if re.match(r'^-{20,}$', stripped):
-            issues.append(LintIssue(
-                line_num=i,
-                rule='PANDOC002',
-                message='Excessively long horizontal rule (should be ---)',
-                severity='warning',
-                content=f'{stripped[:20]}... ({len(stripped)} chars)'
-            ))
-        
-        # Rule 3: Pandoc div markers (:::)
-        if re.match(r'^:{3,}', stripped):
-            issues.append(LintIssue(
-                line_num=i,
-                rule='PANDOC003',
-                message='Pandoc div marker (unconverted HTML structure)',
-                severity='error',
-                content=stripped[:60]
-            ))
-        
-        # Rule 4: Pandoc attribute syntax {.class} or {#id}
-        if re.search(r'\{[.#][^}]+\}', stripped):
-            issues.append(LintIssue(
-                line_num=i,
-                rule='PANDOC004',
-                message='Pandoc attribute syntax (unconverted class/id)',
-                severity='warning',
-                content=stripped[:60]
-            ))
-        
-        # Rule 5: Broken markdown links with onclick
-        if 'onclick=' in stripped.lower():
-            issues.append(LintIssue(
-                line_num=i,
-                rule='HTML001',
-                message='HTML onclick attribute in markdown',
-                severity='error',
-                content=stripped[:60]
-            ))
-        
-        # Rule 6: EUR-Lex modification markers (▼M1, ▼B, etc.)
-        if re.search(r'▼[A-Z]\d*', stripped):
-            issues.append(LintIssue(
-                line_num=i,
-                rule='EURLEX001',
-                message='EUR-Lex modification marker (should be removed)',
-                severity='info',
-                content=stripped[:60]
-            ))
-        
-        # Rule 7: Empty list items like "(a) " with nothing after
-        if re.match(r'^\s*\([a-z]+\)\s*$', stripped):
-            issues.append(LintIssue(
-                line_num=i,
-                rule='FORMAT001',
-                message='Empty list item marker (content on wrong line)',
-                severity='warning',
-                content=stripped
-            ))
-        
-        # Rule 8: Standalone em-dash markers (Formex list artifact)
-        # Em-dash (—) on its own line indicates content is on wrong line
-        if re.match(r'^\s*—\s*$', stripped):
-            issues.append(LintIssue(
-                line_num=i,
-                rule='FORMAT002',
-                message='Standalone em-dash marker (content on wrong line)',
-                severity='warning',
-                content=stripped
-            ))
-        
-        # Rule 9: Standalone parenthesized numbered markers like "(1)" or "(2)" on their own
-        if re.match(r'^\s*\(\d+\)\s*$', stripped):
-            issues.append(LintIssue(
-                line_num=i,
-                rule='FORMAT003',
-                message='Empty parenthesized number marker (content on wrong line)',
-                severity='warning',
-                content=stripped
-            ))
-        
-        # Rule 10: Standalone line-numbered markers like "1." or "2." on their own
-        if re.match(r'^\s*\d+\.\s*$', stripped):
-            issues.append(LintIssue(
-                line_num=i,
-                rule='FORMAT004',
-                message='Empty numbered line marker (content on wrong line)',
-                severity='warning',
-                content=stripped
-            ))
-        
-        # Rule 11: Letter markers not formatted as list items
-        # Detects "(a) text" that should be "- (a) text" for proper nesting
-        # Only warns if there's leading whitespace (suggesting it should be nested)
-        # EXCEPTION: Skip this warning for amending regulation patterns where
-        # the letter marker is an instruction followed by blockquoted content
-        if re.match(r'^\s+\([a-z]+\)\s+\S', line) and not re.match(r'^\s+-\s+\([a-z]+\)', line):
-            # Check if this is an amending instruction (followed by blockquote or similar pattern)
-            is_amending_instruction = False
-            # Check if content suggests amending pattern (e.g., "is replaced", "is amended", "is inserted")
-            if re.search(r'(is replaced|is amended|is inserted|is deleted|is added|are replaced|are amended|are inserted|are deleted|are added)', line, re.IGNORECASE):
-                is_amending_instruction = True
-            # Also check if next line is a blockquote
-            if i < len(lines) and lines[i].strip().startswith('>'):
-                is_amending_instruction = True
-            
-            if not is_amending_instruction:
-                issues.append(LintIssue(
-                    line_num=i,
-                    rule='FORMAT005',
-                    message='Letter marker should be list item for proper indentation (add "- " prefix)',
-                    severity='warning',
-                    content=stripped[:60] + '...' if len(stripped) > 60 else stripped
-                ))
-        
-        # Rule 12: Lines starting with single quotes (Formex conversion artifact)
-        # Detects both headers and regular text lines starting with orphan quotes
-        if re.match(r"^'[^']+", line) or re.match(r"^#{1,6}\s+'", line):
-            issues.append(LintIssue(
-                line_num=i,
-                rule='FORMAT006',
-                message='Line starts with single quote (Formex artifact - remove quote)',
-                severity='warning',
-                content=stripped[:60] + '...' if len(stripped) > 60 else stripped
-            ))
-        
-        # Rule 13: Consecutive horizontal rules (redundant separators)
-        # Check if this line is a horizontal rule and so was a recent previous line
-        if re.match(r'^---+$', stripped):
-            # Look back to find if there's another --- with only blank lines between
-            for j in range(i - 2, max(0, i - 6), -1):  # Check up to 5 lines back
-                prev_stripped = lines[j].rstrip()
-                if re.match(r'^---+$', prev_stripped):
-                    issues.append(LintIssue(
-                        line_num=i,
-                        rule='FORMAT007',
-                        message='Consecutive horizontal rule (redundant - merge with previous)',
-                        severity='warning',
-                        content=stripped
-                    ))
-                    break
-                elif prev_stripped:  # Non-empty line that isn't ---
-                    break  # Not consecutive, stop checking
-        
-        # Rule 14: Horizontal rule immediately before a header (redundant)
-        # Headers already have built-in visual separation in renderers
-        if re.match(r'^---+$', stripped):
-            # Look ahead to find if next non-blank line is a header
-            for j in range(i, min(len(lines), i + 4)):  # Check next 3 lines
-                next_stripped = lines[j].rstrip()
-                if next_stripped and not re.match(r'^---+$', next_stripped):
-                    if re.match(r'^#{1,6}\s+', next_stripped):
-                        issues.append(LintIssue(
-                            line_num=i,
-                            rule='FORMAT008',
-                            message='Horizontal rule before header (redundant - headers have built-in styling)',
-                            severity='warning',
-                            content=stripped
-                        ))
-                    break
+        before.append(line)
     
     return issues
 
 
+def lint_timed(file_path: str) -> Tuple[List[LintIssue], float]:
+    """lint_markdown() plus its wall time in seconds."""
+    start = time.perf_counter()
+    issues = lint_markdown(file_path)
+    return (issues, time.perf_counter() - start)
+
+
+def iter_lint(files: List[Path], jobs: int = 0) -> Iterable[Tuple[Path, List[LintIssue], float]]:
+    """
+    Lint many files in a process pool (jobs=0: one worker per CPU core),
+    yielding (path, issues, seconds) as results arrive.
+    
+    Files are submitted largest first so the biggest file never starts
+    last, and results come out in that order. Sequential runs (jobs=1)
+    keep the given order.
+    """
+    files = list(files)
+    jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+    if jobs == 1 or len(files) <= 1:
+        for f in files:
+            yield (f, *lint_timed(str(f)))
+        return
+    
+    by_size = sorted(files, key=lambda f: f.stat().st_size, reverse=True)
+    with ProcessPoolExecutor(max_workers=min(jobs, len(files))) as pool:
+        for f, (issues, seconds) in zip(by_size, pool.map(lint_timed, map(str, by_size))):
+            yield (f, issues, seconds)
+
+
+def lint_files(files: List[Path], jobs: int = 0,
+               timings: Dict[Path, float] = None) -> Dict[Path, List[LintIssue]]:
+    """
+    Lint many files (see iter_lint()); the returned dict is in the order
+    the files were given. Per-file seconds go into timings, if given.
+    """
+    files = list(files)
+    linted = {}
+    for f, issues, seconds in iter_lint(files, jobs=jobs):
+        linted[f] = issues
+        if timings is not None:
+            timings[f] = seconds
+    return {f: linted[f] for f in files}
+
+
+def lint_directory(*directories, jobs: int = 0) -> dict:
+    """
+    Lint every *.md file under the given directories in a process pool.
+    
+    Returns dict with aggregated counts for gating ('files', 'errors',
+    'warnings', 'info') and the per-file issue lists under 'issues'.
+    """
+    files = sorted(f for d in directories for f in Path(d).rglob('*.md'))
+    issues = lint_files(files, jobs=jobs)
+    
+    counts = {'error': 0, 'warning': 0, 'info': 0}
+    for file_issues in issues.values():
+        for issue in file_issues:
+            counts[issue.severity] += 1
+    
+    return {
+        'files': len(files),
+        'errors': counts['error'],
+        'warnings': counts['warning'],
+        'info': counts['info'],
+        'issues': issues,
+    }
+
+
+_linter_hash = None
+
+
+def linter_hash() -> str:
+    """Hash of this module's source; rule changes invalidate the lint cache."""
+    global _linter_hash
+    if _linter_hash is None:
+        _linter_hash = sha256_file(Path(__file__))
+    return _linter_hash
+
+
+def load_lint_cache(path: Path = None) -> dict:
+    """Load the lint cache. Missing, corrupt or stale (other linter) = empty."""
+    path = path or LINT_CACHE_FILE
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        data = None
+    if not isinstance(data, dict) or data.get('linter') != linter_hash():
+        return {'linter': linter_hash(), 'paths': {}, 'issues': {}}
+    return data
+
+
+def save_lint_cache(cache: dict, path: Path = None):
+    """Write the lint cache atomically, dropping entries no path refers to."""
+    path = path or LINT_CACHE_FILE
+    cache['paths'] = {p: e for p, e in cache['paths'].items() if Path(p).exists()}
+    live = {e['sha256'] for e in cache['paths'].values()}
+    cache['issues'] = {h: i for h, i in cache['issues'].items() if h in live}
+    
+    path.parent.mkdir(exist_ok=True)
+    write_atomic_bytes(path, (json.dumps(cache, sort_keys=True) + '\n').encode('utf-8'))
+
+
+def lint_cached(files: List[Path], cache: dict, jobs: int = 0,
+                timings: Dict[Path, float] = None) -> Tuple[Dict[Path, List[LintIssue]], int]:
+    """
+    Lint files, reusing cached issues for content that was linted before.
+    
+    A file whose size and mtime match its cache entry isn't even re-read;
+    otherwise it is hashed, and only content with no cached issues is
+    linted (in a process pool). The cache dict is updated in place, and
+    timings (if given) gets seconds for the files actually relinted.
+    
+    Returns tuple: (issues per file in the given order, number relinted)
+    """
+    paths, cached = cache['paths'], cache['issues']
+    digests = {}
+    for f in files:
+        st = f.stat()
+        key = str(f.resolve())
+        entry = paths.get(key)
+        if not (entry and entry['size'] == st.st_size and entry['mtime_ns'] == st.st_mtime_ns):
+            entry = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns,
+                     'sha256': sha256_file(f)}
+            paths[key] = entry
+        digests[f] = entry['sha256']
+    
+    stale = [f for f in files if digests[f] not in cached]
+    for f, issues in lint_files(stale, jobs=jobs, timings=timings).items():
+        cached[digests[f]] = [asdict(issue) for issue in issues]
+    
+    results = {f: [LintIssue(**issue) for issue in cached[digests[f]]] for f in files}
+    return (results, len(stale))
+
+
+def git_changed_files(revision_range: str, cwd: Path = None) -> List[Path]:
+    """
+    Markdown files added, copied, modified or renamed in a git range
+    (as given to `git diff --name-only`, e.g. 'origin/main...HEAD').
+    
+    Returns existing files as paths relative to cwd.
+    """
+    cwd = Path(cwd or '.').resolve()
+    top = subprocess.run(['git', 'rev-parse', '--show-toplevel'], cwd=cwd, check=True,
+                         capture_output=True, text=True).stdout.strip()
+    names = subprocess.run(['git', 'diff', '--name-only', '--diff-filter=ACMR',
+                            revision_range, '--', '*.md'],
+                           cwd=cwd, check=True, capture_output=True, text=True).stdout
+    files = []
+    for name in names.splitlines():
+        path = Path(top) / name
+        if path.exists():
+            files.append(Path(os.path.relpath(path, cwd)))
+    return files
+
+
+SARIF_LEVELS = {'error': 'error', 'warning': 'warning', 'info': 'note'}
+
+
+def summarize_results(results: Iterable[Tuple[Path, List[LintIssue], Optional[float]]],
+                      on_file: Callable = None) -> dict:
+    """
+    Fold (path, issues, seconds) results into counts per severity and per
+    rule. on_file, if given, is called with each result as it passes.
+    """
+    summary = {'files': 0, 'errors': 0, 'warnings': 0, 'info': 0, 'rules': {}}
+    plural = {'error': 'errors', 'warning': 'warnings', 'info': 'info'}
+    for path, issues, seconds in results:
+        summary['files'] += 1
+        for issue in issues:
+            summary[plural[issue.severity]] += 1
+            summary['rules'][issue.rule] = summary['rules'].get(issue.rule, 0) + 1
+        if on_file is not None:
+            on_file(path, issues, seconds)
+    summary['rules'] = dict(sorted(summary['rules'].items()))
+    return summary
+
+
+def write_jsonl(results: Iterable[Tuple[Path, List[LintIssue], Optional[float]]], out) -> dict:
+    """
+    Stream lint results as JSON Lines: one 'issue' record per issue and a
+    'file' record (issue count, duration) per file as each file finishes,
+    then a closing 'summary' record with per-severity and per-rule counts.
+    seconds=None marks a result that came from the lint cache.
+    
+    Returns the summary.
+    """
+    def emit(record):
+        out.write(json.dumps(record, ensure_ascii=False) + '\n')
+    
+    def on_file(path, issues, seconds):
+        for issue in issues:
+            emit({'type': 'issue', 'file': path.as_posix(), 'line': issue.line_num,
+                  'rule': issue.rule, 'severity': issue.severity,
+                  'message': issue.message, 'content': issue.content})
+        emit({'type': 'file', 'file': path.as_posix(), 'issues': len(issues),
+              'duration_ms': None if seconds is None else round(seconds * 1000, 3),
+              'cached': seconds is None})
+        out.flush()
+    
+    summary = summarize_results(results, on_file)
+    emit({'type': 'summary', **summary})
+    return summary
+
+
+def write_sarif(results: Iterable[Tuple[Path, List[LintIssue], Optional[float]]], out) -> dict:
+    """
+    Write lint results as a SARIF 2.1.0 log (one JSON document), with
+    per-rule counts and per-file timings in the run's properties.
+    
+    Returns the summary.
+    """
+    sarif_results = []
+    descriptors = {}
+    timings = {}
+    
+    def on_file(path, issues, seconds):
+        uri = path.as_posix()
+        timings[uri] = None if seconds is None else round(seconds * 1000, 3)
+        for issue in issues:
+            descriptors.setdefault(issue.rule, {
+                'id': issue.rule,
+                'shortDescription': {'text': issue.message},
+                'defaultConfiguration': {'level': SARIF_LEVELS[issue.severity]},
+            })
+            sarif_results.append({
+                'ruleId': issue.rule,
+                'level': SARIF_LEVELS[issue.severity],
+                'message': {'text': issue.message},
+                'locations': [{'physicalLocation': {
+                    'artifactLocation': {'uri': uri},
+                    'region': {'startLine': issue.line_num, 'snippet': {'text': issue.content}},
+                }}],
+            })
+    
+    summary = summarize_results(results, on_file)
+    json.dump({
+        '$schema': 'https://json.schemastore.org/sarif-2.1.0.json',
+        'version': '2.1.0',
+        'runs': [{
+            'tool': {'driver': {'name': 'md_linter', 'rules': sorted(descriptors.values(),
+                                                                      key=lambda d: d['id'])}},
+            'results': sarif_results,
+            'properties': {'summary': summary, 'fileTimingsMs': timings},
+        }],
+    }, out, indent=2, ensure_ascii=False)
+    out.write('\n')
+    return summary
+
+
 def print_report(file_path: str, issues: List[LintIssue], use_ascii: bool = False) -> int:
     """Print lint report and return exit code."""
     # Define icons with ASCII fallbacks for Windows terminals
@@ -269,28 +550,79 @@ def print_report(file_path: str, issues: List[LintIssue], use_ascii: bool = Fals
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python md_linter.py <file.md> [file2.md ...]")
-        print("       python md_linter.py --dir <directory>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(
+        description="Lint EUR-Lex converted Markdown for conversion artifacts.")
+    parser.add_argument('files', nargs='*', type=Path, help='Markdown files to lint')
+    parser.add_argument('--dir', nargs='*', type=Path, metavar='DIRECTORY',
+                        help='Lint every *.md under these directories (default: .)')
+    parser.add_argument('--changed', nargs='?', const='', metavar='RANGE',
+                        help='Incremental mode: reuse cached results for unchanged files. '
+                             'With a git range, lint only the Markdown it touched')
+    parser.add_argument('--jobs', '-j', type=int, default=0, metavar='N',
+                        help='Lint in N processes (0 = one per CPU core)')
+    parser.add_argument('--format', choices=('text', 'json', 'sarif'), default='text',
+                        help='text report, streaming JSON Lines, or SARIF 2.1.0 (default: text)')
+    parser.add_argument('--output', '-o', type=Path, metavar='FILE',
+                        help='Write json/sarif output to FILE instead of stdout')
+    args = parser.parse_args()
     
-    files = []
+    directories = args.dir if args.dir is None else (args.dir or [Path('.')])
+    if not args.files and directories is None:
+        if args.changed is None:
+            parser.print_usage()
+            sys.exit(1)
+        if not args.changed:
+            directories = [Path('.')]  # Bare --changed: whole tree, from cache
     
-    if sys.argv[1] == '--dir':
-        directory = Path(sys.argv[2]) if len(sys.argv) > 2 else Path('.')
-        files = list(directory.rglob('*.md'))
-    else:
-        files = [Path(f) for f in sys.argv[1:]]
+    files = list(args.files)
+    if directories is not None:
+        files += sorted(f for d in directories for f in d.rglob('*.md'))
+    
+    if args.changed:
+        changed = git_changed_files(args.changed)
+        if args.files or directories is not None:
+            # Only changed files within the requested files/directories
+            roots = [p.resolve() for p in args.files + (directories or [])]
+            changed = [f for f in changed
+                       if any(f.resolve() == r or r in f.resolve().parents for r in roots)]
+        files = changed
     
     exit_code = 0
     total_issues = 0
+    # Machine-readable output owns stdout; notes go to stderr
+    log = sys.stdout if args.format == 'text' else sys.stderr
     
-    for file_path in files:
-        if not file_path.exists():
-            print(f"[ERR] File not found: {file_path}")
-            continue
-        
-        issues = lint_markdown(str(file_path))
+    missing = [f for f in files if not f.exists()]
+    for file_path in missing:
+        print(f"[ERR] File not found: {file_path}", file=log)
+    
+    existing = [f for f in files if f.exists()]
+    if args.changed is None and args.format != 'text':
+        # Stream results straight from the pool as files finish
+        results = iter_lint(existing, jobs=args.jobs)
+    elif args.changed is None:
+        results = lint_files(existing, jobs=args.jobs)
+    else:
+        cache = load_lint_cache()
+        timings = {}
+        linted, relinted = lint_cached(existing, cache, jobs=args.jobs, timings=timings)
+        save_lint_cache(cache)
+        print(f"Incremental: {relinted} relinted, {len(existing) - relinted} from cache", file=log)
+        results = linted if args.format == 'text' else \
+            ((f, issues, timings.get(f)) for f, issues in linted.items())
+    
+    if args.format != 'text':
+        writer = write_jsonl if args.format == 'json' else write_sarif
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as out:
+                summary = writer(results, out)
+        else:
+            summary = writer(results, sys.stdout)
+        print(f"Total: {summary['files']} files checked, {summary['errors']} errors, "
+              f"{summary['warnings']} warnings, {summary['info']} info", file=log)
+        sys.exit(1 if summary['errors'] or missing else 0)
+    
+    for file_path, issues in results.items():
         total_issues += len(issues)
         
         if print_report(str(file_path), issues, use_ascii=True) != 0:
@@ -11,19 +11,40 @@ Usage:
     python pipeline.py --skip-download    # Use cached ZIP files
     python pipeline.py --force            # Force reconvert all
     python pipeline.py --validate-only    # Only run validation
+    python pipeline.py --jobs 4           # Process 4 documents in parallel
+    python pipeline.py --annex-jobs 4     # Convert one document's annexes in parallel
+    python pipeline.py --explain          # Show why each document is rebuilt
+    python pipeline.py --download-jobs 8  # Fetch up to 8 archives at once
+    python pipeline.py --backend lxml     # Parse Formex with lxml (A/B runs)
+    python pipeline.py --metrics out.jsonl  # Per-stage timings, one JSON record per line
+    python pipeline.py --profile 32024R1183 # cProfile one document's conversion
+
+--jobs, --annex-jobs and --download-jobs all take 0 for one worker per CPU core
+(the --annex-jobs default).
 
 The pipeline is fully deterministic - all configuration comes from documents.yaml.
 If a cellar_id is missing, the pipeline will fail with instructions to run
 the discovery utility.
+
+Builds are incremental: .cache/build-manifest.json records, per document, the
+SHA-256 of the Formex ZIP, the converter source and the documents.yaml entry.
+A document whose inputs and output are unchanged is skipped; --force rebuilds
+everything regardless of the manifest.
 """
 
 import argparse
+import contextlib
+import cProfile
 import hashlib
+import io
+import json
 import os
-import shutil
+import pstats
 import sys
-import urllib.request
+import time
 import zipfile
+from dataclasses import dataclass, field
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
 
@@ -33,13 +54,45 @@ import yaml
 SCRIPT_DIR = Path(__file__).parent
 sys.path.insert(0, str(SCRIPT_DIR))
 
+import formex_to_md_v3
+import http_cache
+import text_normalize
 from formex_to_md_v3 import convert_formex_to_md
+from http_cache import sha256_file, write_atomic_bytes
 
 # Configuration
 CONFIG_FILE = SCRIPT_DIR / "documents.yaml"
 CACHE_DIR = SCRIPT_DIR / ".cache"
+MANIFEST_FILE = CACHE_DIR / "build-manifest.json"
+PROFILE_DIR = CACHE_DIR / "profiles"
 BASE_DIR = SCRIPT_DIR.parent
 
+# Downloads
+CELLAR_URL = "http://publications.europa.eu/resource/cellar/{cellar_id}"
+DOWNLOAD_HEADERS = {
+    'Accept': 'application/zip',
+    'User-Agent': 'Mozilla/5.0 eIDAS-Pipeline/1.0'
+}
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+ZIP_MAGIC = b'PK'
+
+# Markdown trees linted by validate_documents(): errors in the trees the
+# pipeline writes fail the run; the third-party material is only reported
+VALIDATE_DIRS = ('01_regulation', '02_implementing_acts')
+ADVISORY_DIRS = ('03_arf', '04_technical_specs')
+
+# Annexes are only fanned out to the annex pool when their XML adds up to at
+# least this much; below it, inter-process overhead outweighs the gain
+ANNEX_POOL_MIN_BYTES = 128 * 1024
+
+# Source files whose content determines the generated Markdown. Any change
+# here invalidates every entry in the build manifest.
+CONVERTER_SOURCES = (
+    Path(formex_to_md_v3.__file__),
+    Path(text_normalize.__file__),
+    Path(__file__),
+)
+
 
 def load_config():
     """Load document configuration from YAML."""
@@ -52,63 +105,255 @@ def load_config():
         return yaml.safe_load(f)
 
 
-def download_formex(doc: dict, force: bool = False) -> Path:
+_converter_hash = None
+
+
+def converter_hash() -> str:
+    """Hash of all CONVERTER_SOURCES (computed once per process)."""
+    global _converter_hash
+    if _converter_hash is None:
+        digest = hashlib.sha256()
+        for source in CONVERTER_SOURCES:
+            digest.update(source.name.encode('utf-8'))
+            digest.update(source.read_bytes())
+        _converter_hash = digest.hexdigest()
+    return _converter_hash
+
+
+def load_manifest() -> dict:
+    """Load the build manifest (CELEX -> build key). Missing/corrupt = empty."""
+    try:
+        with open(MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data.get('documents', {}) if isinstance(data, dict) else {}
+
+
+def save_manifest(manifest: dict):
+    """Write the build manifest atomically (temp file + rename)."""
+    MANIFEST_FILE.parent.mkdir(exist_ok=True)
+    data = json.dumps({'version': 1, 'documents': manifest}, indent=2, sort_keys=True)
+    write_atomic_bytes(MANIFEST_FILE, (data + '\n').encode('utf-8'))
+
+
+def build_key(doc: dict, zip_path: Path) -> dict:
     """
-    Download Formex ZIP for a document.
+    Content-addressed key for one document build.
     
-    Returns path to the cached ZIP file.
+    Covers everything the output depends on: the Formex ZIP, the converter
+    source and the document's documents.yaml entry.
     """
-    celex = doc['celex']
-    cellar_id = doc.get('cellar_id')
-    
-    if not cellar_id:
-        print(f"   ❌ Missing cellar_id for {celex}")
-        print(f"      Run: python scripts/discover_cellar_ids.py --celex {celex}")
-        print(f"      Then update documents.yaml with the discovered ID")
-        raise ValueError(f"Missing cellar_id for {celex}")
+    config_json = json.dumps(doc, sort_keys=True, default=str)
+    return {
+        'zip_sha256': sha256_file(zip_path),
+        'converter_sha256': converter_hash(),
+        'config_sha256': hashlib.sha256(config_json.encode('utf-8')).hexdigest(),
+    }
+
+
+def rebuild_reason(entry: dict | None, key: dict, md_path: Path) -> str | None:
+    """
+    Compare a manifest entry against the current build key.
     
-    # Cache path
-    CACHE_DIR.mkdir(exist_ok=True)
-    cache_path = CACHE_DIR / f"{celex}.fmx4.zip"
+    Returns a human-readable reason to rebuild, or None if up to date.
+    """
+    if not entry:
+        return "not in build manifest"
+    if entry.get('zip_sha256') != key['zip_sha256']:
+        return "Formex ZIP changed"
+    if entry.get('converter_sha256') != key['converter_sha256']:
+        return "converter source changed"
+    if entry.get('config_sha256') != key['config_sha256']:
+        return "documents.yaml entry changed"
+    if not md_path.exists():
+        return "output missing"
+    if entry.get('output_sha256') != sha256_file(md_path):
+        return "output modified since last build"
+    return None
+
+
+@contextlib.contextmanager
+def timed_stage(metrics: list | None, celex: str, stage: str):
+    """
+    Time one pipeline stage and append its record to metrics (if given).
     
-    # Skip if cached (unless force)
-    if cache_path.exists() and not force:
-        print(f"   📦 Using cached: {cache_path.name}")
-        return cache_path
+    Yields the record so the stage can fill in bytes_in, bytes_out,
+    xml_elements and cache_hit. The record is kept even when the stage
+    raises, with ok=False, so a failing stage still shows its cost.
+    """
+    record = {'celex': celex, 'stage': stage, 'duration_ms': 0.0,
+              'bytes_in': 0, 'bytes_out': 0, 'xml_elements': None,
+              'cache_hit': False, 'ok': False}
+    start = time.perf_counter()
+    try:
+        yield record
+        record['ok'] = True
+    finally:
+        record['duration_ms'] = round((time.perf_counter() - start) * 1000, 3)
+        if metrics is not None:
+            metrics.append(record)
+
+
+def write_metrics(path: Path, metrics: list):
+    """Write stage records as JSON Lines, one record per line."""
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in metrics:
+            f.write(json.dumps(record, sort_keys=True) + '\n')
+
+
+def if_range_validator(headers) -> str | None:
+    """The response's strong ETag, else its Last-Modified date, for If-Range."""
+    etag = headers.get('ETag')
+    if etag and not etag.startswith('W/'):  # If-Range needs a strong validator
+        return etag
+    return headers.get('Last-Modified')
+
+
+def fetch_archive(url: str, cache_path: Path) -> int:
+    """
+    Stream a ZIP archive to <cache_path>.part and atomically rename it.
     
-    # Download from cellar
-    cellar_url = f"http://publications.europa.eu/resource/cellar/{cellar_id}"
-    print(f"   ⬇️  Downloading from: {cellar_url}")
+    An existing .part file from an interrupted run is resumed with a
+    Range request, guarded by If-Range with the ETag (or Last-Modified)
+    recorded in <cache_path>.part.json when it was started. If the archive
+    changed upstream, the server sends it whole and the download restarts
+    from zero; a .part without a recorded validator is never resumed. The
+    result must start with the ZIP magic and be a complete archive before
+    it replaces cache_path.
     
-    req = urllib.request.Request(cellar_url, headers={
-        'Accept': 'application/zip',
-        'User-Agent': 'Mozilla/5.0 eIDAS-Pipeline/1.0'
-    })
+    Returns the size of the downloaded archive in bytes.
+    """
+    part_path = cache_path.with_name(cache_path.name + '.part')
+    validator_path = cache_path.with_name(cache_path.name + '.part.json')
+    try:
+        validator = json.loads(validator_path.read_text(encoding='utf-8'))['if_range']
+    except (OSError, ValueError, KeyError):
+        validator = None
+    offset = part_path.stat().st_size if part_path.exists() and validator else 0
+    headers = dict(DOWNLOAD_HEADERS)
+    if offset:
+        headers.update({'Range': f'bytes={offset}-', 'If-Range': validator})
+    
+    def discard_part():
+        part_path.unlink(missing_ok=True)
+        validator_path.unlink(missing_ok=True)
+    
+    with http_cache.http_session().get(url, headers=headers, stream=True,
+                                       timeout=120) as response:
+        # 416: the .part file already holds the whole archive
+        if response.status_code != 416:
+            response.raise_for_status()
+            # 206 continues the partial file; 200 means the server ignored Range
+            # or the archive changed since the .part was started
+            if response.status_code == 206:
+                mode = 'ab'
+            else:
+                mode = 'wb'
+                validator_path.unlink(missing_ok=True)
+                validator = if_range_validator(response.headers)
+                if validator:
+                    http_cache.write_atomic_bytes(
+                        validator_path, json.dumps({'if_range': validator}).encode('utf-8'))
+            with open(part_path, mode) as f:
+                for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+        elif not zipfile.is_zipfile(part_path):
+            discard_part()  # Nothing left to resume: start over next time
+            raise ValueError("Server has no more bytes for an incomplete ZIP, will restart")
+    
+    # Validate it's a ZIP
+    with open(part_path, 'rb') as f:
+        magic = f.read(len(ZIP_MAGIC))
+    if magic != ZIP_MAGIC:
+        discard_part()  # Not resumable - start over next time
+        raise ValueError(f"Expected ZIP, got: {magic!r}")
+    if not zipfile.is_zipfile(part_path):
+        # Keep the .part file so the next run resumes where this one stopped
+        raise ValueError(f"Incomplete ZIP ({part_path.stat().st_size:,} bytes), will resume")
+    
+    os.replace(part_path, cache_path)
+    validator_path.unlink(missing_ok=True)
+    return cache_path.stat().st_size
+
+
+def timed_fetch(celex: str, url: str, cache_path: Path) -> tuple:
+    """
+    Run fetch_archive() inside a 'download' stage.
     
+    Returns tuple: (record, error) - error is the exception raised by the
+    download, or None, so failed downloads still report their duration.
+    """
+    records = []
     try:
-        with urllib.request.urlopen(req, timeout=120) as response:
-            data = response.read()
-            
-            # Validate it's a ZIP
-            if not data.startswith(b'PK'):
-                raise ValueError(f"Expected ZIP, got: {data[:20]}")
-            
-            with open(cache_path, 'wb') as f:
-                f.write(data)
-            
-            print(f"   ✅ Downloaded: {len(data):,} bytes")
-            return cache_path
-            
+        with timed_stage(records, celex, 'download') as record:
+            record['bytes_out'] = fetch_archive(url, cache_path)
     except Exception as e:
-        print(f"   ❌ Download failed: {e}")
-        raise
+        return (records[0], e)
+    return (records[0], None)
 
 
-def extract_formex(zip_path: Path, output_dir: Path) -> tuple:
+def prefetch_formex(documents: list, force: bool = False, jobs: int = 4,
+                    metrics: list | None = None) -> set:
+    """
+    Download all missing Formex archives concurrently (at most `jobs` at once).
+    
+    Documents without a cellar_id or with skip_pipeline are left for
+    process_document() to report. If a metrics list is given, a 'download'
+    record is appended per document (cache_hit=True when already cached).
+    
+    Returns the set of CELEX numbers whose download failed. With force, a
+    failed re-download leaves the previous archive in place, so callers
+    must not convert those documents from the cache.
+    """
+    pending = []
+    for doc in documents:
+        if 'celex' not in doc or doc.get('skip_pipeline') or not doc.get('cellar_id'):
+            continue
+        cache_path = CACHE_DIR / f"{doc['celex']}.fmx4.zip"
+        if force or not cache_path.exists():
+            pending.append((doc, cache_path))
+        elif metrics is not None:
+            with timed_stage(metrics, doc['celex'], 'download') as record:
+                record['cache_hit'] = True
+                record['bytes_out'] = cache_path.stat().st_size
+    
+    if not pending:
+        return set()
+    
+    CACHE_DIR.mkdir(exist_ok=True)
+    print(f"\n⬇️  Downloading {len(pending)} archive(s) ({jobs} concurrent)")
+    
+    failed = set()
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {
+            pool.submit(timed_fetch, doc['celex'],
+                        CELLAR_URL.format(cellar_id=doc['cellar_id']),
+                        cache_path): doc['celex']
+            for doc, cache_path in pending
+        }
+        for future in as_completed(futures):
+            celex = futures[future]
+            record, error = future.result()
+            if error is None:
+                print(f"   ✅ {celex}: {record['bytes_out']:,} bytes")
+            else:
+                print(f"   ❌ {celex}: {error}")
+                failed.add(celex)
+            if metrics is not None:
+                metrics.append(record)
+    
+    return failed
+
+
+def extract_formex(zf: zipfile.ZipFile) -> tuple:
     """
-    Extract Formex XML from ZIP.
+    Classify the Formex XML members of an open ZIP archive.
+    
+    Works from ZipFile.infolist() names and sizes only - nothing is written
+    to disk. Members are later parsed straight from zf.open() streams.
     
-    Returns tuple: (main_xml_path, list_of_annex_xml_paths)
+    Returns tuple: (main_member_name, list_of_annex_member_names)
     
     Formex archives contain multiple XML files:
     - .000101.fmx.xml — Main regulation/act document
@@ -117,28 +362,18 @@ def extract_formex(zip_path: Path, output_dir: Path) -> tuple:
     - .toc.fmx.xml — Table of contents (skip)
     - .0001.xml — Alternative main pattern (consolidated docs)
     """
-    xml_dir = output_dir / "formex"
+    members = zf.infolist()
+    print(f"   📂 Archive: {len(members)} files")
     
-    # Clean existing
-    if xml_dir.exists():
-        shutil.rmtree(xml_dir)
-    xml_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Extract
-    with zipfile.ZipFile(zip_path, 'r') as zf:
-        zf.extractall(xml_dir)
-        files = zf.namelist()
-    
-    print(f"   📂 Extracted: {len(files)} files")
-    
-    # Collect all XML files, categorized
-    xml_files = [f for f in xml_dir.iterdir() if f.suffix == '.xml']
+    # Collect all XML members, categorized
+    xml_members = [m for m in members
+                   if not m.is_dir() and m.filename.endswith('.xml')]
     
     main_xml = None
     annex_xmls = []
     
-    for f in xml_files:
-        name = f.name
+    for m in xml_members:
+        name = m.filename
         
         # Skip metadata and TOC files
         if '.doc.' in name or '.toc.' in name:
@@ -148,61 +383,111 @@ def extract_formex(zip_path: Path, output_dir: Path) -> tuple:
         # - L_XXXXXXX.000101.fmx.xml (standard Formex)
         # - CLXXXXXXX.0001.xml (consolidated docs)
         if '.000101.' in name or name.endswith('.0001.xml'):
-            main_xml = f
+            main_xml = name
         else:
             # All other content XML files are annexes/supplements
             # They have patterns like .000301., .000701., .001001., etc.
-            annex_xmls.append(f)
+            annex_xmls.append(name)
     
     # Fallback: if no main found via pattern, pick the largest non-metadata file
     if main_xml is None:
-        content_files = [f for f in xml_files 
-                         if '.doc.' not in f.name and '.toc.' not in f.name]
-        if content_files:
-            content_files.sort(key=lambda f: f.stat().st_size, reverse=True)
-            main_xml = content_files[0]
+        content_members = [m for m in xml_members
+                           if '.doc.' not in m.filename and '.toc.' not in m.filename]
+        if content_members:
+            content_members.sort(key=lambda m: m.file_size, reverse=True)
+            main_xml = content_members[0].filename
             # Remove from annexes if it was added there
-            annex_xmls = [f for f in annex_xmls if f != main_xml]
+            annex_xmls = [name for name in annex_xmls if name != main_xml]
     
     if main_xml is None:
-        raise ValueError(f"No XML file found in: {zip_path}")
+        raise ValueError(f"No XML file found in: {zf.filename}")
     
     # Sort annexes by filename to ensure consistent ordering
     # (e.g., .000301. before .000701. before .001001.)
-    annex_xmls.sort(key=lambda f: f.name)
+    annex_xmls.sort()
     
-    print(f"   📄 Main XML: {main_xml.name}")
+    print(f"   📄 Main XML: {main_xml}")
     if annex_xmls:
         print(f"   📎 Annexes: {len(annex_xmls)} supplementary file(s)")
-        for a in annex_xmls:
-            print(f"      - {a.name}")
+        for name in annex_xmls:
+            print(f"      - {name}")
     
     return (main_xml, annex_xmls)
 
 
-def convert_to_markdown(xml_path: Path, output_path: Path) -> int:
+def convert_member(zf: zipfile.ZipFile, member: str, backend: str | None = None,
+                   stats: dict | None = None) -> str:
     """
-    Convert Formex XML to Markdown using the v3 converter.
+    Convert one Formex XML member, parsed directly from the ZIP stream.
     
-    Returns size of generated file in bytes.
+    If a stats dict is given, the converter stores the member's XML
+    element count in it (see convert_formex_to_md()).
     """
-    md_content = convert_formex_to_md(str(xml_path), str(output_path))
-    size = len(md_content) if md_content else output_path.stat().st_size
-    print(f"   📝 Converted: {output_path.name} ({size:,} bytes)")
-    return size
+    with zf.open(member) as stream:
+        return convert_formex_to_md(stream, None, backend=backend, stats=stats)
 
 
-def add_metadata_header(md_path: Path, doc: dict):
-    """Add standardized metadata header to the Markdown file."""
-    with open(md_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+def convert_archive_member(zip_path: Path, member: str, backend: str | None = None) -> tuple:
+    """
+    Annex pool worker: convert one member of the archive at zip_path.
     
-    # Check if header already exists
-    if content.startswith('> **CELEX:**'):
-        return  # Already has header
+    Open ZipFile handles can't cross process boundaries, so each worker
+    reopens the archive itself.
+    
+    Returns tuple: (markdown, xml_element_count)
+    """
+    stats = {}
+    with zipfile.ZipFile(zip_path, 'r') as zf:
+        content = convert_member(zf, member, backend=backend, stats=stats)
+    return (content, stats['xml_elements'])
+
+
+def convert_annexes(zf: zipfile.ZipFile, annex_xmls: list, backend: str | None = None,
+                    pool: Executor | None = None) -> list:
+    """
+    Convert annex members, in the pool if given and worthwhile.
+    
+    Results come back in annex_xmls order (filename-sorted by
+    extract_formex()) however the workers finish.
+    
+    Returns list of (markdown, xml_element_count) tuples.
+    """
+    annex_bytes = sum(zf.getinfo(name).file_size for name in annex_xmls)
+    if pool is None or len(annex_xmls) < 2 or annex_bytes < ANNEX_POOL_MIN_BYTES:
+        results = []
+        for annex_xml in annex_xmls:
+            stats = {}
+            content = convert_member(zf, annex_xml, backend=backend, stats=stats)
+            results.append((content, stats['xml_elements']))
+        return results
+    
+    zip_path = Path(zf.filename)
+    futures = [pool.submit(convert_archive_member, zip_path, annex_xml, backend)
+               for annex_xml in annex_xmls]
+    return [future.result() for future in futures]
+
+
+@dataclass
+class MarkdownDocument:
+    """
+    In-memory model of one generated Markdown file.
+    
+    The pipeline stages fill in body, annexes and header, validate the
+    result and write it once with write_atomic() - the file on disk is
+    never left half-built or without its header.
+    """
+    body: str
+    annexes: list = field(default_factory=list)
+    header: str = ''
     
+    def render(self) -> str:
+        """Header, main body and annexes (each after a blank-line separator)."""
+        return self.header + self.body + ''.join('\n\n' + annex for annex in self.annexes)
+
+
+def metadata_header(doc: dict) -> str:
+    """Standardized metadata header blockquote for a document."""
     celex = doc['celex']
-    title = doc.get('title', 'Unknown')
     doc_type = doc.get('type', 'regulation')
     source = doc.get('source', 'formex')  # Default to formex for pipeline-processed docs
     
@@ -213,19 +498,24 @@ def add_metadata_header(md_path: Path, doc: dict):
         'manual': 'Manual'
     }.get(source, source.title())
     
-    header = f"""> **CELEX:** {celex} | **Type:** {doc_type.replace('_', ' ').title()}
+    return f"""> **CELEX:** {celex} | **Type:** {doc_type.replace('_', ' ').title()}
 > **Source:** [EUR-Lex](https://eur-lex.europa.eu/legal-content/EN/TXT/?uri=CELEX:{celex})
 > **Converted:** {datetime.now().strftime('%Y-%m-%d')} via {source_display} Pipeline v1.0
 
 """
+
+
+def add_metadata_header(md_doc: MarkdownDocument, doc: dict):
+    """Add the standardized metadata header to the document model."""
+    # Check if header already exists
+    if md_doc.body.startswith('> **CELEX:**'):
+        return  # Already has header
     
-    with open(md_path, 'w', encoding='utf-8') as f:
-        f.write(header + content)
-    
-    print(f"   📋 Added metadata header (source: {source})")
+    md_doc.header = metadata_header(doc)
+    print(f"   📋 Added metadata header (source: {doc.get('source', 'formex')})")
 
 
-def validate_annex_extraction(md_path: Path, annex_xmls: list) -> tuple:
+def validate_annex_extraction(content: str, annex_xmls: list) -> tuple:
     """
     Validate that annexes were properly extracted.
     
@@ -237,9 +527,6 @@ def validate_annex_extraction(md_path: Path, annex_xmls: list) -> tuple:
     if not annex_xmls:
         return (True, None)  # No annexes to validate
     
-    # Read the output markdown
-    content = md_path.read_text(encoding='utf-8')
-    
     # Count annex headings in output (## Annex, ## ANNEX, ## Annex I, etc.)
     import re
     annex_headings = re.findall(r'^## (?:Annex|ANNEX)', content, re.MULTILINE)
@@ -250,22 +537,46 @@ def validate_annex_extraction(md_path: Path, annex_xmls: list) -> tuple:
     if annex_count_in_output == 0:
         return (False, 
             f"Found {len(annex_xmls)} annex XML file(s) but output has 0 '## Annex' headings. "
-            f"Annex files: {[f.name for f in annex_xmls]}")
+            f"Annex files: {annex_xmls}")
     
     return (True, None)
 
 
-def cleanup_temp_files(output_dir: Path):
-    """Remove temporary extraction directory."""
-    xml_dir = output_dir / "formex"
-    if xml_dir.exists():
-        shutil.rmtree(xml_dir)
+def write_atomic(path: Path, content: str) -> int:
+    """
+    Write text to path via a temp file + rename, so readers (and a crash)
+    only ever see the old file or the complete new one.
+    
+    Returns size of the written file in bytes.
+    """
+    data = content.encode('utf-8')
+    write_atomic_bytes(path, data)
+    return len(data)
 
 
-def process_document(doc: dict, skip_download: bool = False, force: bool = False) -> bool:
+def process_document(doc: dict, force: bool = False,
+                     manifest: dict | None = None, explain: bool = False,
+                     backend: str | None = None, metrics: list | None = None,
+                     profile_path: Path | None = None,
+                     annex_pool: Executor | None = None) -> bool:
     """
     Process a single document through the pipeline.
     
+    If a build manifest dict is given, the document is skipped when its
+    build key matches the recorded one (unless force), and the manifest
+    entry is updated in place after a successful build.
+    
+    backend selects the converter's XML parser (None = converter default).
+    Both backends produce identical Markdown, so it isn't part of the build key.
+    
+    If a metrics list is given, one record per stage is appended to it (see
+    timed_stage()). If profile_path is given, the document is always rebuilt
+    and the extract/convert/annex steps run under cProfile, with the stats
+    dumped to that file.
+    
+    If annex_pool is given, large sets of annexes are converted in it
+    concurrently (see convert_annexes()).
+    
     Returns True if successful, False otherwise.
     """
     celex = doc['celex']
@@ -283,63 +594,207 @@ def process_document(doc: dict, skip_download: bool = False, force: bool = False
         return True  # Not a failure, just skipped
     
     try:
-        # Step 1: Download (or use cache)
-        if skip_download:
-            cache_path = CACHE_DIR / f"{celex}.fmx4.zip"
-            if not cache_path.exists():
-                print(f"   ❌ Cache miss: {cache_path}")
-                return False
-            print(f"   📦 Using cached: {cache_path.name}")
-        else:
-            cache_path = download_formex(doc, force=force)
-        
-        # Step 2: Extract (now returns main + annex paths)
-        output_dir.mkdir(parents=True, exist_ok=True)
-        main_xml, annex_xmls = extract_formex(cache_path, output_dir)
+        # Step 1: Cached archive (downloaded up front by prefetch_formex())
+        cache_path = CACHE_DIR / f"{celex}.fmx4.zip"
+        if not cache_path.exists():
+            print(f"   ❌ Cache miss: {cache_path}")
+            if not doc.get('cellar_id'):
+                print(f"      Run: python scripts/discover_cellar_ids.py --celex {celex}")
+            return False
+        print(f"   📦 Using cached: {cache_path.name}")
         
-        # Step 3: Convert main document
+        # Step 1b: Incremental build check against the manifest
         md_path = output_dir / f"{celex}.md"
-        convert_to_markdown(main_xml, md_path)
+        key = None
+        if manifest is not None:
+            with timed_stage(metrics, celex, 'manifest') as record:
+                key = build_key(doc, cache_path)
+                if profile_path is not None:
+                    reason = "--profile"
+                elif force:
+                    reason = "--force"
+                else:
+                    reason = rebuild_reason(manifest.get(celex), key, md_path)
+                record['bytes_in'] = cache_path.stat().st_size
+                record['cache_hit'] = reason is None
+            if reason is None:
+                print(f"   ⏭️  Up to date (build manifest)")
+                return True
+            if explain:
+                print(f"   🔎 Rebuilding: {reason}")
+        
+        profiler = cProfile.Profile() if profile_path is not None else None
+        if profiler is not None:
+            profiler.enable()
         
-        # Step 3b: Convert and append annexes (if any)
-        if annex_xmls:
-            annex_count = 0
-            for annex_xml in annex_xmls:
-                # Convert annex to temporary content (not file)
-                annex_content = convert_formex_to_md(str(annex_xml), None)
-                if annex_content and annex_content.strip():
-                    # Append to main markdown file
-                    with open(md_path, 'a', encoding='utf-8') as f:
-                        f.write('\n\n')  # Separator
-                        f.write(annex_content)
-                    annex_count += 1
-            
-            if annex_count > 0:
-                print(f"   📎 Appended {annex_count} annex(es) to output")
+        # Step 2: Classify archive members (nothing is extracted to disk)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            with zipfile.ZipFile(cache_path, 'r') as zf:
+                with timed_stage(metrics, celex, 'extract') as record:
+                    main_xml, annex_xmls = extract_formex(zf)
+                    record['bytes_in'] = cache_path.stat().st_size
+                    record['bytes_out'] = sum(zf.getinfo(name).file_size
+                                              for name in [main_xml] + annex_xmls)
+                
+                # Step 3: Convert main document (held in memory until the final write)
+                with timed_stage(metrics, celex, 'convert') as record:
+                    stats = {}
+                    md_doc = MarkdownDocument(convert_member(zf, main_xml, backend=backend,
+                                                             stats=stats))
+                    record['bytes_in'] = zf.getinfo(main_xml).file_size
+                    record['bytes_out'] = len(md_doc.body)
+                    record['xml_elements'] = stats['xml_elements']
+                print(f"   📝 Converted: {md_path.name} ({len(md_doc.body):,} bytes)")
+                
+                # Step 3b: Convert annexes (if any) into the document model
+                if annex_xmls:
+                    with timed_stage(metrics, celex, 'annexes') as record:
+                        record['bytes_in'] = sum(zf.getinfo(name).file_size for name in annex_xmls)
+                        record['xml_elements'] = 0
+                        for annex_content, elements in convert_annexes(zf, annex_xmls,
+                                                                       backend=backend,
+                                                                       pool=annex_pool):
+                            record['xml_elements'] += elements
+                            if annex_content and annex_content.strip():
+                                md_doc.annexes.append(annex_content)
+                                record['bytes_out'] += len(annex_content)
+                    
+                    if md_doc.annexes:
+                        print(f"   📎 Appended {len(md_doc.annexes)} annex(es) to output")
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                profile_path.parent.mkdir(parents=True, exist_ok=True)
+                profiler.dump_stats(profile_path)
+                print(f"   🔬 Profile: {profile_path}")
+                pstats.Stats(profiler, stream=sys.stdout).sort_stats('cumulative').print_stats(15)
+        
+        # Step 4: Enrich (add metadata)
+        with timed_stage(metrics, celex, 'header') as record:
+            record['bytes_in'] = len(md_doc.render())
+            add_metadata_header(md_doc, doc)
+            content = md_doc.render()
+            record['bytes_out'] = len(content)
         
-        # Step 3c: Validate annex extraction (prevent regression)
-        is_valid, error_msg = validate_annex_extraction(md_path, annex_xmls)
+        # Step 4b: Validate annex extraction (prevent regression) before anything is written
+        is_valid, error_msg = validate_annex_extraction(content, annex_xmls)
         if not is_valid:
             raise ValueError(f"Annex validation failed: {error_msg}")
         
-        # Step 4: Enrich (add metadata)
-        add_metadata_header(md_path, doc)
+        # Step 5: Single atomic write of the assembled document
+        with timed_stage(metrics, celex, 'write') as record:
+            record['bytes_in'] = len(content)
+            record['bytes_out'] = write_atomic(md_path, content)
         
-        # Cleanup
-        cleanup_temp_files(output_dir)
+        if manifest is not None:
+            manifest[celex] = {
+                **key,
+                'output_sha256': sha256_file(md_path),
+                'built': datetime.now().isoformat(timespec='seconds'),
+            }
         
         print(f"   ✅ SUCCESS")
         return True
-
+    
         
     except Exception as e:
         print(f"   ❌ FAILED: {e}")
         return False
 
 
-
-def validate_documents():
-    """Run validation on all Markdown files."""
+def process_document_buffered(doc: dict, force: bool = False,
+                              manifest_entry: dict | None = None, use_manifest: bool = False,
+                              explain: bool = False, backend: str | None = None,
+                              profile_path: Path | None = None) -> tuple:
+    """
+    Worker entry point for --jobs: run process_document() with stdout captured.
+    
+    Workers can't share the parent's manifest dict, so each receives only
+    its own entry and hands back the updated one. Stage metrics are
+    collected the same way.
+    
+    Returns tuple: (success, log_text, manifest_entry, metrics) so the parent
+    can print each document's log in config order instead of interleaving workers.
+    """
+    manifest = None
+    if use_manifest:
+        manifest = {doc['celex']: manifest_entry} if manifest_entry else {}
+    metrics = []
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer):
+        try:
+            success = process_document(doc, force=force,
+                                       manifest=manifest, explain=explain, backend=backend,
+                                       metrics=metrics, profile_path=profile_path)
+        except Exception as e:
+            print(f"   ❌ FAILED: {e}")
+            success = False
+    entry = manifest.get(doc['celex']) if manifest else None
+    return (success, buffer.getvalue(), entry, metrics)
+
+
+def run_documents(documents: list, force: bool = False,
+                  jobs: int = 1, manifest: dict | None = None, explain: bool = False,
+                  backend: str | None = None, metrics: list | None = None,
+                  profile: str | None = None, annex_jobs: int = 1):
+    """
+    Process documents sequentially or in a process pool.
+    
+    Yields one success flag per document, in config order. Successful
+    builds are recorded in the manifest dict, if one is given, and stage
+    records are appended to metrics, if given. The document whose CELEX
+    equals profile is profiled into PROFILE_DIR/<celex>.prof.
+    
+    When documents run sequentially, annex_jobs > 1 converts each
+    document's annexes in a shared process pool. With jobs > 1 the
+    documents themselves already keep the cores busy, so annexes are
+    converted inside each document's worker.
+    """
+    def profile_path(doc):
+        return PROFILE_DIR / f"{doc['celex']}.prof" if doc['celex'] == profile else None
+    
+    if jobs == 1 or len(documents) <= 1:
+        # Workers start on first use, so documents without big annexes pay nothing
+        with contextlib.ExitStack() as stack:
+            annex_pool = None
+            if annex_jobs > 1:
+                annex_pool = stack.enter_context(ProcessPoolExecutor(max_workers=annex_jobs))
+            for doc in documents:
+                yield process_document(doc, force=force,
+                                       manifest=manifest, explain=explain, backend=backend,
+                                       metrics=metrics, profile_path=profile_path(doc),
+                                       annex_pool=annex_pool)
+        return
+    
+    use_manifest = manifest is not None
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [
+            pool.submit(process_document_buffered, doc, force,
+                        manifest.get(doc['celex']) if use_manifest else None,
+                        use_manifest, explain, backend, profile_path(doc))
+            for doc in documents
+        ]
+        # Collect in submission order so logs come out in config order
+        for doc, future in zip(documents, futures):
+            success, log_text, entry, doc_metrics = future.result()
+            print(log_text, end='')
+            if use_manifest and entry:
+                manifest[doc['celex']] = entry
+            if metrics is not None:
+                metrics.extend(doc_metrics)
+            yield success
+
+
+def validate_documents(jobs: int = 0) -> int:
+    """
+    Lint all Markdown trees (VALIDATE_DIRS and ADVISORY_DIRS) in one
+    md_linter process pool.
+    
+    Returns the number of lint errors in VALIDATE_DIRS. Errors in
+    ADVISORY_DIRS, which the pipeline doesn't generate, are reported as
+    warnings; warnings are reported, not counted.
+    """
     print("\n" + "="*60)
     print("🔍 Running validation (md_linter.py)")
     print("="*60)
@@ -347,21 +802,35 @@ def validate_documents():
     # Import md_linter if available
     try:
         from md_linter import lint_directory
-        
-        errors = 0
-        for dir_name in ['01_regulation', '02_implementing_acts']:
-            dir_path = BASE_DIR / dir_name
-            if dir_path.exists():
-                result = lint_directory(dir_path)
-                errors += result.get('errors', 0)
-        
-        if errors == 0:
-            print("✅ All documents passed validation")
-        else:
-            print(f"⚠️  Found {errors} validation errors")
-            
     except ImportError:
         print("⚠️  md_linter.py not available, skipping validation")
+        return 0
+    
+    dirs = [BASE_DIR / name for name in VALIDATE_DIRS + ADVISORY_DIRS
+            if (BASE_DIR / name).exists()]
+    result = lint_directory(*dirs, jobs=jobs)
+    
+    gated = []
+    advisory = []
+    for path, issues in result['issues'].items():
+        relative = path.relative_to(BASE_DIR)
+        target = gated if relative.parts[0] in VALIDATE_DIRS else advisory
+        target.extend((relative, issue) for issue in issues if issue.severity == 'error')
+    errors = len(gated)
+    warnings = result['warnings'] + len(advisory)
+    
+    if errors == 0:
+        print(f"✅ All {result['files']} documents passed validation "
+              f"({warnings} warnings)")
+    else:
+        print(f"⚠️  Found {errors} validation errors, {warnings} warnings "
+              f"in {result['files']} documents")
+    for relative, issue in gated:
+        print(f"   ❌ {relative}:{issue.line_num} [{issue.rule}] {issue.message}")
+    for relative, issue in advisory:
+        print(f"   ⚠️  {relative}:{issue.line_num} [{issue.rule}] {issue.message} "
+              f"(not generated by the pipeline)")
+    return errors
 
 
 def main():
@@ -375,19 +844,50 @@ Examples:
   python pipeline.py --skip-download    # Use cached ZIP files
   python pipeline.py --force            # Force reconvert all
   python pipeline.py --validate-only    # Only run validation
+  python pipeline.py --jobs 0           # One worker per CPU core
+  python pipeline.py --annex-jobs 4     # Convert one document's annexes in parallel
+  python pipeline.py --download-jobs 8  # Fetch up to 8 archives at once
+  python pipeline.py --explain          # Show why each document is rebuilt
+  python pipeline.py --backend lxml     # Parse Formex with lxml (A/B runs)
+  python pipeline.py --metrics out.jsonl  # Per-stage timings, one JSON record per line
+  python pipeline.py --profile 32024R1183 # cProfile one document's conversion
+
+--jobs, --annex-jobs and --download-jobs all take 0 for one worker per CPU core
+(the --annex-jobs default).
 """
     )
     parser.add_argument('--only', help='Process only this CELEX number')
     parser.add_argument('--skip-download', action='store_true',
                         help='Use cached downloads only')
     parser.add_argument('--force', action='store_true',
-                        help='Force re-download and reconvert')
+                        help='Force re-download and reconvert (ignores build manifest)')
+    parser.add_argument('--explain', action='store_true',
+                        help='Print why each document is rebuilt')
     parser.add_argument('--validate-only', action='store_true',
                         help='Only run validation, no conversion')
     parser.add_argument('--no-validate', action='store_true',
                         help='Skip validation step')
+    parser.add_argument('--jobs', '-j', type=int, default=1, metavar='N',
+                        help='Process N documents in parallel (0 = one per CPU core)')
+    parser.add_argument('--annex-jobs', type=int, default=0, metavar='N',
+                        help='Convert one document\'s annexes in N processes when '
+                             '--jobs is 1 (0 = one per CPU core)')
+    parser.add_argument('--download-jobs', type=int, default=4, metavar='N',
+                        help='Maximum concurrent archive downloads '
+                             '(default: 4; 0 = one per CPU core)')
+    parser.add_argument('--backend', choices=formex_to_md_v3.BACKENDS,
+                        default=formex_to_md_v3.DEFAULT_BACKEND,
+                        help='XML parser for the Formex converter '
+                             f'(default: {formex_to_md_v3.DEFAULT_BACKEND})')
+    parser.add_argument('--metrics', type=Path, metavar='FILE',
+                        help='Write per-document, per-stage metrics as JSON Lines')
+    parser.add_argument('--profile', metavar='CELEX',
+                        help=f'Rebuild this document under cProfile (stats in {PROFILE_DIR.name}/)')
     
     args = parser.parse_args()
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    annex_jobs = args.annex_jobs if args.annex_jobs > 0 else (os.cpu_count() or 1)
+    download_jobs = args.download_jobs if args.download_jobs > 0 else (os.cpu_count() or 1)
     
     # Load configuration
     config = load_config()
@@ -398,12 +898,13 @@ Examples:
     print(f"   Date: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
     print(f"   Documents: {len(documents)}")
     print(f"   Config: {CONFIG_FILE}")
+    print(f"   Jobs: {jobs}" + (f" (annexes: {annex_jobs})" if jobs == 1 else ""))
+    print(f"   Backend: {args.backend}")
     print("="*60)
     
     # Validate only mode
     if args.validate_only:
-        validate_documents()
-        return 0
+        return 0 if validate_documents() == 0 else 1
     
     # Filter documents if --only specified
     if args.only:
@@ -411,19 +912,46 @@ Examples:
         if not documents:
             print(f"❌ Document not found: {args.only}")
             return 1
+    if args.profile and not any(d.get('celex') == args.profile for d in documents):
+        print(f"❌ Document to profile not found: {args.profile}")
+        return 1
     
     # Process documents
     success = 0
     failed = 0
-    
-    for doc in documents:
-        if process_document(doc, 
-                           skip_download=args.skip_download,
-                           force=args.force):
+    manifest = load_manifest()
+    metrics = [] if args.metrics else None
+    
+    # Download stage: fetch every missing archive up front, concurrently.
+    # A document whose download failed is not converted: with --force its
+    # cache still holds the previous archive.
+    if not args.skip_download:
+        failed_downloads = prefetch_formex(documents, force=args.force,
+                                           jobs=download_jobs, metrics=metrics)
+        if failed_downloads:
+            print(f"\n❌ Not converting {len(failed_downloads)} document(s) whose download failed")
+            documents = [d for d in documents if d.get('celex') not in failed_downloads]
+            failed += len(failed_downloads)
+    
+    for ok in run_documents(documents,
+                            force=args.force,
+                            jobs=jobs,
+                            manifest=manifest,
+                            explain=args.explain,
+                            backend=args.backend,
+                            metrics=metrics,
+                            profile=args.profile,
+                            annex_jobs=annex_jobs):
+        if ok:
             success += 1
         else:
             failed += 1
     
+    save_manifest(manifest)
+    if metrics is not None:
+        write_metrics(args.metrics, metrics)
+        print(f"\n📈 Metrics: {len(metrics)} stage record(s) -> {args.metrics}")
+    
     # Summary
     print("\n" + "="*60)
     print("📊 Summary")
@@ -433,7 +961,8 @@ Examples:
     
     # Run validation
     if not args.no_validate and failed == 0:
-        validate_documents()
+        if validate_documents() > 0:
+            return 1
     
     return 0 if failed == 0 else 1
 
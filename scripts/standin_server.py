@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Local HTTP Stand-In Server for the Tests
+========================================
+
+Shared by the test modules that run a local stand-in for EUR-Lex or the
+cellar endpoint (test_pipeline.py, test_http_cache.py,
+test_html_converter.py, test_discover_cellar_ids.py).
+"""
+
+import sys
+from http.server import ThreadingHTTPServer
+
+
+class StandInServer(ThreadingHTTPServer):
+    """
+    ThreadingHTTPServer that stays quiet about dropped connections.
+    
+    Clients that stop reading early (a resumed download, a scan that found
+    its match, a generator closed part-way) reset the connection; that is
+    expected here, not an error worth a traceback.
+    """
+    
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Unit tests for discover_cellar_ids.py.
+
+Tests cover:
+1. Cellar ID discovery via the OJ RDF and the notice fallback
+2. Batch discovery: bounded concurrency, config-order results, one write
+3. Streaming notice scanning: chunk boundaries and early stop
+"""
+
+import random
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+from unittest import mock
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent))
+import discover_cellar_ids
+import http_cache
+from discover_cellar_ids import NOTICE_PATTERN, discover_batch, discover_cellar_id, scan_notice
+from standin_server import StandInServer
+
+
+UUID = '0123abcd-4567-89ef-0123-456789abcdef'
+
+
+class EurLexStandIn(BaseHTTPRequestHandler):
+    """Local stand-in for the EUR-Lex notice and OJ RDF endpoints.
+    
+    Serves self.server.pages[path], sleeping self.server.delays[path]
+    seconds first, and tracks the peak number of requests in flight.
+    """
+    protocol_version = 'HTTP/1.1'
+    
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            server.in_flight += 1
+            server.peak = max(server.peak, server.in_flight)
+            server.ports.add(self.client_address[1])
+        try:
+            time.sleep(server.delays.get(self.path, 0))
+            body = server.pages.get(self.path)
+            self.send_response(200 if body is not None else 404)
+            body = body or b''
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+    
+    def log_message(self, *args):
+        pass
+
+
+class DiscoveryTestCase(unittest.TestCase):
+    """Point the discovery URLs at a local stand-in server."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.server = StandInServer(('127.0.0.1', 0), EurLexStandIn)
+        cls.server.lock = threading.Lock()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        cls.patches = [
+            mock.patch.object(discover_cellar_ids, 'NOTICE_URL', base_url + '/notice/{celex}'),
+            mock.patch.object(http_cache, 'RDF_URL', base_url + '/oj/{oj_ref}'),
+        ]
+        for patch in cls.patches:
+            patch.start()
+    
+    @classmethod
+    def tearDownClass(cls):
+        for patch in cls.patches:
+            patch.stop()
+        cls.server.shutdown()
+        cls.server.server_close()
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        cache_patch = mock.patch.object(http_cache, 'CACHE_DIR', Path(self.tmp.name))
+        cache_patch.start()
+        self.addCleanup(cache_patch.stop)
+        self.addCleanup(self.tmp.cleanup)
+        self.server.pages = {}
+        self.server.delays = {}
+        self.server.in_flight = 0
+        self.server.requests = 0
+        self.server.peak = 0
+        self.server.ports = set()
+    
+    def publish(self, celex, n, delay=0.0):
+        """Serve a notice and RDF for celex resolving to cellar ID UUID-ish .n.01."""
+        oj_ref = f"L_{n:09d}"
+        self.server.pages[f'/notice/{celex}'] = (
+            f'<NOTICE>resource/oj/{oj_ref}.ENG.fmx4</NOTICE>'.encode())
+        self.server.pages[f'/oj/{oj_ref}'] = (
+            f'<rdf>resource/cellar/{UUID[:-4]}{n:04d}.0006.01</rdf>'.encode())
+        self.server.delays[f'/notice/{celex}'] = delay
+        return f'{UUID[:-4]}{n:04d}.0006.01'
+
+
+class TestDiscoverCellarId(DiscoveryTestCase):
+    """Test the single-document lookup."""
+    
+    def test_resolves_through_rdf(self):
+        expected = self.publish('32024R0001', 1)
+        lines = []
+        self.assertEqual(discover_cellar_id('32024R0001', log=lines.append), expected)
+        self.assertIn(f"   ✅ Found: {expected}", lines)
+    
+    def test_fallback_to_notice_cellar_id(self):
+        self.server.pages['/notice/32024R0002'] = (
+            f'<NOTICE>resource/cellar/{UUID}.0006.03</NOTICE>'.encode())
+        self.assertEqual(discover_cellar_id('32024R0002', log=lambda _: None), f'{UUID}.0006.03')
+    
+    def test_offline_after_online_discovery(self):
+        expected = self.publish('32024R0003', 3)
+        self.server.pages['/notice/32024R0003'] += b'<pad/>' * 200_000
+        self.assertEqual(discover_cellar_id('32024R0003', log=lambda _: None), expected)
+        requests_online = self.server.requests
+        with mock.patch.object(http_cache, 'OFFLINE', True):
+            lines = []
+            self.assertEqual(discover_cellar_id('32024R0003', log=lines.append), expected)
+        self.assertEqual(self.server.requests, requests_online)
+        self.assertNotIn('Failed', '\n'.join(lines))
+    
+    def test_cached_references_fall_back_to_full_notice(self):
+        # The OJ reference was found and cached, but its RDF is gone now
+        self.server.pages['/notice/32024R0004'] = (
+            b'<N>resource/oj/L_000000004.ENG.fmx4 resource/cellar/bbbb-2222.0006.02</N>')
+        self.server.pages['/oj/L_000000004'] = b'<rdf/>'
+        lines = []
+        self.assertEqual(discover_cellar_id('32024R0004', log=lambda _: None), 'bbbb-2222.0006.02')
+        self.assertEqual(discover_cellar_id('32024R0004', log=lines.append), 'bbbb-2222.0006.02')
+        self.assertIn('   📄 Found OJ reference: L_000000004', lines)
+    
+    def test_missing_notice(self):
+        lines = []
+        self.assertIsNone(discover_cellar_id('32024R9999', log=lines.append))
+        self.assertTrue(lines[-1].startswith('   ❌ Failed to download notice'))
+
+
+class TestDiscoverBatch(DiscoveryTestCase):
+    """Test concurrent batch discovery."""
+    
+    def test_results_in_input_order(self):
+        # Earlier documents answer slowest, so completion order is reversed
+        celexes = [f'32024R{i:04d}' for i in range(1, 7)]
+        expected = [self.publish(c, i, delay=0.05 * (6 - i)) for i, c in enumerate(celexes, 1)]
+        results = list(discover_batch(celexes, jobs=6))
+        self.assertEqual([r[0] for r in results], celexes)
+        self.assertEqual([r[1] for r in results], expected)
+        self.assertTrue(all(celex in log for celex, _, log in results))
+    
+    def test_concurrency_is_bounded(self):
+        celexes = [f'32024R{i:04d}' for i in range(1, 9)]
+        for i, celex in enumerate(celexes, 1):
+            self.publish(celex, i, delay=0.05)
+        list(discover_batch(celexes, jobs=3))
+        self.assertLessEqual(self.server.peak, 3)
+        self.assertGreater(self.server.peak, 1)
+    
+    def test_connections_reused(self):
+        celexes = [f'32024R{i:04d}' for i in range(1, 9)]
+        for i, celex in enumerate(celexes, 1):
+            self.publish(celex, i)
+        list(discover_batch(celexes, jobs=2))
+        # 16 requests over at most one keep-alive connection per worker thread
+        self.assertLessEqual(len(self.server.ports), 2)
+    
+    def test_failure_does_not_stop_batch(self):
+        expected = self.publish('32024R0001', 1)
+        results = list(discover_batch(['32024R9999', '32024R0001'], jobs=2))
+        self.assertEqual([r[1] for r in results], [None, expected])
+    
+    def test_main_writes_config_once_in_order(self):
+        config = {'documents': [
+            {'celex': '32024R0002', 'title': 'Second'},
+            {'title': 'FAQ', 'type': 'faq'},
+            {'celex': '32024R0001', 'title': 'First', 'cellar_id': 'old'},
+            {'celex': '32024R0003', 'title': 'Third'},
+        ]}
+        ids = {c: self.publish(c, i, delay=0.05 * (4 - i))
+               for i, c in enumerate(['32024R0001', '32024R0002', '32024R0003'], 1)}
+        with mock.patch.object(discover_cellar_ids, 'load_config', return_value=config), \
+             mock.patch.object(discover_cellar_ids, 'save_config') as save, \
+             mock.patch.object(sys, 'argv', ['discover_cellar_ids.py', '--jobs', '4']), \
+             mock.patch('builtins.print'):
+            discover_cellar_ids.main()
+        save.assert_called_once_with(config)
+        self.assertEqual([d.get('cellar_id') for d in config['documents']],
+                         [ids['32024R0002'], None, 'old', ids['32024R0003']])
+
+
+class TestScanNotice(DiscoveryTestCase):
+    """Test incremental notice scanning."""
+    
+    NOTICE = (b'<NOTICE>' + b'x' * 300
+              + b'<a>resource/cellar/aaaa-1111.0002.01</a>' + b'y' * 700
+              + b'<b>resource/oj/L_202401183.ENG.fmx4</b>'
+              + b'<c>resource/oj/L_202401183.FRA.fmx4</c>'
+              + b'<d>resource/cellar/bbbb-2222.0006.03</d>' + b'z' * 50
+              + b'<e>resource/cellar/cccc-3333.0006.1234</e>')
+    
+    def expected(self, notice):
+        return [(oj and oj.decode(), cid and cid.decode())
+                for oj, cid in (m.groups() for m in NOTICE_PATTERN.finditer(notice))]
+    
+    def test_matches_straddling_chunk_boundaries(self):
+        expected = self.expected(self.NOTICE)
+        self.assertEqual(len(expected), 4)
+        for size in list(range(1, 64)) + [100, 333, 4096]:
+            chunks = [self.NOTICE[i:i + size] for i in range(0, len(self.NOTICE), size)]
+            with self.subTest(chunk_size=size):
+                self.assertEqual(list(scan_notice(chunks, overlap=64)), expected)
+    
+    def test_random_notices_match_whole_buffer_search(self):
+        rng = random.Random(20)
+        pieces = [b'resource/oj/L_2024', b'01183.ENG.fmx4', b'resource/cellar/',
+                  b'ab-12', b'.0006', b'.01', b'<x>', b'9', b'.']
+        for _ in range(300):
+            notice = b''.join(rng.choice(pieces) for _ in range(rng.randint(0, 40)))
+            size = rng.randint(1, 20)
+            chunks = [notice[i:i + size] for i in range(0, len(notice), size)]
+            self.assertEqual(list(scan_notice(chunks, overlap=64)), self.expected(notice))
+    
+    def test_stops_reading_after_oj_reference(self):
+        pulled = []
+        
+        def chunks():
+            for i in range(0, 10_000_000, 4096):
+                pulled.append(i)
+                yield (b'resource/oj/L_202401183.ENG.fmx4' if i == 0 else b'') + b'x' * 4096
+        
+        refs = scan_notice(chunks())
+        self.assertEqual(next(refs), ('L_202401183', None))
+        self.assertLessEqual(len(pulled), 2)
+    
+    def test_large_notice_not_read_to_the_end(self):
+        expected = self.publish('32024R0001', 1)
+        notice_path = '/notice/32024R0001'
+        self.server.pages[notice_path] += b'<pad/>' * 2_000_000
+        self.assertEqual(discover_cellar_id('32024R0001', log=lambda _: None), expected)
+        # The notice was abandoned part-way, so it was never cached; the references found were
+        notice_url = discover_cellar_ids.NOTICE_URL.format(celex='32024R0001')
+        self.assertFalse((Path(self.tmp.name) / f"{http_cache.cache_key(notice_url)}.body").exists())
+        self.assertEqual(http_cache.load_derived(notice_url, discover_cellar_ids.NOTICE_REFS),
+                         {'oj_ref': 'L_000000001', 'cellar_ids': []})
+    
+    def test_rdf_failure_falls_back_to_rest_of_notice(self):
+        self.server.pages['/notice/32024R0005'] = (
+            b'<N>resource/cellar/aaaa-1111.0002.01 resource/oj/L_000000005.ENG.fmx4'
+            + b'x' * 100_000 + b' resource/cellar/bbbb-2222.0006.02</N>')
+        cellar_id = discover_cellar_id('32024R0005', log=lambda _: None)
+        self.assertEqual(cellar_id, 'bbbb-2222.0006.02')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -26,7 +26,8 @@ from formex_to_md_v3 import (
     process_list_simple,
     get_following_quoted_content,
     process_alinea_nested,
-    extract_gr_seq_sections
+    extract_gr_seq_sections,
+    FormexIndex
 )
 
 
@@ -105,6 +106,43 @@ class TestGetElementText(unittest.TestCase):
         self.assertIn('21 May 2026', result)
         self.assertIn('**four years**', result)
         self.assertIn('thereafter', result)
+    
+    def test_ht_after_digit_spacing(self):
+        """Spacing rules for formatting that follows a number are preserved.
+        
+        A direct HT child gets its space inside the marker; formatted text from
+        a wrapper element gets it before the marker. Annex GR.SEQ titles strip
+        the '*' markers afterwards, so both read "1.1 Theft".
+        """
+        elem = ET.fromstring('<P>1.1<HT TYPE="ITALIC">Theft</HT></P>')
+        self.assertEqual(get_element_text(elem), '1.1* Theft*')
+        elem = ET.fromstring('<P>1.1<X><HT TYPE="BOLD">Loss</HT></X></P>')
+        self.assertEqual(get_element_text(elem), '1.1 **Loss**')
+    
+    def test_deeply_nested_markup_no_recursion_limit(self):
+        """Text extraction is iterative, so nesting depth isn't bounded by the recursion limit."""
+        depth = sys.getrecursionlimit() * 2
+        xml = '<P>' + '<HT TYPE="UC">' * depth + 'deep' + '</HT>' * depth + ' end</P>'
+        elem = ET.fromstring(xml)
+        self.assertEqual(get_element_text(elem), 'deep end')
+    
+    def test_memoized_text_matches_uncached(self):
+        """With the per-conversion memo active, results are identical and reused."""
+        import formex_to_md_v3
+        xml = '''<ALINEA>See<NOTE NOTE.ID="E0001"><P>OJ <HT TYPE="ITALIC">L</HT> 1</P></NOTE>
+            and <DATE ISO="20260521">21 May 2026</DATE></ALINEA>'''
+        elem = ET.fromstring(xml)
+        uncached = get_element_text(elem)
+        formex_to_md_v3._text_memo = {}
+        try:
+            self.assertEqual(get_element_text(elem), uncached)
+            self.assertIn(id(elem), formex_to_md_v3._text_memo)
+            self.assertEqual(get_element_text(elem), uncached)
+            # Subtrees already extracted by a caller are reused when nested
+            self.assertEqual(get_element_text(elem.find('NOTE')),
+                             get_element_text(elem.find('NOTE')))
+        finally:
+            formex_to_md_v3._text_memo = None
 
 
 class TestCleanText(unittest.TestCase):
@@ -1718,6 +1756,82 @@ class TestConsAnnexExtraction(unittest.TestCase):
         finally:
             os.unlink(temp_path)
 
+    def test_annex_fallback_skips_list_item_paragraphs(self):
+        """
+        BUG FIX: The last-resort annex path (no GR.SEQ, no CONTENTS) tried to
+        skip P elements inside list items with p.find('..'), which is always
+        None in ElementTree. List item text, already included in the outer
+        P, was emitted a second time as a loose paragraph.
+        """
+        from formex_to_md_v3 import convert_formex_to_md
+        import io
+        
+        xml_content = b'''<ANNEX>
+            <TI.ANNEX><P>ANNEX</P></TI.ANNEX>
+            <P>Introductory text.</P>
+            <P><LIST><ITEM><NP><NO.P>(a)</NO.P><P>only once</P></NP></ITEM></LIST></P>
+        </ANNEX>'''
+        
+        result = convert_formex_to_md(io.BytesIO(xml_content), None)
+        
+        self.assertIn("Introductory text.", result)
+        self.assertEqual(result.count("only once"), 1,
+            "List item paragraph should not be emitted twice")
+
+
+class TestFormexIndex(unittest.TestCase):
+    """Test that FormexIndex lookups match the ElementTree scans they replace."""
+    
+    XML = '''<ACT>
+        <TITLE><TI><P>Act</P></TI></TITLE>
+        <ENACTING.TERMS>
+            <ARTICLE><TI.ART>Article 1</TI.ART>
+                <PARAG><ALINEA><P>(1) text</P>
+                    <QUOT.S><ARTICLE><TI.ART>Article 5a</TI.ART></ARTICLE></QUOT.S>
+                </ALINEA></PARAG>
+            </ARTICLE>
+            <ARTICLE><TI.ART>Article 2</TI.ART></ARTICLE>
+        </ENACTING.TERMS>
+        <ANNEX>
+            <TITLE><TI><P>ANNEX</P></TI></TITLE>
+            <CONTENTS>
+                <GR.SEQ><TITLE><TI><P>1. Part</P></TI></TITLE></GR.SEQ>
+                <TBL><CORPUS><ROW><CELL><GR.SEQ><P>in table</P></GR.SEQ></CELL></ROW></CORPUS></TBL>
+            </CONTENTS>
+        </ANNEX>
+    </ACT>'''
+    
+    def setUp(self):
+        self.root = ET.fromstring(self.XML)
+        self.index = FormexIndex(self.root)
+    
+    def test_descendants_match_findall(self):
+        """descendants() returns the same elements, in order, as findall('.//TAG')."""
+        for tag in ('ARTICLE', 'P', 'TITLE', 'GR.SEQ', 'TI.ART'):
+            self.assertEqual(self.index.descendants(self.root, tag),
+                             self.root.findall(f'.//{tag}'))
+        annex = self.root.find('ANNEX')
+        self.assertEqual(self.index.descendants(annex, 'P'), annex.findall('.//P'))
+    
+    def test_first_matches_find(self):
+        """first() matches find('.//TAG') and find('.//PARENT/TAG')."""
+        annex = self.root.find('ANNEX')
+        self.assertIs(self.index.first(self.root, 'TITLE'), self.root.find('.//TITLE'))
+        self.assertIs(self.index.first(annex, 'TI', parent_tag='TITLE'),
+                      annex.find('.//TITLE/TI'))
+        self.assertIsNone(self.index.first(self.root, 'FINAL'))
+    
+    def test_parent_and_nesting_flags(self):
+        """Parent pointers and QUOT.S/TBL flags are recorded during the pass."""
+        quoted = [a for a in self.index.descendants(self.root, 'ARTICLE')
+                  if a in self.index.in_quot_s]
+        self.assertEqual([a.find('TI.ART').text for a in quoted], ['Article 5a'])
+        tbl_seqs = [g for g in self.index.descendants(self.root, 'GR.SEQ')
+                    if g in self.index.in_tbl]
+        self.assertEqual(len(tbl_seqs), 1)
+        self.assertEqual(self.index.parent[tbl_seqs[0]].tag, 'CELL')
+        self.assertNotIn(self.root, self.index.parent)
+
 
 if __name__ == '__main__':
     # Run with verbose output
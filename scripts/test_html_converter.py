@@ -1,11 +1,55 @@
 #!/usr/bin/env python3
 """
 Unit tests for eurlex_html_to_md.py HTML converter.
+
+Golden files: fixtures/html/<CELEX>.html.gz are EUR-Lex-style pages (OJ and
+consolidated markup, rendered from this repository's regulation Markdown)
+and <CELEX>.md the expected conversion, with the "In force" date replaced
+by DD/MM/YYYY. After an intended output change, regenerate them with:
+
+    UPDATE_GOLDEN=1 python -m pytest test_html_converter.py -k golden
 """
 
+import asyncio
+import contextlib
+import gzip
+import io
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
 import unittest
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+from unittest import mock
+
+import requests
 from bs4 import BeautifulSoup
-from eurlex_html_to_md import is_consolidated_format
+
+import eurlex_html_to_md
+import http_cache
+from eurlex_html_to_md import (
+    BACKENDS, TableBlock, classify_blocks, convert_html_to_markdown, download_all_html, download_html,
+    extract_annexes, get_html, html_documents, is_consolidated_format, load_stored_html, parse_html,
+    poll_html, replay, retry_delay, store_html, stored_celexes, stored_dates,
+)
+from standin_server import StandInServer
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures' / 'html'
+
+
+def convert_fixture(path: Path, backend: str = None) -> str:
+    """Convert a gzipped HTML fixture, with the run-date line normalised."""
+    celex = path.name[:-len('.html.gz')]
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        html = f.read()
+    with contextlib.redirect_stdout(io.StringIO()):
+        markdown = convert_html_to_markdown(celex, html, backend=backend)
+    return re.sub(r'(\*\*In force:\*\* Current consolidated version: )\d\d/\d\d/\d{4}',
+                  r'\1DD/MM/YYYY', markdown)
 
 
 class TestIsConsolidatedFormat(unittest.TestCase):
@@ -45,5 +89,418 @@ class TestIsConsolidatedFormat(unittest.TestCase):
         self.assertFalse(is_consolidated_format(soup))
 
 
+class TestGoldenFixtures(unittest.TestCase):
+    """Differential test: every HTML fixture converts to its golden Markdown, on every backend."""
+    
+    def test_golden_fixtures(self):
+        fixtures = sorted(FIXTURES_DIR.glob('*.html.gz'))
+        self.assertGreaterEqual(len(fixtures), 5)
+        for path in fixtures:
+            golden = path.with_name(path.name[:-len('.html.gz')] + '.md')
+            for backend in BACKENDS:
+                with self.subTest(fixture=path.name, backend=backend):
+                    markdown = convert_fixture(path, backend)
+                    if os.environ.get('UPDATE_GOLDEN') and backend == 'bs4':
+                        golden.write_text(markdown, encoding='utf-8')
+                    self.assertEqual(markdown, golden.read_text(encoding='utf-8'))
+    
+    def test_backends_agree_on_edge_cases(self):
+        pages = [
+            '',
+            '<?xml version="1.0" encoding="UTF-8"?><html><body><div id="document1">'
+            '<p class="oj-doc-ti">DIRECTIVE 2002/58/EC</p><p class="oj-normal">caf&eacute;<!-- x --> ok</p>'
+            '</div></body></html>',
+            '<div id="document1"><p class="oj-ti-art">Article 1</p>'
+            '<div id="ANX_1"><table><tr><td><p class="oj-normal">(a)</p></td></tr></table></div></div>',
+        ]
+        for html in pages:
+            with self.subTest(html=html[:40]), contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(convert_html_to_markdown('32002L0058', html, backend='lxml'),
+                                 convert_html_to_markdown('32002L0058', html, backend='bs4'))
+    
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            parse_html('<p>x</p>', 'html5lib')
+
+
+class TestClassifyBlocks(unittest.TestCase):
+    """Test the single-pass paragraph classifier."""
+    
+    HTML = """<html><body><div id="document1">
+        <p class="oj-doc-ti">REGULATION (EC) No 1/2008</p>
+        <p class="oj-normal">(1)</p><p>unclassed</p>
+        <p class="oj-ti-art">Article 1</p><p class="oj-sti-art">Subject ►M1 matter</p>
+        <div id="anx_I">
+            <p class="oj-doc-ti">ANNEX I</p>
+            <table><tr><td><p class="oj-normal">(a)</p></td><td><p class="oj-normal">first</p></td></tr></table>
+            <div id="anx_2"><p class="oj-normal">inner</p></div>
+        </div>
+    </div></body></html>"""
+    
+    def test_roles_and_cleaned_text(self):
+        for backend in BACKENDS:
+            with self.subTest(backend=backend):
+                blocks = classify_blocks(parse_html(self.HTML, backend))
+                self.assertEqual([(b.role, b.text) for b in blocks.paragraphs[:5]], [
+                    ('oj-doc-ti', 'REGULATION (EC) No 1/2008'), ('oj-normal', '(1)'), ('', 'unclassed'),
+                    ('oj-ti-art', 'Article 1'), ('oj-sti-art', 'Subject matter'),
+                ])
+    
+    def test_annex_events(self):
+        blocks = classify_blocks(parse_html(self.HTML, 'lxml'))
+        self.assertEqual([annex_id for annex_id, _ in blocks.annexes], ['anx_I', 'anx_2'])
+        outer = blocks.annexes[0][1]
+        self.assertIsInstance(outer[1], TableBlock)
+        self.assertEqual(outer[1].rows, [('(a)', 'first')])
+        self.assertEqual([(e.text, e.in_table) for e in outer if not isinstance(e, TableBlock)],
+                         [('ANNEX I', False), ('(a)', True), ('first', True), ('inner', False)])
+        self.assertEqual(extract_annexes(blocks), [
+            '', '---', '', '## ANNEX I', '', '- (a) first', 'inner', '',
+            '', '---', '', '## ANNEX II', '', 'inner', '',
+        ])
+    
+    def test_each_paragraph_cleaned_once(self):
+        with gzip.open(FIXTURES_DIR / '32008R0765.html.gz', 'rt', encoding='utf-8') as f:
+            soup = BeautifulSoup(f.read(), 'lxml')
+        paragraphs = len(soup.find_all('p'))
+        with mock.patch.object(eurlex_html_to_md, 'clean_text',
+                               wraps=eurlex_html_to_md.clean_text) as clean:
+            blocks = classify_blocks(soup)
+            for extract in (eurlex_html_to_md.extract_preamble,
+                            eurlex_html_to_md.extract_chapters_and_articles,
+                            eurlex_html_to_md.extract_annexes,
+                            eurlex_html_to_md.extract_signatories):
+                extract(blocks)
+            eurlex_html_to_md.extract_metadata(blocks, '32008R0765')
+        table_cells = sum(len(e.rows) * 2 for _, events in blocks.annexes
+                          for e in events if isinstance(e, TableBlock))
+        self.assertEqual(clean.call_count, paragraphs + table_cells)
+
+
+class GenerationStandIn(BaseHTTPRequestHandler):
+    """Local stand-in for EUR-Lex on-demand HTML generation.
+    
+    A request without a session cookie starts a new generation job; the
+    job answers 202 (Retry-After: self.server.retry_after) until it has
+    been polled self.server.ready_after times, then serves the page with
+    ETag "<celex>" (304 if If-None-Match matches). Paths in
+    self.server.missing get a 404. Each response is held for
+    self.server.delay seconds, and the peak numbers of requests in flight
+    and of jobs generating at once are tracked.
+    """
+    protocol_version = 'HTTP/1.1'
+    
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.peak_in_flight = max(server.peak_in_flight, server.in_flight)
+        try:
+            time.sleep(server.delay)
+            self.respond()
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+    
+    def respond(self):
+        server = self.server
+        celex = self.path.rsplit('/', 1)[1]
+        cookie = self.headers.get('Cookie', '')
+        with server.lock:
+            if 'job=' not in cookie:
+                server.jobs.setdefault(celex, []).append(0)
+                cookie = f'job={len(server.jobs[celex])}'
+                self.new_cookie = cookie
+            else:
+                self.new_cookie = None
+            job = int(cookie.split('job=')[1]) - 1
+            server.jobs[celex][job] += 1
+            polls = server.jobs[celex][job]
+            if polls == 1 and celex not in server.missing:
+                server.generating += 1
+                server.peak_generating = max(server.peak_generating, server.generating)
+            elif polls == server.ready_after and celex not in server.missing:
+                server.generating -= 1
+        
+        if celex in server.missing:
+            status, body = 404, b''
+        elif polls < server.ready_after:
+            status, body = 202, b''
+        elif self.headers.get('If-None-Match') == f'"{celex}"':
+            status, body = 304, b''
+        else:
+            status, body = 200, f'<html><p>{celex}</p>{"x" * 200}</html>'.encode()
+        self.send_response(status)
+        if self.new_cookie:
+            self.send_header('Set-Cookie', f'{self.new_cookie}; Path=/')
+        if status in (200, 304):
+            self.send_header('ETag', f'"{celex}"')
+        if status == 202:
+            self.send_header('Retry-After', server.retry_after)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+
+class TestHtmlDownloadPool(unittest.TestCase):
+    """Test 202-aware downloads, sequential and pooled."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.server = StandInServer(('127.0.0.1', 0), GenerationStandIn)
+        cls.server.lock = threading.Lock()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        for target, name, value in [
+            (http_cache, 'CACHE_DIR', Path(self.tmp.name)),
+            (http_cache, 'OFFLINE', False),
+            (eurlex_html_to_md, 'HTML_URL', self.base_url + '/html/{celex}'),
+            (eurlex_html_to_md, 'MIN_RETRY_AFTER', 0.01),
+        ]:
+            patch = mock.patch.object(target, name, value)
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.server.jobs = {}
+        self.server.missing = set()
+        self.server.ready_after = 3
+        self.server.retry_after = '0.05'
+        self.server.delay = 0
+        self.server.in_flight = self.server.peak_in_flight = 0
+        self.server.generating = self.server.peak_generating = 0
+    
+    def test_sequential_download_keeps_one_job(self):
+        with mock.patch('builtins.print'):
+            html, validators = download_html('32008R0765')
+        self.assertIn('32008R0765', html)
+        self.assertEqual(validators, {'etag': '"32008R0765"'})
+        self.assertEqual(self.server.jobs['32008R0765'], [3])
+        # Pages go to the HTML store only, never to the HTTP cache
+        self.assertEqual(list(Path(self.tmp.name).iterdir()), [])
+    
+    def test_revalidation_not_modified(self):
+        self.server.ready_after = 1
+        with mock.patch('builtins.print'):
+            self.assertEqual(download_html('32008R0765', validators={'etag': '"32008R0765"'}),
+                             (None, {'etag': '"32008R0765"'}))
+            html, _ = download_html('32008R0765', validators={'etag': '"older"'})
+        self.assertIn('32008R0765', html)
+    
+    def test_pool_generates_documents_in_parallel(self):
+        celexes = [f'0201{i}R0001-20240101' for i in range(4)]
+        self.server.delay = 0.1
+        results = asyncio.run(download_all_html(celexes, max_concurrent=2, log=lambda _: None))
+        self.assertEqual(list(results), celexes)
+        for celex in celexes:
+            self.assertIn(celex, results[celex][0])
+            # One cookie session per document: its generation job is never restarted
+            self.assertEqual(self.server.jobs[celex], [3])
+        # Requests are limited to max_concurrent, but a Retry-After wait holds
+        # no slot, so all four documents are generating at once
+        self.assertEqual(self.server.peak_in_flight, 2)
+        self.assertEqual(self.server.peak_generating, 4)
+    
+    def test_pool_reports_failures_per_document(self):
+        self.server.missing = {'32008R0001'}
+        self.server.ready_after = 1
+        results = asyncio.run(download_all_html(['32008R0001', '32008R0002'], log=lambda _: None))
+        self.assertIsInstance(results['32008R0001'], Exception)
+        self.assertIn('32008R0002', results['32008R0002'][0])
+    
+    def test_gives_up_after_max_retries(self):
+        self.server.retry_after = '0'
+        results = asyncio.run(download_all_html(['32008R0003'], max_retries=2, log=lambda _: None))
+        self.assertIsInstance(results['32008R0003'], RuntimeError)
+        self.assertEqual(self.server.jobs['32008R0003'], [2])
+
+
+class TestRetryDelay(unittest.TestCase):
+    """Test Retry-After handling for generating documents."""
+    
+    def delay(self, retry_after=None, attempt=0):
+        response = mock.Mock(headers={'Retry-After': retry_after} if retry_after else {})
+        return retry_delay(response, attempt)
+    
+    def test_seconds(self):
+        self.assertEqual(self.delay('7'), 7)
+        self.assertEqual(self.delay('100000'), eurlex_html_to_md.MAX_RETRY_AFTER)
+    
+    def test_http_date(self):
+        self.assertAlmostEqual(self.delay(formatdate(time.time() + 30, usegmt=True)), 30, delta=2)
+        self.assertEqual(self.delay(formatdate(time.time() - 30, usegmt=True)),
+                         eurlex_html_to_md.MIN_RETRY_AFTER)
+    
+    def test_zero_is_raised_to_the_minimum(self):
+        self.assertEqual(self.delay('0'), eurlex_html_to_md.MIN_RETRY_AFTER)
+    
+    def test_progressive_backoff_without_header(self):
+        self.assertEqual([self.delay(attempt=a) for a in range(3)], [3, 5, 7])
+        self.assertEqual(self.delay('soon', attempt=1), 5)
+
+
+class TestPollHtml(unittest.TestCase):
+    """Test how a single poll classifies EUR-Lex responses."""
+    
+    def setUp(self):
+        patch = mock.patch.object(http_cache, 'OFFLINE', False)
+        patch.start()
+        self.addCleanup(patch.stop)
+    
+    def poll(self, status, body, validators=None):
+        response = requests.Response()
+        response.status_code, response._content, response.url = status, body, 'http://eur-lex/x'
+        session = mock.Mock(get=mock.Mock(return_value=response))
+        return poll_html('http://eur-lex/x', session, attempt=0, validators=validators)
+    
+    def test_page_of_min_html_bytes_is_ready(self):
+        body = b'x' * eurlex_html_to_md.MIN_HTML_BYTES
+        response, wait = self.poll(200, body)
+        self.assertEqual((response.text, wait), (body.decode(), None))
+    
+    def test_short_body_is_a_placeholder(self):
+        response, wait = self.poll(200, b'x' * (eurlex_html_to_md.MIN_HTML_BYTES - 1))
+        self.assertIsNone(response)
+        self.assertGreaterEqual(wait, eurlex_html_to_md.MIN_RETRY_AFTER)
+    
+    def test_not_modified_only_when_revalidating(self):
+        response, wait = self.poll(304, b'', validators={'etag': '"1"'})
+        self.assertEqual((response.status_code, wait), (304, None))
+    
+    def test_unexpected_status_raises(self):
+        for status in (204, 301, 304):
+            with self.subTest(status=status), self.assertRaises(requests.HTTPError):
+                self.poll(status, b'x' * 500)
+        with self.assertRaises(requests.HTTPError):
+            self.poll(404, b'')
+    
+    def test_offline_never_requests(self):
+        with mock.patch.object(http_cache, 'OFFLINE', True), \
+                self.assertRaises(http_cache.CacheMiss):
+            poll_html('http://eur-lex/x', session=None, attempt=0)
+
+
+class TestHtmlDocuments(unittest.TestCase):
+    """Test selecting the source: html entries from documents.yaml."""
+    
+    def test_selects_html_sources(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            config = Path(tmp) / 'documents.yaml'
+            config.write_text(
+                "documents:\n"
+                "  - {celex: 32008R0765, source: html}\n"
+                "  - {celex: 32024R1183}\n"
+                "  - {celex: 02019R0881-20250204, source: html}\n"
+                "  - {title: FAQ, source: html}\n", encoding='utf-8')
+            self.assertEqual(html_documents(config), ['32008R0765', '02019R0881-20250204'])
+
+
+class TestHtmlStore(unittest.TestCase):
+    """Test the dated HTML store and the offline / refresh modes."""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.store = Path(self.tmp.name) / 'html'
+        # Any network access fails the test unless a test replaces download_html
+        self.download = mock.Mock(side_effect=AssertionError('network access'))
+        for patch in [
+            mock.patch.object(eurlex_html_to_md, 'HTML_STORE_DIR', self.store),
+            mock.patch.object(eurlex_html_to_md, 'download_html', self.download),
+            mock.patch.object(http_cache, 'OFFLINE', False),
+            mock.patch('builtins.print'),
+        ]:
+            patch.start()
+            self.addCleanup(patch.stop)
+    
+    def test_pages_stored_by_date_and_only_when_changed(self):
+        path = store_html('32008R0765', '<html>v1</html>', retrieved='2025-01-10')
+        self.assertEqual(path, self.store / '32008R0765' / '2025-01-10.html.gz')
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            self.assertEqual(f.read(), '<html>v1</html>')
+        self.assertEqual(store_html('32008R0765', '<html>v1</html>', retrieved='2025-03-01'), path)
+        store_html('32008R0765', '<html>v2</html>', retrieved='2025-06-01')
+        self.assertEqual(stored_dates('32008R0765'), ['2025-01-10', '2025-06-01'])
+        self.assertEqual(load_stored_html('32008R0765'), ('<html>v2</html>', '2025-06-01'))
+        self.assertEqual(load_stored_html('32008R0765', '2025-01-10')[0], '<html>v1</html>')
+        self.assertIsNone(load_stored_html('32008R0765', '2025-02-01'))
+        self.assertIsNone(load_stored_html('32002L0058'))
+    
+    def test_stored_page_used_without_network(self):
+        store_html('32008R0765', '<html>stored</html>', retrieved='2025-01-10')
+        self.assertEqual(get_html('32008R0765'), ('<html>stored</html>', '2025-01-10'))
+        self.download.assert_not_called()
+    
+    def test_first_fetch_is_stored(self):
+        self.download.side_effect = None
+        self.download.return_value = ('<html>fetched</html>', {'etag': '"1"'})
+        html, retrieved = get_html('32008R0765')
+        self.assertEqual(html, '<html>fetched</html>')
+        self.assertEqual(stored_dates('32008R0765'), [retrieved])
+        self.assertEqual(get_html('32008R0765')[0], html)
+        self.assertEqual(self.download.call_count, 1)
+    
+    def test_offline_miss(self):
+        with self.assertRaises(http_cache.CacheMiss):
+            get_html('32008R0765', offline=True)
+        with mock.patch.object(http_cache, 'OFFLINE', True), self.assertRaises(http_cache.CacheMiss):
+            get_html('32008R0765')
+        with self.assertRaises(http_cache.CacheMiss):
+            get_html('32008R0765', retrieved='2025-01-10')
+    
+    def test_refresh_revalidates_and_stores_changes(self):
+        store_html('32008R0765', '<html>old</html>', retrieved='2025-01-10',
+                   validators={'etag': '"1"'})
+        self.download.side_effect = None
+        self.download.return_value = ('<html>new</html>', {'etag': '"2"'})
+        self.assertEqual(get_html('32008R0765', refresh=True)[0], '<html>new</html>')
+        self.download.assert_called_once_with('32008R0765', validators={'etag': '"1"'})
+        self.assertEqual(len(stored_dates('32008R0765')), 2)
+        self.assertEqual(eurlex_html_to_md.load_validators('32008R0765'), {'etag': '"2"'})
+    
+    def test_refresh_not_modified_keeps_stored_page(self):
+        store_html('32008R0765', '<html>old</html>', retrieved='2025-01-10',
+                   validators={'etag': '"1"'})
+        self.download.side_effect = None
+        self.download.return_value = (None, {'etag': '"1"'})
+        self.assertEqual(get_html('32008R0765', refresh=True), ('<html>old</html>', '2025-01-10'))
+        self.assertEqual(stored_dates('32008R0765'), ['2025-01-10'])
+    
+    def test_replay_converts_every_stored_document_offline(self):
+        for path in sorted(FIXTURES_DIR.glob('*.html.gz')):
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                store_html(path.name[:-len('.html.gz')], f.read(), retrieved='2025-01-10')
+        out = Path(self.tmp.name) / 'out'
+        self.assertEqual(replay(out), 0)
+        self.assertEqual(sorted(p.stem for p in out.glob('*.md')), stored_celexes())
+        self.assertEqual(len(stored_celexes()), 5)
+        self.download.assert_not_called()
+    
+    def test_main_offline(self):
+        with gzip.open(FIXTURES_DIR / '32008R0765.html.gz', 'rt', encoding='utf-8') as f:
+            store_html('32008R0765', f.read(), retrieved='2025-01-10')
+        out = Path(self.tmp.name) / 'out'
+        argv = ['eurlex_html_to_md.py', '32008R0765', str(out), '--offline', '--backend', 'bs4']
+        with mock.patch.object(sys, 'argv', argv):
+            eurlex_html_to_md.main()
+        self.assertTrue((out / '32008R0765.md').read_text(encoding='utf-8').startswith(
+            '> **CELEX:** 32008R0765'))
+        # Never fetched: offline conversion fails instead of downloading
+        with mock.patch.object(sys, 'argv', ['eurlex_html_to_md.py', '32002L0058', str(out), '--offline']):
+            with self.assertRaises(SystemExit):
+                eurlex_html_to_md.main()
+        self.download.assert_not_called()
+
+
 if __name__ == '__main__':
     unittest.main()
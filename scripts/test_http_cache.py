@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Unit tests for http_cache.py.
+
+Tests cover:
+1. Fresh hits, ETag/Last-Modified revalidation and uncached non-200s
+2. LRU size eviction
+3. Offline mode
+4. The converters' EUR-Lex lookups going through the cache
+5. Derived values kept for bodies that were only partly read
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+from unittest import mock
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / ".legacy"))
+import http_cache
+from http_cache import CacheMiss, cache_key, evict, fetch, iter_chunks
+from standin_server import StandInServer
+
+
+class ValidatingStandIn(BaseHTTPRequestHandler):
+    """Local server honouring If-None-Match / If-Modified-Since.
+    
+    Serves self.server.pages[path] as (status, body, etag); every request
+    is logged to self.server.requests as (path, If-None-Match, If-Modified-Since).
+    """
+    protocol_version = 'HTTP/1.1'
+    
+    def do_GET(self):
+        etag_in = self.headers.get('If-None-Match')
+        since_in = self.headers.get('If-Modified-Since')
+        self.server.requests.append((self.path, etag_in, since_in))
+        status, body, etag = self.server.pages.get(self.path, (404, b'', None))
+        if status == 200 and etag and etag_in == etag:
+            status, body = 304, b''
+        self.send_response(status)
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', 'Wed, 01 May 2024 00:00:00 GMT')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+
+class CacheTestCase(unittest.TestCase):
+    """Run against a local server with the cache in a temp directory."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.server = StandInServer(('127.0.0.1', 0), ValidatingStandIn)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        for name, value in {'CACHE_DIR': self.dir, 'OFFLINE': False}.items():
+            patch = mock.patch.object(http_cache, name, value)
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.addCleanup(self.tmp.cleanup)
+        self.server.pages = {}
+        self.server.requests = []
+    
+    def age(self, url, seconds, headers=None):
+        """Pretend the cached entry for url was fetched seconds ago."""
+        key = cache_key(url, headers)
+        meta, _ = http_cache.load_entry(key)
+        meta['fetched_at'] -= seconds
+        http_cache.write_atomic_bytes(self.dir / f"{key}.json",
+                                      json.dumps(meta).encode('utf-8'))
+
+
+class TestFetch(CacheTestCase):
+    """Test freshness, revalidation and what gets stored."""
+    
+    def test_fresh_entry_served_without_request(self):
+        self.server.pages['/n'] = (200, b'<notice/>', '"v1"')
+        first = fetch(self.base_url + '/n')
+        second = fetch(self.base_url + '/n')
+        self.assertFalse(first.from_cache)
+        self.assertTrue(second.from_cache)
+        self.assertEqual(second.content, b'<notice/>')
+        self.assertEqual(len(self.server.requests), 1)
+    
+    def test_stale_entry_revalidated_with_304(self):
+        url = self.base_url + '/n'
+        self.server.pages['/n'] = (200, b'<notice/>', '"v1"')
+        fetch(url)
+        self.age(url, http_cache.DEFAULT_TTL + 1)
+        response = fetch(url)
+        self.assertTrue(response.from_cache)
+        self.assertEqual(response.content, b'<notice/>')
+        self.assertEqual(self.server.requests[-1],
+                         ('/n', '"v1"', 'Wed, 01 May 2024 00:00:00 GMT'))
+        # The 304 made the entry fresh again
+        fetch(url)
+        self.assertEqual(len(self.server.requests), 2)
+    
+    def test_stale_entry_replaced_when_changed(self):
+        url = self.base_url + '/n'
+        self.server.pages['/n'] = (200, b'old', '"v1"')
+        fetch(url)
+        self.server.pages['/n'] = (200, b'new', '"v2"')
+        response = fetch(url, ttl=0)
+        self.assertEqual((response.content, response.from_cache), (b'new', False))
+        self.assertEqual(fetch(url).content, b'new')
+    
+    def test_accept_header_is_part_of_key(self):
+        self.server.pages['/r'] = (200, b'body', None)
+        fetch(self.base_url + '/r')
+        fetch(self.base_url + '/r', headers={'Accept': 'application/rdf+xml'})
+        self.assertEqual(len(self.server.requests), 2)
+    
+    def test_non_200_and_short_bodies_not_stored(self):
+        self.server.pages['/g'] = (202, b'generating', None)
+        self.server.pages['/s'] = (200, b'tiny', None)
+        self.assertEqual(fetch(self.base_url + '/g').status_code, 202)
+        fetch(self.base_url + '/s', min_bytes=100)
+        self.assertEqual(list(self.dir.glob('*.body')), [])
+        with self.assertRaises(Exception):
+            fetch(self.base_url + '/missing').raise_for_status()
+
+
+class TestIterChunks(CacheTestCase):
+    """Test streamed reads through the cache."""
+    
+    def test_complete_read_is_stored(self):
+        self.server.pages['/n'] = (200, b'0123456789' * 10, '"v1"')
+        chunks = list(iter_chunks(self.base_url + '/n', chunk_size=16))
+        self.assertEqual(b''.join(chunks), b'0123456789' * 10)
+        cached = list(iter_chunks(self.base_url + '/n', chunk_size=16))
+        self.assertEqual(cached, [b''.join(chunks)[i:i + 16] for i in range(0, 100, 16)])
+        self.assertEqual(len(self.server.requests), 1)
+    
+    def test_abandoned_read_is_not_stored(self):
+        self.server.pages['/n'] = (200, b'x' * 100_000, None)
+        chunks = iter_chunks(self.base_url + '/n', chunk_size=1024)
+        next(chunks)
+        chunks.close()
+        self.assertEqual(list(self.dir.glob('*.body')), [])
+    
+    def test_non_200_raises(self):
+        self.server.pages['/g'] = (202, b'generating', None)
+        with self.assertRaises(Exception):
+            list(iter_chunks(self.base_url + '/g'))
+
+
+class TestDerived(CacheTestCase):
+    """Test values cached from bodies that were only partly read."""
+    
+    def test_fresh_stale_and_offline(self):
+        http_cache.store_derived('http://x/n', 'refs', {'oj_ref': 'L_1'})
+        self.assertEqual(http_cache.load_derived('http://x/n', 'refs'), {'oj_ref': 'L_1'})
+        self.assertIsNone(http_cache.load_derived('http://x/n', 'other'))
+        self.assertIsNone(http_cache.load_derived('http://x/n', 'refs', ttl=0))
+        with mock.patch.object(http_cache, 'OFFLINE', True):
+            self.assertEqual(http_cache.load_derived('http://x/n', 'refs', ttl=0), {'oj_ref': 'L_1'})
+        # Not counted as bodies, so eviction leaves them alone
+        self.assertEqual(evict(0), 0)
+        self.assertIsNotNone(http_cache.load_derived('http://x/n', 'refs'))
+
+
+class TestEviction(CacheTestCase):
+    """Test LRU size eviction."""
+    
+    def test_least_recently_used_evicted_first(self):
+        for i, name in enumerate('abc'):
+            self.server.pages[f'/{name}'] = (200, name.encode() * 100, None)
+            fetch(f'{self.base_url}/{name}')
+            os.utime(self.dir / f"{cache_key(f'{self.base_url}/{name}')}.body",
+                     (time.time() - 100 + i,) * 2)
+        # Reading 'a' makes it the most recently used
+        fetch(f'{self.base_url}/a')
+        self.assertEqual(evict(250), 1)
+        remaining = {p.read_bytes()[:1] for p in self.dir.glob('*.body')}
+        self.assertEqual(remaining, {b'a', b'c'})
+        self.assertEqual(len(list(self.dir.glob('*.json'))), 2)
+    
+    def test_store_enforces_cap(self):
+        with mock.patch.object(http_cache, 'MAX_CACHE_BYTES', 150):
+            for name in 'ab':
+                self.server.pages[f'/{name}'] = (200, name.encode() * 100, None)
+                fetch(f'{self.base_url}/{name}')
+        self.assertEqual([p.read_bytes()[:1] for p in self.dir.glob('*.body')], [b'b'])
+
+
+class TestOffline(CacheTestCase):
+    """Test serving only from the cache."""
+    
+    def test_offline_serves_stale_entries(self):
+        url = self.base_url + '/n'
+        self.server.pages['/n'] = (200, b'<notice/>', '"v1"')
+        fetch(url)
+        self.age(url, 10 * http_cache.DEFAULT_TTL)
+        with mock.patch.object(http_cache, 'OFFLINE', True):
+            self.assertEqual(fetch(url).content, b'<notice/>')
+        self.assertEqual(len(self.server.requests), 1)
+    
+    def test_offline_miss_raises(self):
+        with mock.patch.object(http_cache, 'OFFLINE', True):
+            with self.assertRaises(CacheMiss):
+                fetch(self.base_url + '/never')
+        self.assertEqual(self.server.requests, [])
+
+
+class TestCallers(CacheTestCase):
+    """Test that the EUR-Lex helpers read through the shared cache."""
+    
+    def _store_notice_and_rdf(self):
+        notice_url = 'https://eur-lex.europa.eu/legal-content/EN/TXT/XML/?uri=CELEX:32024R1183'
+        rdf_url = 'http://publications.europa.eu/resource/oj/L_202401183.ENG.fmx4'
+        http_cache.store_entry(cache_key(notice_url), notice_url,
+                               b'<N>resource/oj/L_202401183.ENG.fmx4</N>', {})
+        http_cache.store_entry(cache_key(rdf_url, http_cache.RDF_HEADERS), rdf_url,
+                               b'<R>resource/cellar/0123abcd-4567.0006.02</R>', {})
+    
+    def test_get_formex_url_uses_cache_and_no_temp_files(self):
+        import eurlex_formex
+        self._store_notice_and_rdf()
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        try:
+            with mock.patch.object(http_cache, 'OFFLINE', True), mock.patch('builtins.print'):
+                url = eurlex_formex.get_formex_url('32024R1183')
+        finally:
+            os.chdir(cwd)
+        self.assertEqual(url, 'http://publications.europa.eu/resource/cellar/0123abcd-4567.0006.02')
+        self.assertEqual(list(self.dir.glob('temp_*')), [])
+    
+    def test_rdf_cached_once_for_both_callers(self):
+        import discover_cellar_ids
+        import eurlex_formex
+        self._store_notice_and_rdf()
+        with mock.patch.object(http_cache, 'OFFLINE', True), mock.patch('builtins.print'):
+            self.assertTrue(eurlex_formex.get_formex_url('32024R1183'))
+            cellar_id = discover_cellar_ids.discover_cellar_id('32024R1183', log=lambda _: None)
+        self.assertEqual(cellar_id, '0123abcd-4567.0006.02')
+        self.assertEqual(len(list(self.dir.glob('*.body'))), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Unit tests for md_linter.py.
+
+Tests cover:
+1. Directory linting in a process pool with aggregated counts
+2. The table-driven line rule engine (built-in and custom rules)
+3. Streaming: bounded memory and context windows at file boundaries
+4. Incremental linting: content-hash cache and git diff ranges
+5. Machine-readable output (JSON Lines and SARIF)
+"""
+
+import io
+import json
+import re
+import subprocess
+import tempfile
+import tracemalloc
+import unittest
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent))
+import md_linter
+from md_linter import (
+    RULES, LintIssue, LintRule, git_changed_files, lint_cached, lint_directory, lint_files,
+    lint_lines, lint_markdown, load_lint_cache, save_lint_cache, write_jsonl, write_sarif,
+)
+
+
+class TestLintDirectory(unittest.TestCase):
+    """Test lint_directory() aggregation across several trees."""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        for name, text in {
+            'a/clean.md': '# Notes\n\nNothing to see.\n',
+            'a/nested/divs.md': '# Notes\n\n::: div\n\n:::\n',
+            'b/markers.md': '# Notes\n\n(a)\n\n▼M1 text\n',
+        }.items():
+            path = self.dir / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text, encoding='utf-8')
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def test_counts_aggregated_over_directories(self):
+        result = lint_directory(self.dir / 'a', self.dir / 'b', jobs=2)
+        self.assertEqual(result['files'], 3)
+        self.assertEqual(result['errors'], 2)
+        self.assertEqual(result['warnings'], 1)
+        self.assertEqual(result['info'], 1)
+    
+    def test_pool_results_match_sequential(self):
+        files = sorted(self.dir.rglob('*.md'))
+        pooled = lint_files(files, jobs=2)
+        self.assertEqual(list(pooled), files)
+        self.assertEqual(pooled, {f: lint_markdown(str(f)) for f in files})
+    
+    def test_empty_directory(self):
+        (self.dir / 'empty').mkdir()
+        result = lint_directory(self.dir / 'empty')
+        self.assertEqual((result['files'], result['errors'], result['warnings']), (0, 0, 0))
+
+
+class TestRuleEngine(unittest.TestCase):
+    """Test the precompiled line rule table."""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / 'doc.md'
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def lint(self, text, rules=None):
+        self.path.write_text(text, encoding='utf-8')
+        return [(i.line_num, i.rule) for i in lint_markdown(str(self.path), rules)]
+    
+    def test_each_builtin_rule_fires(self):
+        samples = {
+            'PANDOC001': 'x\n\\\n', 'PANDOC002': '-' * 25 + '\n', 'PANDOC003': '::: note\n',
+            'PANDOC004': 'text {.cls}\n', 'HTML001': '<a ONCLICK="x">\n',
+            'EURLEX001': '▼M1 text\n', 'FORMAT001': '(a)\n', 'FORMAT002': ' — \n',
+            'FORMAT003': '(12)\n', 'FORMAT004': '3.\n', 'FORMAT005': '  (a) text\n',
+            'FORMAT006': "'quoted\n", 'FORMAT007': '---\n---\n\n---\n',
+            'FORMAT008': 'x\n---\n\n## Header\n',
+        }
+        self.assertEqual(sorted(samples), sorted(r.id for r in RULES))
+        for rule_id, text in samples.items():
+            with self.subTest(rule=rule_id):
+                self.assertIn(rule_id, [rule for _, rule in self.lint(text)])
+    
+    def test_plain_prose_is_clean(self):
+        self.assertEqual(self.lint('# Notes\n\nArticle 5. The (a) point {x} applies.\n'), [])
+    
+    def test_issues_on_one_line_in_table_order(self):
+        self.assertEqual(self.lint('x\n' + '-' * 25 + '\n\n## Head\n'),
+                         [(2, 'PANDOC002'), (2, 'FORMAT008')])
+    
+    def test_amending_instruction_not_flagged(self):
+        self.assertEqual(self.lint('  (a) point 3 is replaced by:\n'), [])
+        self.assertEqual(self.lint('  (a) point 3\n> new text\n'), [])
+    
+    def test_custom_rule_table(self):
+        todo = LintRule('TODO001', 'info', 'Leftover TODO', re.compile(r'TODO'), contains='TODO')
+        self.assertEqual(self.lint('ok\nsee TODO here\n(a)\n', rules=(todo,)), [(2, 'TODO001')])
+
+
+class TestStreaming(unittest.TestCase):
+    """Test that lint_lines() holds only a bounded window of lines."""
+    
+    def test_memory_flat_for_long_documents(self):
+        def document(n):
+            yield '# Notes\n'
+            for i in range(n):
+                yield f'Paragraph {i} of a very long generated page, padded out to some length.\n'
+        
+        tracemalloc.start()
+        try:
+            self.assertEqual(lint_lines(document(50_000)), [])
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        # ~4 MB of text goes through; only a few lines are ever alive
+        self.assertLess(peak, 256 * 1024)
+    
+    def test_context_rules_at_document_edges(self):
+        issues = lint_lines(['---\n', '## Header\n'])
+        self.assertEqual([(i.line_num, i.rule) for i in issues], [(1, 'FORMAT008')])
+        issues = lint_lines(['text\n'] * 20 + ['---\n', '\n', '---'])
+        self.assertEqual([(i.line_num, i.rule) for i in issues], [(23, 'FORMAT007')])
+    
+    def test_header_on_fourth_following_line(self):
+        # The look-ahead covers the next 4 lines, as the original loop did
+        issues = lint_lines(['---\n', '\n', '---\n', '---\n', '## H\n'])
+        self.assertIn((1, 'FORMAT008'), [(i.line_num, i.rule) for i in issues])
+        issues = lint_lines(['---\n', '\n', '\n', '\n', '\n', '## H\n'])
+        self.assertNotIn('FORMAT008', [i.rule for i in issues])
+
+
+class TestIncrementalLint(unittest.TestCase):
+    """Test the content-hash lint cache and git range selection."""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.cache_path = self.dir / '.cache' / 'lint.json'
+        self.a = self.dir / 'a.md'
+        self.b = self.dir / 'b.md'
+        self.a.write_text('# A\n\n(a)\n', encoding='utf-8')
+        self.b.write_text('# B\n\nClean.\n', encoding='utf-8')
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def run_cached(self):
+        cache = load_lint_cache(self.cache_path)
+        results, relinted = lint_cached([self.a, self.b], cache, jobs=1)
+        save_lint_cache(cache, self.cache_path)
+        return results, relinted
+    
+    def test_unchanged_files_come_from_cache(self):
+        first, relinted = self.run_cached()
+        self.assertEqual(relinted, 2)
+        second, relinted = self.run_cached()
+        self.assertEqual(relinted, 0)
+        self.assertEqual(second, first)
+        self.assertEqual(second[self.a], lint_markdown(str(self.a)))
+    
+    def test_edited_file_is_relinted(self):
+        self.run_cached()
+        self.b.write_text('# B\n\n(b)\n\n::: div\n', encoding='utf-8')
+        results, relinted = self.run_cached()
+        self.assertEqual(relinted, 1)
+        self.assertEqual([i.rule for i in results[self.b]], ['FORMAT001', 'PANDOC003'])
+    
+    def test_linter_change_invalidates_cache(self):
+        self.run_cached()
+        original = md_linter._linter_hash
+        md_linter._linter_hash = 'different linter'
+        try:
+            _, relinted = self.run_cached()
+        finally:
+            md_linter._linter_hash = original
+        self.assertEqual(relinted, 2)
+    
+    def test_git_range_selects_changed_markdown(self):
+        def git(*args):
+            subprocess.run(['git', '-c', 'user.name=t', '-c', 'user.email=t@t', *args],
+                           cwd=self.dir, check=True, capture_output=True)
+        git('init', '-q')
+        git('add', '.')
+        git('commit', '-q', '-m', 'base')
+        self.b.write_text('# B\n\nEdited.\n', encoding='utf-8')
+        (self.dir / 'notes.txt').write_text('not markdown', encoding='utf-8')
+        git('add', '.')
+        git('commit', '-q', '-m', 'edit')
+        self.assertEqual(git_changed_files('HEAD~1..HEAD', cwd=self.dir), [Path('b.md')])
+
+
+class TestMachineReadableOutput(unittest.TestCase):
+    """Test the JSON Lines and SARIF writers."""
+    
+    RESULTS = [
+        (Path('docs/a.md'), [LintIssue(3, 'FORMAT001', 'Empty list item marker', 'warning', '(a)'),
+                             LintIssue(5, 'PANDOC003', 'Pandoc div marker', 'error', ':::')], 0.0021),
+        (Path('docs/b.md'), [LintIssue(7, 'FORMAT001', 'Empty list item marker', 'warning', '(b)')],
+         None),
+    ]
+    
+    def test_jsonl_stream(self):
+        out = io.StringIO()
+        summary = write_jsonl(iter(self.RESULTS), out)
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([r['type'] for r in records],
+                         ['issue', 'issue', 'file', 'issue', 'file', 'summary'])
+        self.assertEqual(records[1], {'type': 'issue', 'file': 'docs/a.md', 'line': 5,
+                                      'rule': 'PANDOC003', 'severity': 'error',
+                                      'message': 'Pandoc div marker', 'content': ':::'})
+        self.assertEqual(records[2]['duration_ms'], 2.1)
+        self.assertTrue(records[4]['cached'])
+        self.assertEqual(records[-1], {'type': 'summary', **summary})
+        self.assertEqual(summary['rules'], {'FORMAT001': 2, 'PANDOC003': 1})
+        self.assertEqual((summary['files'], summary['errors'], summary['warnings']), (2, 1, 2))
+    
+    def test_sarif_log(self):
+        out = io.StringIO()
+        write_sarif(iter(self.RESULTS), out)
+        run = json.loads(out.getvalue())['runs'][0]
+        self.assertEqual([r['id'] for r in run['tool']['driver']['rules']],
+                         ['FORMAT001', 'PANDOC003'])
+        self.assertEqual([(r['ruleId'], r['level']) for r in run['results']],
+                         [('FORMAT001', 'warning'), ('PANDOC003', 'error'), ('FORMAT001', 'warning')])
+        location = run['results'][2]['locations'][0]['physicalLocation']
+        self.assertEqual(location['artifactLocation']['uri'], 'docs/b.md')
+        self.assertEqual(location['region']['startLine'], 7)
+        self.assertEqual(run['properties']['fileTimingsMs'], {'docs/a.md': 2.1, 'docs/b.md': None})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,561 @@
+#!/usr/bin/env python3
+"""
+Unit tests for pipeline.py.
+
+Tests cover:
+1. Build manifest keys and rebuild reasons (incremental builds)
+2. Formex archive member classification (no extraction to disk)
+3. Archive downloader (resume, validation, concurrency, failed downloads) against a local server
+4. lxml vs stdlib parser backends over the cached Formex archives
+5. Per-stage metrics, single atomic output write and cProfile output from process_document()
+6. Parallel runs (--jobs) matching the sequential run: log order, success flags, output
+7. The lint gate: the checked-in corpus passes, third-party trees only warn
+"""
+
+import contextlib
+import hashlib
+import io
+import json
+import multiprocessing
+import pstats
+import tempfile
+import threading
+import unittest
+import zipfile
+from unittest import mock
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent))
+import formex_to_md_v3
+import pipeline
+from pipeline import (
+    build_key, convert_annexes, convert_member, extract_formex, fetch_archive, prefetch_formex,
+    process_document, rebuild_reason, sha256_file,
+)
+from standin_server import StandInServer
+
+
+def make_zip(members: dict) -> zipfile.ZipFile:
+    """Build an in-memory ZIP from {name: content} and open it for reading."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zf:
+        for name, content in members.items():
+            zf.writestr(name, content)
+    buffer.seek(0)
+    return zipfile.ZipFile(buffer, 'r')
+
+
+def zip_bytes(members: dict) -> bytes:
+    """Build a ZIP from {name: content} and return its raw bytes."""
+    return make_zip(members).fp.getvalue()
+
+
+class CellarStandIn(BaseHTTPRequestHandler):
+    """Local stand-in for the cellar endpoint, with Range support.
+    
+    Serves self.server.archives[path] with an ETag derived from its bytes
+    and records every request's Range header in self.server.ranges. A Range
+    is honoured only if If-Range matches the current ETag.
+    """
+    protocol_version = 'HTTP/1.1'
+    
+    def do_GET(self):
+        body = self.server.archives.get(self.path)
+        range_header = self.headers.get('Range')
+        self.server.ranges.append(range_header)
+        if body is None:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        status = 200
+        if range_header and self.headers.get('If-Range') == etag:
+            start = int(range_header.split('=')[1].rstrip('-'))
+            if start >= len(body):
+                self.send_response(416)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            body = body[start:]
+            status = 206
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/zip')
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+
+class TestBuildManifest(unittest.TestCase):
+    """Test the content-addressed build manifest logic."""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.zip_path = self.dir / "32024R2977.fmx4.zip"
+        self.zip_path.write_bytes(b'PK fake archive')
+        self.md_path = self.dir / "32024R2977.md"
+        self.md_path.write_text("# Output\n", encoding='utf-8')
+        self.doc = {'celex': '32024R2977', 'output_dir': '02_implementing_acts/x'}
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def _entry(self):
+        key = build_key(self.doc, self.zip_path)
+        return {**key, 'output_sha256': sha256_file(self.md_path)}
+    
+    def test_unchanged_document_is_up_to_date(self):
+        entry = self._entry()
+        key = build_key(self.doc, self.zip_path)
+        self.assertIsNone(rebuild_reason(entry, key, self.md_path))
+    
+    def test_missing_entry_triggers_rebuild(self):
+        key = build_key(self.doc, self.zip_path)
+        self.assertEqual(rebuild_reason(None, key, self.md_path), "not in build manifest")
+    
+    def test_zip_change_triggers_rebuild(self):
+        entry = self._entry()
+        self.zip_path.write_bytes(b'PK different archive')
+        key = build_key(self.doc, self.zip_path)
+        self.assertEqual(rebuild_reason(entry, key, self.md_path), "Formex ZIP changed")
+    
+    def test_config_change_triggers_rebuild(self):
+        entry = self._entry()
+        self.doc['title'] = 'Renamed'
+        key = build_key(self.doc, self.zip_path)
+        self.assertEqual(rebuild_reason(entry, key, self.md_path), "documents.yaml entry changed")
+    
+    def test_converter_change_triggers_rebuild(self):
+        entry = self._entry()
+        entry['converter_sha256'] = 'stale'
+        key = build_key(self.doc, self.zip_path)
+        self.assertEqual(rebuild_reason(entry, key, self.md_path), "converter source changed")
+    
+    def test_edited_or_missing_output_triggers_rebuild(self):
+        entry = self._entry()
+        key = build_key(self.doc, self.zip_path)
+        self.md_path.write_text("# Edited\n", encoding='utf-8')
+        self.assertEqual(rebuild_reason(entry, key, self.md_path), "output modified since last build")
+        self.md_path.unlink()
+        self.assertEqual(rebuild_reason(entry, key, self.md_path), "output missing")
+    
+    def test_manifest_round_trip(self):
+        original = pipeline.MANIFEST_FILE
+        pipeline.MANIFEST_FILE = self.dir / "build-manifest.json"
+        try:
+            self.assertEqual(pipeline.load_manifest(), {})
+            pipeline.save_manifest({'32024R2977': self._entry()})
+            self.assertEqual(pipeline.load_manifest(), {'32024R2977': self._entry()})
+        finally:
+            pipeline.MANIFEST_FILE = original
+
+
+class TestExtractFormex(unittest.TestCase):
+    """Test classification of Formex ZIP members by name and size."""
+    
+    def test_standard_pattern(self):
+        zf = make_zip({
+            'L_202402977EN.doc.fmx.xml': '<DOC/>',
+            'L_202402977EN.toc.fmx.xml': '<TOC/>',
+            'L_202402977EN.000701.fmx.xml': '<ANNEX/>',
+            'L_202402977EN.000101.fmx.xml': '<ACT/>',
+            'L_202402977EN.000301.fmx.xml': '<ANNEX/>',
+        })
+        main, annexes = extract_formex(zf)
+        self.assertEqual(main, 'L_202402977EN.000101.fmx.xml')
+        self.assertEqual(annexes, ['L_202402977EN.000301.fmx.xml',
+                                   'L_202402977EN.000701.fmx.xml'])
+    
+    def test_consolidated_pattern(self):
+        zf = make_zip({
+            'CL2014R0910EN0020030.0001.doc.xml': '<DOC/>',
+            'CL2014R0910EN0020030.0001.xml': '<CONS.ACT/>',
+        })
+        self.assertEqual(extract_formex(zf), ('CL2014R0910EN0020030.0001.xml', []))
+    
+    def test_fallback_picks_largest_member(self):
+        zf = make_zip({
+            'L_2022333EN.01014301.xml': '<ANNEX/>',
+            'L_2022333EN.01008001.xml': '<ACT>' + 'x' * 100 + '</ACT>',
+            'L_2022333EN.01008001.doc.xml': '<DOC>' + 'x' * 1000 + '</DOC>',
+        })
+        main, annexes = extract_formex(zf)
+        self.assertEqual(main, 'L_2022333EN.01008001.xml')
+        self.assertEqual(annexes, ['L_2022333EN.01014301.xml'])
+    
+    def test_no_content_xml_raises(self):
+        zf = make_zip({'X.doc.xml': '<DOC/>'})
+        with self.assertRaises(ValueError):
+            extract_formex(zf)
+    
+    def test_member_converted_from_stream(self):
+        zf = make_zip({
+            'L_X.000101.fmx.xml': '<ACT><TITLE><TI><P>Streamed Act</P></TI></TITLE></ACT>',
+        })
+        self.assertIn('# Streamed Act', convert_member(zf, 'L_X.000101.fmx.xml'))
+    
+    def test_annexes_from_pool_keep_filename_order(self):
+        members = {f'L_X.{n:04d}01.fmx.xml':
+                   f'<ANNEX><TITLE><TI><P>ANNEX {n}</P></TI></TITLE></ANNEX>'
+                   for n in (3, 7, 10, 12)}
+        with tempfile.TemporaryDirectory() as tmp:
+            zip_path = Path(tmp) / 'A.fmx4.zip'
+            zip_path.write_bytes(zip_bytes(members))
+            original = pipeline.ANNEX_POOL_MIN_BYTES
+            pipeline.ANNEX_POOL_MIN_BYTES = 0
+            try:
+                with zipfile.ZipFile(zip_path) as zf, ProcessPoolExecutor(max_workers=2) as pool:
+                    annexes = sorted(members)
+                    pooled = convert_annexes(zf, annexes, pool=pool)
+                    sequential = convert_annexes(zf, annexes)
+            finally:
+                pipeline.ANNEX_POOL_MIN_BYTES = original
+        self.assertEqual(pooled, sequential)
+        self.assertEqual([content.splitlines()[0] for content, _ in pooled],
+                         ['## ANNEX 3', '## ANNEX 7', '## ANNEX 10', '## ANNEX 12'])
+
+
+class TestBackendParity(unittest.TestCase):
+    """Differential test: both parser backends must render identical Markdown."""
+    
+    def test_backends_match_on_cached_archives(self):
+        if formex_to_md_v3.lxml_etree is None:
+            self.skipTest("lxml not installed")
+        archives = sorted(pipeline.CACHE_DIR.glob('*.fmx4.zip'))
+        if not archives:
+            self.skipTest(f"No cached Formex archives in {pipeline.CACHE_DIR}")
+        
+        for archive in archives:
+            with zipfile.ZipFile(archive) as zf:
+                main_xml, annex_xmls = extract_formex(zf)
+                for member in [main_xml] + annex_xmls:
+                    with self.subTest(archive=archive.name, member=member):
+                        self.assertEqual(convert_member(zf, member, backend='lxml'),
+                                         convert_member(zf, member, backend='stdlib'))
+    
+    def test_unknown_backend_rejected(self):
+        zf = make_zip({'L_X.000101.fmx.xml': '<ACT/>'})
+        with self.assertRaises(ValueError):
+            convert_member(zf, 'L_X.000101.fmx.xml', backend='sax')
+
+
+class TestStageMetrics(unittest.TestCase):
+    """Test the stage records process_document() appends to a metrics list."""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.originals = (pipeline.CACHE_DIR, pipeline.BASE_DIR)
+        pipeline.CACHE_DIR = self.dir / 'cache'
+        pipeline.BASE_DIR = self.dir / 'out'
+        pipeline.CACHE_DIR.mkdir()
+        (pipeline.CACHE_DIR / '32024R2977.fmx4.zip').write_bytes(zip_bytes({
+            'L_X.000101.fmx.xml': '<ACT><TITLE><TI><P>Metered Act</P></TI></TITLE></ACT>',
+            'L_X.000301.fmx.xml': '<ANNEX><TITLE><TI><P>ANNEX</P></TI></TITLE></ANNEX>',
+        }))
+        self.doc = {'celex': '32024R2977', 'title': 'Metered Act', 'output_dir': 'acts'}
+    
+    def tearDown(self):
+        pipeline.CACHE_DIR, pipeline.BASE_DIR = self.originals
+        self.tmp.cleanup()
+    
+    def _run(self, **kwargs):
+        metrics = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertTrue(process_document(self.doc, metrics=metrics, **kwargs))
+        return {record['stage']: record for record in metrics}
+    
+    def test_records_each_stage(self):
+        stages = self._run(manifest={})
+        self.assertEqual(list(stages),
+                         ['manifest', 'extract', 'convert', 'annexes', 'header', 'write'])
+        self.assertTrue(all(r['ok'] and r['duration_ms'] >= 0 for r in stages.values()))
+        self.assertFalse(stages['manifest']['cache_hit'])
+        self.assertEqual(stages['convert']['xml_elements'], 4)
+        self.assertGreater(stages['convert']['bytes_out'], 0)
+        self.assertGreater(stages['header']['bytes_out'], stages['header']['bytes_in'])
+    
+    def test_output_written_once_with_header_and_annexes(self):
+        self._run()
+        md_path = pipeline.BASE_DIR / 'acts' / '32024R2977.md'
+        content = md_path.read_text(encoding='utf-8')
+        self.assertTrue(content.startswith('> **CELEX:** 32024R2977'))
+        self.assertLess(content.index('# Metered Act'), content.index('## ANNEX'))
+        self.assertEqual([p.name for p in md_path.parent.iterdir()], ['32024R2977.md'])
+    
+    def test_failed_validation_leaves_previous_output(self):
+        (pipeline.CACHE_DIR / '32024R2977.fmx4.zip').write_bytes(zip_bytes({
+            'L_X.000101.fmx.xml': '<ACT><TITLE><TI><P>Metered Act</P></TI></TITLE></ACT>',
+            'L_X.000301.fmx.xml': '<DOC.SUPPL><P>Renders nothing</P></DOC.SUPPL>',
+        }))
+        md_path = pipeline.BASE_DIR / 'acts' / '32024R2977.md'
+        md_path.parent.mkdir(parents=True)
+        md_path.write_text('previous build\n', encoding='utf-8')
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertFalse(process_document(self.doc))
+        self.assertEqual(md_path.read_text(encoding='utf-8'), 'previous build\n')
+    
+    def test_up_to_date_document_is_a_cache_hit(self):
+        manifest = {}
+        self._run(manifest=manifest)
+        stages = self._run(manifest=manifest)
+        self.assertEqual(list(stages), ['manifest'])
+        self.assertTrue(stages['manifest']['cache_hit'])
+    
+    def test_profile_forces_rebuild_and_dumps_stats(self):
+        manifest = {}
+        self._run(manifest=manifest)
+        profile_path = self.dir / 'profiles' / '32024R2977.prof'
+        stages = self._run(manifest=manifest, profile_path=profile_path)
+        self.assertIn('convert', stages)
+        self.assertGreater(pstats.Stats(str(profile_path)).total_calls, 0)
+    
+    def test_write_metrics_jsonl(self):
+        path = self.dir / 'metrics.jsonl'
+        pipeline.write_metrics(path, [{'celex': 'A', 'stage': 'convert'},
+                                      {'celex': 'A', 'stage': 'header'}])
+        records = [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+        self.assertEqual([r['stage'] for r in records], ['convert', 'header'])
+
+
+@unittest.skipUnless(multiprocessing.get_start_method() == 'fork',
+                     "workers must inherit the patched CACHE_DIR/BASE_DIR")
+class TestParallelRun(unittest.TestCase):
+    """Test that run_documents() with jobs > 1 matches the sequential run."""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.originals = (pipeline.CACHE_DIR, pipeline.BASE_DIR)
+        pipeline.CACHE_DIR = self.dir / 'cache'
+        pipeline.CACHE_DIR.mkdir()
+        self.documents = []
+        for n in range(1, 6):
+            celex = f'3202{n}R000{n}'
+            self.documents.append({'celex': celex, 'title': f'Act {n}', 'output_dir': 'acts'})
+            if n == 3:
+                continue  # Not cached: a failure in the middle of the run
+            # Bigger early documents, so later workers tend to finish first
+            body = ''.join(f'<P>Recital {i}</P>' for i in range((6 - n) * 200))
+            (pipeline.CACHE_DIR / f'{celex}.fmx4.zip').write_bytes(zip_bytes({
+                'L_X.000101.fmx.xml': f'<ACT><TITLE><TI><P>Act {n}</P></TI></TITLE>{body}</ACT>',
+            }))
+        self.documents.append({'celex': '32026R0006', 'title': 'Act 6', 'output_dir': 'acts',
+                               'skip_pipeline': True})
+    
+    def tearDown(self):
+        pipeline.CACHE_DIR, pipeline.BASE_DIR = self.originals
+        self.tmp.cleanup()
+    
+    def _run(self, name, jobs):
+        pipeline.BASE_DIR = self.dir / name
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            flags = list(pipeline.run_documents(self.documents, jobs=jobs, annex_jobs=1))
+        return flags, output.getvalue()
+    
+    def test_jobs_match_sequential_run(self):
+        sequential_flags, sequential_log = self._run('sequential', jobs=1)
+        parallel_flags, parallel_log = self._run('parallel', jobs=3)
+        
+        self.assertEqual(sequential_flags, [True, True, False, True, True, True])
+        self.assertEqual(parallel_flags, sequential_flags)
+        # Each document's log is printed whole and in config order
+        self.assertEqual(parallel_log, sequential_log)
+        celexes = [line.split()[-1] for line in parallel_log.splitlines() if 'CELEX:' in line]
+        self.assertEqual(celexes, [doc['celex'] for doc in self.documents])
+        for doc in self.documents[:5]:
+            name = f"acts/{doc['celex']}.md"
+            sequential_md = self.dir / 'sequential' / name
+            if sequential_md.exists():
+                self.assertEqual((self.dir / 'parallel' / name).read_bytes(),
+                                 sequential_md.read_bytes())
+            else:
+                self.assertFalse((self.dir / 'parallel' / name).exists())
+
+
+class TestValidation(unittest.TestCase):
+    """Test the lint gate run after conversion."""
+    
+    def test_checked_in_corpus_passes(self):
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            errors = pipeline.validate_documents(jobs=2)
+        self.assertEqual(errors, 0, output.getvalue())
+    
+    def test_errors_outside_generated_trees_are_warnings(self):
+        # A legal-looking title without the CELEX/Source header fails META001/META002
+        page = '# Regulation on something\n\nText.\n'
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            for name in ('01_regulation', '03_arf'):
+                (base / name).mkdir()
+                (base / name / 'page.md').write_text(page, encoding='utf-8')
+            with mock.patch.object(pipeline, 'BASE_DIR', base), \
+                    contextlib.redirect_stdout(io.StringIO()) as output:
+                errors = pipeline.validate_documents(jobs=1)
+        self.assertEqual(errors, 2)
+        self.assertIn('❌ 01_regulation/page.md:1 [META001]', output.getvalue())
+        self.assertIn('⚠️  03_arf/page.md:1 [META001]', output.getvalue())
+
+
+class TestDownloader(unittest.TestCase):
+    """Test the streaming, resumable archive downloader."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.server = StandInServer(('127.0.0.1', 0), CellarStandIn)
+        cls.server.archives = {}
+        cls.server.ranges = []
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.server.archives.clear()
+        self.server.ranges.clear()
+        self.archive = zip_bytes({'L_X.000101.fmx.xml': '<ACT>' + 'x' * 5000 + '</ACT>'})
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def test_full_download(self):
+        self.server.archives['/a'] = self.archive
+        cache_path = self.dir / 'A.fmx4.zip'
+        size = fetch_archive(f"{self.base_url}/a", cache_path)
+        self.assertEqual(size, len(self.archive))
+        self.assertEqual(cache_path.read_bytes(), self.archive)
+        self.assertFalse(cache_path.with_name('A.fmx4.zip.part').exists())
+    
+    def _interrupt(self, cache_path, size):
+        """Leave a .part holding the first size bytes of an earlier version of the archive."""
+        part_path = cache_path.with_name(cache_path.name + '.part')
+        self.server.archives['/a'] = self.archive[:size]  # Incomplete: kept for resume
+        with self.assertRaises(ValueError):
+            fetch_archive(f"{self.base_url}/a", cache_path)
+        self.server.archives['/a'] = self.archive
+        self.assertEqual(part_path.read_bytes(), self.archive[:size])
+        self.server.ranges.clear()
+        return part_path
+    
+    def test_resume_from_partial_file(self):
+        cache_path = self.dir / 'A.fmx4.zip'
+        self.server.archives['/a'] = self.archive
+        part_path = cache_path.with_name('A.fmx4.zip.part')
+        part_path.write_bytes(self.archive[:100])
+        validator = f'"{hashlib.sha256(self.archive).hexdigest()[:16]}"'
+        cache_path.with_name('A.fmx4.zip.part.json').write_text(
+            json.dumps({'if_range': validator}), encoding='utf-8')
+        fetch_archive(f"{self.base_url}/a", cache_path)
+        self.assertEqual(self.server.ranges, ['bytes=100-'])
+        self.assertEqual(cache_path.read_bytes(), self.archive)
+        self.assertEqual(sorted(p.name for p in self.dir.iterdir()), ['A.fmx4.zip'])
+    
+    def test_changed_archive_restarts_from_zero(self):
+        cache_path = self.dir / 'A.fmx4.zip'
+        self._interrupt(cache_path, 200)
+        # The .part was started from a different archive: its ETag no longer matches
+        fetch_archive(f"{self.base_url}/a", cache_path)
+        self.assertEqual(self.server.ranges, ['bytes=200-'])
+        self.assertEqual(cache_path.read_bytes(), self.archive)
+    
+    def test_part_without_validator_not_resumed(self):
+        self.server.archives['/a'] = self.archive
+        cache_path = self.dir / 'A.fmx4.zip'
+        cache_path.with_name('A.fmx4.zip.part').write_bytes(b'PK stale bytes')
+        fetch_archive(f"{self.base_url}/a", cache_path)
+        self.assertEqual(self.server.ranges, [None])
+        self.assertEqual(cache_path.read_bytes(), self.archive)
+    
+    def test_invalid_part_discarded_on_416(self):
+        cache_path = self.dir / 'A.fmx4.zip'
+        self.server.archives['/a'] = b'PK' + b'x' * 300  # Complete, but not a ZIP
+        with self.assertRaises(ValueError):
+            fetch_archive(f"{self.base_url}/a", cache_path)
+        with self.assertRaises(ValueError):
+            fetch_archive(f"{self.base_url}/a", cache_path)
+        self.assertEqual(self.server.ranges, [None, 'bytes=302-'])
+        self.assertEqual(list(self.dir.iterdir()), [])
+        # The next run starts over instead of failing forever
+        self.server.archives['/a'] = self.archive
+        fetch_archive(f"{self.base_url}/a", cache_path)
+        self.assertEqual(cache_path.read_bytes(), self.archive)
+    
+    def test_non_zip_rejected(self):
+        self.server.archives['/a'] = b'<html>Not found</html>'
+        cache_path = self.dir / 'A.fmx4.zip'
+        with self.assertRaises(ValueError):
+            fetch_archive(f"{self.base_url}/a", cache_path)
+        self.assertFalse(cache_path.exists())
+        self.assertFalse(cache_path.with_name('A.fmx4.zip.part').exists())
+    
+    def test_truncated_zip_kept_for_resume(self):
+        self.server.archives['/a'] = self.archive[:200]
+        cache_path = self.dir / 'A.fmx4.zip'
+        with self.assertRaises(ValueError):
+            fetch_archive(f"{self.base_url}/a", cache_path)
+        self.assertFalse(cache_path.exists())
+        self.assertTrue(cache_path.with_name('A.fmx4.zip.part').exists())
+    
+    def test_prefetch_downloads_only_missing(self):
+        for name in ('one', 'two', 'three'):
+            self.server.archives[f'/{name}'] = self.archive
+        documents = [
+            {'celex': 'ONE', 'cellar_id': 'one'},
+            {'celex': 'TWO', 'cellar_id': 'two'},
+            {'celex': 'THREE', 'cellar_id': 'three'},
+            {'celex': 'SKIPPED', 'cellar_id': 'three', 'skip_pipeline': True},
+            {'celex': 'NO_ID'},
+        ]
+        (self.dir / 'ONE.fmx4.zip').write_bytes(b'PK cached')
+        original = (pipeline.CACHE_DIR, pipeline.CELLAR_URL)
+        pipeline.CACHE_DIR = self.dir
+        pipeline.CELLAR_URL = self.base_url + '/{cellar_id}'
+        try:
+            failed = prefetch_formex(documents, jobs=2)
+        finally:
+            pipeline.CACHE_DIR, pipeline.CELLAR_URL = original
+        self.assertEqual(failed, set())
+        self.assertEqual(len(self.server.ranges), 2)
+        self.assertEqual((self.dir / 'ONE.fmx4.zip').read_bytes(), b'PK cached')
+        self.assertEqual((self.dir / 'TWO.fmx4.zip').read_bytes(), self.archive)
+        self.assertEqual((self.dir / 'THREE.fmx4.zip').read_bytes(), self.archive)
+        self.assertFalse((self.dir / 'SKIPPED.fmx4.zip').exists())
+    
+    def test_failed_forced_download_is_not_converted(self):
+        # The re-download fails, leaving last run's archive in the cache
+        (self.dir / 'GONE.fmx4.zip').write_bytes(zip_bytes({
+            'L_X.000101.fmx.xml': '<ACT><TITLE><TI><P>Stale Act</P></TI></TITLE></ACT>',
+        }))
+        documents = [{'celex': 'GONE', 'cellar_id': 'gone', 'title': 'Stale Act',
+                      'output_dir': 'acts'}]
+        output = io.StringIO()
+        with mock.patch.object(pipeline, 'CACHE_DIR', self.dir), \
+                mock.patch.object(pipeline, 'MANIFEST_FILE', self.dir / 'manifest.json'), \
+                mock.patch.object(pipeline, 'BASE_DIR', self.dir / 'out'), \
+                mock.patch.object(pipeline, 'CELLAR_URL', self.base_url + '/{cellar_id}'), \
+                mock.patch.object(pipeline, 'load_config', return_value={'documents': documents}), \
+                mock.patch.object(sys, 'argv', ['pipeline.py', '--force', '--no-validate']), \
+                contextlib.redirect_stdout(output):
+            self.assertEqual(prefetch_formex(documents, force=True), {'GONE'})
+            self.assertEqual(pipeline.main(), 1)
+        self.assertIn('❌ Failed: 1', output.getvalue())
+        self.assertNotIn('Using cached', output.getvalue())
+        self.assertFalse((self.dir / 'out' / 'acts' / 'GONE.md').exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
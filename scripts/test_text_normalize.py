@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Unit tests for text_normalize.py.
+
+Tests cover:
+1. Whitespace collapsing, trailing punctuation and consolidation markers
+2. Same results as the re.sub() chains the converters used to run
+3. The fast path: plain text never reaches the marker patterns
+4. Every converter using the shared functions
+"""
+
+import random
+import re
+import unittest
+from pathlib import Path
+from unittest import mock
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / ".legacy"))
+import text_normalize
+from text_normalize import clean_marked_text, clean_text, normalize_space, strip_markers
+
+
+def reference_clean_marked_text(text):
+    """The regex chain eurlex_html_to_md.clean_text() ran before text_normalize."""
+    if not text:
+        return ""
+    text = re.sub(r'►[A-Z]\d*\s*', '', text)
+    text = re.sub(r'◄', '', text)
+    text = re.sub(r'▼[A-Z]\d*', '', text)
+    text = ' '.join(text.split())
+    text = re.sub(r'\s+,\s*$', ',', text)
+    text = re.sub(r'\s+;\s*$', ';', text)
+    text = re.sub(r'\s+\.\s*$', '.', text)
+    return text.strip()
+
+
+class TestNormalization(unittest.TestCase):
+    """Test the individual normalizations."""
+    
+    def test_normalize_space(self):
+        self.assertEqual(normalize_space("  a \n\t b\xa0 c  "), "a b c")
+        self.assertEqual(normalize_space(None), "")
+        self.assertEqual(normalize_space("a ;"), "a ;")
+    
+    def test_clean_text_trailing_punctuation(self):
+        self.assertEqual(clean_text("the provider ;\n"), "the provider;")
+        self.assertEqual(clean_text("in Article 5 ."), "in Article 5.")
+        self.assertEqual(clean_text("points (a) , "), "points (a),")
+        self.assertEqual(clean_text("a , b"), "a , b")
+        self.assertEqual(clean_text(""), "")
+    
+    def test_markers(self):
+        self.assertEqual(strip_markers("►M1 amended text ◄"), "amended text ")
+        self.assertEqual(clean_marked_text("▼B\nArticle 3 ►M2 (a) ◄ ;"), "Article 3 (a);")
+        # Removing ►M1 brings ▼ next to its letter, as the sequential chain did
+        self.assertEqual(clean_marked_text("x ▼►M1 B"), "x")
+    
+    def test_matches_reference_chain(self):
+        rng = random.Random(24)
+        alphabet = ['a', 'B', 'M', '1', ' ', '  ', '\n', '\xa0', '►', '◄', '▼', ',', ';', '.']
+        for _ in range(20_000):
+            text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+            self.assertEqual(clean_marked_text(text), reference_clean_marked_text(text), repr(text))
+    
+    def test_plain_text_skips_marker_patterns(self):
+        patterns = {name: mock.Mock(wraps=getattr(text_normalize, name))
+                    for name in ('AMENDMENT_MARKER', 'ALTERNATIVE_MARKER')}
+        with mock.patch.multiple(text_normalize, **patterns):
+            clean_marked_text("  Article 1 \n Subject matter .")
+            for pattern in patterns.values():
+                pattern.sub.assert_not_called()
+            clean_marked_text("►M1 Article 1")
+            patterns['AMENDMENT_MARKER'].sub.assert_called_once()
+
+
+class TestConverters(unittest.TestCase):
+    """Test that all converters normalize through text_normalize."""
+    
+    def test_converters_share_the_module(self):
+        import eurlex_formex
+        import eurlex_html_to_md
+        import formex_to_md_v3
+        self.assertIs(eurlex_html_to_md.clean_text, clean_marked_text)
+        self.assertIs(formex_to_md_v3.clean_text, clean_text)
+        self.assertIs(eurlex_formex.normalize_space, normalize_space)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Text Normalization
+==================
+
+The text clean-up shared by the converters, called for nearly every text
+node they emit:
+
+    normalize_space()    collapse whitespace runs, strip the ends
+                         (eurlex_formex.py's simple Formex converter)
+    clean_text()         normalize_space() plus " ," / " ;" / " ." at the end
+                         of a text pulled onto the word (formex_to_md_v3.py)
+    clean_marked_text()  clean_text() after removing EUR-Lex consolidation
+                         markers ►M1, ◄, ▼B (eurlex_html_to_md.py)
+
+Fast path: whitespace is collapsed with str.split()/join and the trailing
+punctuation fix is an endswith() check, so plain text never reaches the
+regex engine. The precompiled marker patterns only run on text containing
+one of ►, ◄ or ▼.
+
+Benchmark:
+    python scripts/bench/bench_clean_text.py
+"""
+
+import re
+
+# Applied in this order: removing ►M1 can bring a ▼ next to its letter
+AMENDMENT_MARKER = re.compile(r'►[A-Z]\d*\s*')  # ►M1, ►M2, ►B, ...
+CLOSING_MARKER = '◄'
+ALTERNATIVE_MARKER = re.compile(r'▼[A-Z]\d*')  # ▼B, ▼M3, ...
+
+# A space before closing punctuation at the end of a text, e.g. "within ;"
+SPACED_END_PUNCTUATION = (' ,', ' ;', ' .')
+
+
+def normalize_space(text) -> str:
+    """Collapse whitespace runs to single spaces and strip the ends; None gives ""."""
+    if not text:
+        return ""
+    return ' '.join(text.split())
+
+
+def clean_text(text) -> str:
+    """Normalize whitespace and pull a trailing ',', ';' or '.' onto the last word."""
+    if not text:
+        return ""
+    text = ' '.join(text.split())
+    if text.endswith(SPACED_END_PUNCTUATION):
+        text = text[:-2] + text[-1]
+    return text
+
+
+def strip_markers(text: str) -> str:
+    """Remove EUR-Lex consolidation markers (►M1, ◄, ▼B) from text."""
+    # Three substring scans in C; much cheaper than any regex pass
+    if '►' not in text and '◄' not in text and '▼' not in text:
+        return text
+    text = AMENDMENT_MARKER.sub('', text)
+    text = text.replace(CLOSING_MARKER, '')
+    return ALTERNATIVE_MARKER.sub('', text)
+
+
+def clean_marked_text(text) -> str:
+    """clean_text() for EUR-Lex HTML, whose consolidated texts carry amendment markers."""
+    if not text:
+        return ""
+    return clean_text(strip_markers(text))